@@ -1,12 +1,10 @@
 import sys
 import os
-import tempfile
 import shutil
-import zipfile
-import stat
 import uuid
 import re
-import patoolib
+import time
+import threading
 import ctypes
 import shiboken6
 
@@ -15,7 +13,7 @@ if sys.stdout is None:
 if sys.stderr is None:
     sys.stderr = open(os.devnull, "w")
 
-from qfluentwidgets import setFont, PrimaryPushButton, PushButton, LineEdit, setTheme, Theme, EditableComboBox, CheckBox, InfoBar, InfoBarPosition, ProgressRing, ToolButton, StateToolTip
+from qfluentwidgets import setFont, PrimaryPushButton, PushButton, LineEdit, setTheme, Theme, EditableComboBox, CheckBox, InfoBar, InfoBarPosition, ProgressRing, ToolButton, StateToolTip, CaptionLabel
 from qfluentwidgets import FluentIcon as FIF
 from PySide6.QtWidgets import (
     QMessageBox, QApplication, QWidget, QLabel, QDialog, 
@@ -24,23 +22,28 @@ from PySide6.QtWidgets import (
     )
 from PySide6.QtCore import Qt, QThread, Signal, QSettings, QTimer, QRegularExpression
 from PySide6.QtGui import QIcon, QKeySequence, QIntValidator, QRegularExpressionValidator, QShortcut
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
-from PIL import Image, ImageOps
 from concurrent.futures import ThreadPoolExecutor
 
 from utils import (
     resource_path, documents_dir, downloads_dir, DOC_MAIN_DIR,
     suppress_cmd_window, get_optimal_workers,
     tooltip_stylesheet, label_stylesheet,
-    show_error, show_info, show_success
+    show_error, show_info, show_success, show_warning
 )
 from logger_utils import get_logger
 from widgets import (
     ProductLineEdit, TagSelectionDialog, CustomCompactSpinBox, ImageLabel,
-    ZipThread, FileExplorer
+    BuildThread, FileExplorer, TrashPurgeThread
+)
+from config_utils import load_configurations, load_compression_policy
+from packager import CompressionPolicy, format_size, format_duration
+from pipeline import BuildJob, open_member_cache, build_package
+from archive_cache import open_archive_cache
+from file_ops import move_to_trash
+from extractor import (
+    DEFAULT_NESTED_DEPTH, make_staging_dir, list_tree, find_conflicts, commit_tree,
+    ArchiveImporter, ExtractionProgress, CommitLog, ExtractionCancelled
 )
-from config_utils import load_configurations
 from settings import SettingsDialog
 from updater import UpdateManager
 from version import APP_VERSION
@@ -52,6 +55,14 @@ settings = QSettings("Syst3mApps", "DIMCreator")
 
 documents_path = documents_dir()
 doc_main_dir = DOC_MAIN_DIR
+
+EXTRACTION_PHASES = {
+    "listing": "Reading archive",
+    "extracting": "Extracting",
+    "nested": "Extracting embedded archives",
+    "committing": "Moving into Content",
+}
+
 logo_path = resource_path(os.path.join('assets', 'images', 'logo', 'favicon.ico'))
 
 class DIMPackageGUI(QWidget):
@@ -59,6 +70,7 @@ class DIMPackageGUI(QWidget):
         super().__init__()
         self.doc_main_dir = doc_main_dir
         self.storeitems, self.store_prefixes, self.available_tags, self.daz_folders = load_configurations(self.doc_main_dir)
+        self.compression_rules = load_compression_policy(self.doc_main_dir)
         self.stateTooltip = None
         self.ensure_directory_structure()
         setTheme(Theme.DARK)
@@ -69,6 +81,11 @@ class DIMPackageGUI(QWidget):
         self.updater.schedule_on_startup_if_enabled()
         QTimer.singleShot(0, self.updateSourcePrefixBasedOnStore)
         self._extractionHadError = False
+        self._pendingArchives = []
+        self.purge_thread = None
+        self._purgeAgain = False
+        # Leftovers from a Clear All or close that did not finish deleting.
+        QTimer.singleShot(0, self.startTrashPurge)
 
 
     def loadSettings(self):
@@ -77,6 +94,17 @@ class DIMPackageGUI(QWidget):
         self.last_destination_folder = settings.value("last_destination_folder", os.path.expanduser("~"), type=str)
         self.copy_template_files = settings.value("copy_template_files", False, type=bool)
         self.template_destination = settings.value("template_destination", "", type=str)
+        self.nested_archive_depth = settings.value("nested_archive_depth", DEFAULT_NESTED_DEPTH, type=int)
+        self.import_workers = settings.value("import_workers", 2, type=int)
+        self.archive_cache_enabled = settings.value("archive_cache_enabled", True, type=bool)
+        self.archive_cache_max_gb = settings.value("archive_cache_max_gb", 4, type=int)
+        self.member_cache_enabled = settings.value("member_cache_enabled", True, type=bool)
+        self.member_cache_max_gb = settings.value("member_cache_max_gb", 4, type=int)
+        self.member_cache_verify_hash = settings.value("member_cache_verify_hash", False, type=bool)
+        self.split_parts_enabled = settings.value("split_parts_enabled", False, type=bool)
+        self.split_size_mb = settings.value("split_size_mb", 2048, type=int)
+        self.split_compressed = settings.value("split_compressed", False, type=bool)
+        self.keep_manifest_files = settings.value("keep_manifest_files", False, type=bool)
 
     def saveSettings(self):
         settings.setValue("prefix_input", self.prefix_input.text())
@@ -84,6 +112,13 @@ class DIMPackageGUI(QWidget):
         settings.setValue("last_destination_folder", self.last_destination_folder)
 
     def closeEvent(self, event):
+        # DIMBuild is renamed away below; not while files are still being
+        # copied, moved or deleted in it.
+        if not self.fileExplorer.stopFileOperations():
+            show_warning(self, "File operation", "A file operation is still finishing; close again in a moment.")
+            event.ignore()
+            return
+
         try:
             self.process_button.setEnabled(False)
             self.extract_button.setEnabled(False)
@@ -104,7 +139,9 @@ class DIMPackageGUI(QWidget):
         except Exception:
             pass
 
-        for attr in ("zip_thread", "extractionWorker"):
+        self._pendingArchives = []
+        self.fileExplorer.stopSizeScanner()
+        for attr in ("build_thread", "extractionWorker", "purge_thread"):
             t = getattr(self, attr, None)
             try:
                 if t and t.isRunning():
@@ -129,7 +166,8 @@ class DIMPackageGUI(QWidget):
 
         self.saveSettings()
         self.cleanUpTemporaryImage()
-        self.cleanDIMBuildFolder()
+        # Only the rename happens on close; the next start deletes the rest.
+        self.cleanDIMBuildFolder(purge=False)
 
         super().closeEvent(event)
 
@@ -204,25 +242,32 @@ class DIMPackageGUI(QWidget):
         except Exception:
             pass
 
-    def _setImageBusy(self, busy: bool, text: str = "Processing…", percent: int | None = None):
+    def _setImageBusy(self, busy: bool, text: str = "Processing…", percent: int | None = None, detail: str | None = None):
         try:
             if busy:
-                self.progress_ring.setValue(0)
+                if self._image_overlay.isHidden():
+                    self.progress_ring.setValue(0)
+                    self._overlay_detail.clear()
 
                 if text:
                     self._overlay_text.setText(text)
                 if percent is not None:
                     self.progress_ring.setValue(max(0, min(100, percent)))
-
-                eff = QGraphicsBlurEffect(self.image_label)
-                eff.setBlurRadius(12)
-                self._current_blur = eff
-                self.image_label.setGraphicsEffect(eff)
-
-                self._image_overlay.show()
-                self._image_overlay.raise_()
+                if detail is not None:
+                    self._overlay_detail.setText(detail)
+
+                if getattr(self, "_current_blur", None) is None:
+                    eff = QGraphicsBlurEffect(self.image_label)
+                    eff.setBlurRadius(12)
+                    self._current_blur = eff
+                    self.image_label.setGraphicsEffect(eff)
+
+                if self._image_overlay.isHidden():
+                    self._image_overlay.show()
+                    self._image_overlay.raise_()
             else:
                 self._image_overlay.hide()
+                self._overlay_detail.clear()
 
                 eff = getattr(self, "_current_blur", None)
                 if eff is not None:
@@ -360,7 +405,12 @@ class DIMPackageGUI(QWidget):
         self.clear_button = ToolButton(FIF.ERASE_TOOL, self)
         self.clear_button.clicked.connect(self.clearAll)
         self.clear_button.setToolTip("Clear all input fields and clean the DIMBuild folder.")
+        self.cancel_button = PushButton("Cancel", self)
+        self.cancel_button.clicked.connect(self.cancelPackaging)
+        self.cancel_button.setToolTip("Stop packaging and discard the unfinished archive.")
+        self.cancel_button.hide()
         actions_h.addWidget(self.process_button, 0)
+        actions_h.addWidget(self.cancel_button, 0)
         actions_h.addWidget(self.clear_button, 0)
         actions_h.addStretch(1)
         form.addRow(L("Actions:"), actions_row)
@@ -429,9 +479,14 @@ class DIMPackageGUI(QWidget):
         self._overlay_text.setStyleSheet("color: white; font-size: 10pt;")
         self._overlay_text.setAlignment(Qt.AlignHCenter)
 
+        self._overlay_detail = QLabel("", self._image_overlay)
+        self._overlay_detail.setStyleSheet("color: #cfcfcf; font-size: 9pt;")
+        self._overlay_detail.setAlignment(Qt.AlignHCenter)
+
         ov.addWidget(self.progress_ring, 0, Qt.AlignCenter)
         ov.addSpacing(8)
         ov.addWidget(self._overlay_text, 0, Qt.AlignCenter)
+        ov.addWidget(self._overlay_detail, 0, Qt.AlignCenter)
 
         stack.addWidget(self._image_overlay)
         self._image_overlay.hide()
@@ -475,6 +530,12 @@ class DIMPackageGUI(QWidget):
         self.fileExplorer.setMinimumHeight(260)
         root.addWidget(self.fileExplorer, 1)
 
+        self.package_size_label = CaptionLabel("Content: counting…", self)
+        self.package_size_label.setToolTip("Size of DIMBuild/Content and the estimated size of the packaged zip.")
+        root.addWidget(self.package_size_label, 0)
+        self.fileExplorer.contentTotalsChanged.connect(self.updatePackageSizeEstimate)
+        self.fileExplorer.setCompressionPolicy(CompressionPolicy.from_config(self.compression_rules))
+
         QShortcut(QKeySequence("Ctrl+G"), self, self.generateGUID)
         QShortcut(QKeySequence("Ctrl+Return"), self, self.process)
         QShortcut(QKeySequence("Ctrl+N"), self, self.clearAll)
@@ -490,7 +551,21 @@ class DIMPackageGUI(QWidget):
 
         dialog.copy_templates_checkbox.setChecked(self.copy_template_files)
         dialog.template_destination_field.setText(self.template_destination)
+        dialog.nested_depth_spinbox.setValue(self.nested_archive_depth)
+        dialog.import_workers_spinbox.setValue(self.import_workers)
+        dialog.archive_cache_checkbox.setChecked(self.archive_cache_enabled)
+        dialog.archive_cache_size_spinbox.setValue(self.archive_cache_max_gb)
+        dialog._updateArchiveCacheControls()
         dialog.auto_update_checkbox.setChecked(settings.value("auto_update_check", True, type=bool))
+        dialog.member_cache_checkbox.setChecked(self.member_cache_enabled)
+        dialog.member_cache_size_spinbox.setValue(self.member_cache_max_gb)
+        dialog.member_cache_hash_checkbox.setChecked(self.member_cache_verify_hash)
+        dialog._updateCacheControls()
+        dialog.split_parts_checkbox.setChecked(self.split_parts_enabled)
+        dialog.split_size_spinbox.setValue(self.split_size_mb)
+        dialog.split_compressed_checkbox.setChecked(self.split_compressed)
+        dialog._updateSplitControls()
+        dialog.keep_manifests_checkbox.setChecked(self.keep_manifest_files)
 
         if dialog.exec():
             self.copy_template_files = dialog.copy_templates_checkbox.isChecked()
@@ -499,11 +574,39 @@ class DIMPackageGUI(QWidget):
             settings.setValue("copy_template_files", self.copy_template_files)
             settings.setValue("template_destination", self.template_destination)
 
+            self.nested_archive_depth = dialog.nested_depth_spinbox.value()
+            settings.setValue("nested_archive_depth", self.nested_archive_depth)
+            self.import_workers = dialog.import_workers_spinbox.value()
+            settings.setValue("import_workers", self.import_workers)
+            self.archive_cache_enabled = dialog.archive_cache_checkbox.isChecked()
+            self.archive_cache_max_gb = dialog.archive_cache_size_spinbox.value()
+            settings.setValue("archive_cache_enabled", self.archive_cache_enabled)
+            settings.setValue("archive_cache_max_gb", self.archive_cache_max_gb)
+
+            self.member_cache_enabled = dialog.member_cache_checkbox.isChecked()
+            self.member_cache_max_gb = dialog.member_cache_size_spinbox.value()
+            self.member_cache_verify_hash = dialog.member_cache_hash_checkbox.isChecked()
+            settings.setValue("member_cache_enabled", self.member_cache_enabled)
+            settings.setValue("member_cache_max_gb", self.member_cache_max_gb)
+            settings.setValue("member_cache_verify_hash", self.member_cache_verify_hash)
+
+            self.split_parts_enabled = dialog.split_parts_checkbox.isChecked()
+            self.split_size_mb = dialog.split_size_spinbox.value()
+            self.split_compressed = dialog.split_compressed_checkbox.isChecked()
+            settings.setValue("split_parts_enabled", self.split_parts_enabled)
+            settings.setValue("split_size_mb", self.split_size_mb)
+            settings.setValue("split_compressed", self.split_compressed)
+
+            self.keep_manifest_files = dialog.keep_manifests_checkbox.isChecked()
+            settings.setValue("keep_manifest_files", self.keep_manifest_files)
+
             auto_enabled = dialog.auto_update_checkbox.isChecked()
             settings.setValue("auto_update_check", auto_enabled)
             self.updater.set_auto_enabled(auto_enabled)
 
             self.storeitems, self.store_prefixes, self.available_tags, self.daz_folders = load_configurations(self.doc_main_dir)
+            self.compression_rules = load_compression_policy(self.doc_main_dir)
+            self.fileExplorer.setCompressionPolicy(CompressionPolicy.from_config(self.compression_rules))
             self.store_input.clear()
             self.store_input.addItems(self.storeitems)
             self.store_completer = QCompleter(self.storeitems, self)
@@ -519,12 +622,15 @@ class DIMPackageGUI(QWidget):
         self.guid_input.setText(new_guid)
 
     def clearAll(self):
-        if getattr(self, "zip_thread", None) and self.zip_thread.isRunning():
+        if getattr(self, "build_thread", None) and self.build_thread.isRunning():
             show_info(self, "Busy", "Cannot clear while packaging is running.")
             return
         if getattr(self, "extractionWorker", None) and self.extractionWorker.isRunning():
             show_info(self, "Busy", "Cannot clear while extraction is running.")
             return
+        if self.fileExplorer.fileOperationThread is not None:
+            show_info(self, "Busy", "Cannot clear while files are being copied, moved or deleted.")
+            return
         reply = QMessageBox.question(
             self,
             "Clear Confirmation",
@@ -538,28 +644,46 @@ class DIMPackageGUI(QWidget):
             self.clearFields()
             self.cleanDIMBuildFolder()
 
-    def cleanDIMBuildFolder(self):
+    def cleanDIMBuildFolder(self, purge=True):
+        # Everything in DIMBuild is renamed into DIMCreator/Trash, which is
+        # instant, and deleted by a background purge.
         log.info("Attempting to clean the DIMBuild folder.")
-        for filename in os.listdir(self.dimbuild_dir):
-            file_path = os.path.join(self.dimbuild_dir, filename)
-            try:
-                if os.path.isfile(file_path) or os.path.islink(file_path):
-                    os.unlink(file_path)
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path, onerror=self.handle_remove_readonly)
-            except Exception as e:
-                log.error(f"Failed to clean DIMBuild folder: {e}")
+        self.fileExplorer.releaseWatches()
+        try:
+            entries = [os.path.join(self.dimbuild_dir, name) for name in os.listdir(self.dimbuild_dir)]
+            failed = move_to_trash(entries, self.dimbuild_dir)
+            if failed:
+                log.error(f"Failed to clean DIMBuild folder: {len(failed)} items could not be moved, e.g. {failed[0]}")
+            else:
+                log.info("DIMBuild folder successfully cleared.")
+        except Exception as e:
+            log.error(f"Failed to clean DIMBuild folder: {e}")
 
-        log.info("DIMBuild folder successfully cleared.")
         content_folder_path = os.path.join(self.dimbuild_dir, "Content")
         if not os.path.exists(content_folder_path):
             os.makedirs(content_folder_path, exist_ok=True)
 
+        self.fileExplorer.totals.invalidate(self.dimbuild_dir, subtree=True)
         self.fileExplorer.reinitialize_model(self.dimbuild_dir)
+        if purge:
+            self.startTrashPurge()
 
-    def handle_remove_readonly(self, func, path, exc_info):
-        os.chmod(path, stat.S_IWRITE)
-        func(path)
+    def startTrashPurge(self):
+        t = getattr(self, "purge_thread", None)
+        if t and t.isRunning():
+            self._purgeAgain = True
+            return
+        self._purgeAgain = False
+        t = TrashPurgeThread(self.dimbuild_dir, self)
+        t.finished.connect(self._onTrashPurgeFinished)
+        t.finished.connect(t.deleteLater)
+        self.purge_thread = t
+        t.start()
+
+    def _onTrashPurgeFinished(self):
+        self.purge_thread = None
+        if self._purgeAgain:
+            self.startTrashPurge()
 
     def clearFields(self):
         log.info("Attempting to clear all data.")
@@ -584,27 +708,40 @@ class DIMPackageGUI(QWidget):
         return valid
 
     def process(self):
-        if getattr(self, "zip_thread", None) and self.zip_thread.isRunning():
+        if getattr(self, "build_thread", None) and self.build_thread.isRunning():
             show_info(self, "Already running", "Packaging is already in progress.")
             return
+        if self.fileExplorer.fileOperationThread is not None:
+            show_info(self, "Busy", "Cannot package while files are being copied, moved or deleted.")
+            return
 
         dimbuild_dir = os.path.join(doc_main_dir, "DIMBuild")
         content_dir = os.path.join(dimbuild_dir, "Content")
 
-        store = self.store_input.currentText()
-        product_name = self.product_name_input.text()
-        prefix = self.prefix_input.text()
-        sku = self.sku_input.text()
-        product_part = f"{self.product_part_input.value():02d}"
-        product_tags = self.product_tags_input.text()
-        image_path = self.image_label.imagePath
-        SupportClean = self.support_clean_input.isChecked()
         guid = self.guid_input.text()
         if not guid:
             guid = str(uuid.uuid4())
             self.guid_input.setText(guid)
 
-        if not all([store, product_name, prefix, sku, product_part]):
+        job = BuildJob(
+            content_dir=content_dir,
+            destination_folder="",
+            store=self.store_input.currentText(),
+            prefix=self.prefix_input.text(),
+            sku=self.sku_input.text(),
+            product_name=self.product_name_input.text(),
+            product_part=self.product_part_input.value(),
+            product_tags=self.product_tags_input.text(),
+            guid=guid,
+            image_path=self.image_label.imagePath,
+            clean_support=self.support_clean_input.isChecked(),
+            work_dir=dimbuild_dir,
+            keep_manifests=self.keep_manifest_files,
+        )
+        compression_policy = CompressionPolicy.from_config(self.compression_rules)
+        cache_settings = (self.member_cache_enabled, self.member_cache_max_gb, self.member_cache_verify_hash)
+
+        if job.missing_fields():
             show_info(self, "Missing Required Fields", "Please fill in all required fields to proceed with DIM package creation.", Qt.Vertical)
             return
         
@@ -614,6 +751,7 @@ class DIMPackageGUI(QWidget):
             return
         else:
             self.last_destination_folder = destination_folder
+            job.destination_folder = destination_folder
 
         if not self.contentValidation(content_dir):
             reply = QMessageBox.question(
@@ -628,207 +766,93 @@ class DIMPackageGUI(QWidget):
                 show_info(self, "DIM Creation Canceled", "DIM package creation canceled due to content validation failure.", Qt.Vertical)
                 return
 
-        def prettify(elem):
-            rough = tostring(elem, encoding="utf-8")
-            reparsed = minidom.parseString(rough)
-            pretty = reparsed.toprettyxml(indent=" ")
-            return '\n'.join(pretty.split('\n')[1:])
-
-        def clean_support_directory(content_dir):
-            target_dir = os.path.join(content_dir, "Runtime", "Support")
-            os.makedirs(target_dir, exist_ok=True)
-            log.info("Attempting to clean Support Directory.")
-
-            def handle_remove_readonly(func, path, exc_info):
-                try:
-                    os.chmod(path, stat.S_IWRITE)
-                    func(path)
-                except Exception as e:
-                    log.error(f"Still failed to delete {path}. Reason: {e}")
-
-            for name in os.listdir(target_dir):
-                p = os.path.join(target_dir, name)
-                try:
-                    if os.path.isfile(p) or os.path.islink(p):
-                        os.chmod(p, stat.S_IWRITE)
-                        os.unlink(p)
-                    elif os.path.isdir(p):
-                        shutil.rmtree(p, onerror=handle_remove_readonly)
-                except Exception as e:
-                    log.error(f"Failed to delete {p}. Reason: {e}")
-                    return False
-
-            log.info("Support directory successfully cleaned.")
-            return True
-
-        def process_and_paste_image(content_dir, store, sku, product_name, image_path):
-            if not image_path:
-                return True
-            
-            log.info("Attempting to generate Product cover.")
-            try:
-                sanitized_product_name = re.sub(r'[^A-Za-z0-9._-]+', '_', product_name).strip('_')
-                store_formatted = re.sub(r'[^A-Za-z0-9._-]+', '_', store).strip('_')
-                new_image_name = f"{store_formatted}_{sku}_{sanitized_product_name}.jpg"
-                
-                target_dir = os.path.join(content_dir, "Runtime", "Support")
-                os.makedirs(target_dir, exist_ok=True)
-                new_image_path = os.path.join(target_dir, new_image_name)
-                with Image.open(image_path) as img:
-                    img = ImageOps.exif_transpose(img)
-                    if img.mode != 'RGB':
-                        img = img.convert("RGB")
-                    img.thumbnail((300, 300), Image.Resampling.LANCZOS)
-                    img.save(new_image_path, "JPEG")
-                    log.info("Product cover successfully generated.")
-                return True
-            except Exception as e:
-                log.error(f"An error occurred while processing the image: {str(e)}")
-                return False
-
-        def create_manifest(content_dir):
-            log.info("Attempting to generate Product Manifest.")
-            try:
-                root = Element('DAZInstallManifest', VERSION="0.1")
-                SubElement(root, 'GlobalID', VALUE=guid)
-
-                for subdir, dirs, files in os.walk(content_dir):
-                    dirs.sort()
-                    files.sort()
-                    for file in files:
-                        file_path = os.path.join(subdir, file).replace("\\", "/")
-                        rel_path = os.path.relpath(file_path, start=content_dir).replace("\\", "/")
-                        SubElement(root, 'File', TARGET="Content", ACTION="Install", VALUE=f"Content/{rel_path}")
-
-                xml_str = prettify(root)
-                manifest_path = os.path.join(os.path.dirname(content_dir), "Manifest.dsx")
-                with open(manifest_path, "w", encoding="utf-8", newline="\n") as mf:
-                    mf.write(xml_str)
-                log.info("Product Manifest successfully generated.")
-                return True
-            except Exception as e:
-                log.error(f"An error occurred while creating the manifest: {str(e)}")
-                return False
-
-        def create_supplement(content_dir, product_name, product_tags):
-            log.info("Attempting to generate Product Supplement.")
-            try:
-                root = Element('ProductSupplement', VERSION="0.1")
-                SubElement(root, 'ProductName', VALUE=product_name)
-                SubElement(root, 'InstallTypes', VALUE="Content")
-                SubElement(root, 'ProductTags', VALUE=product_tags)
-                
-                xml_str = prettify(root)
-                supplement_path = os.path.join(os.path.dirname(content_dir), "Supplement.dsx")
-                with open(supplement_path, "w", encoding="utf-8", newline="\n") as supplement_file:
-                    supplement_file.write(xml_str)
-                log.info("Product Supplement successfully generated.")
-                return True
-            except Exception as e:
-                log.error(f"An error occurred while creating the supplement: {str(e)}")
-                return False
+        part_budget = self.split_size_mb * 1024 ** 2 if self.split_parts_enabled else 0
+        split_compressed = self.split_compressed
+
+        def build_function(stage, progress, cancel_event):
+            cache_enabled, cache_max_gb, cache_verify_hash = cache_settings
+            member_cache = None
+            if cache_enabled:
+                member_cache = open_member_cache(doc_main_dir, cache_max_gb * 1024 ** 3, cache_verify_hash)
+            build_package(
+                job, compression_policy, member_cache, get_optimal_workers(), progress,
+                part_budget, split_compressed, cancel_event, stage, progress_interval=0.1
+            )
 
-        def zip_content_and_manifests(content_dir, prefix, sku, product_part, product_name, destination_folder, report_progress, total_files):
-            prefix_clean = re.sub(r'[^A-Za-z0-9]+', '', str(prefix)).upper()
-            try:
-                sku_formatted = f"{int(str(sku)):08d}"
-            except ValueError:
-                sku_formatted = str(sku).zfill(8)
-
-            sanitized_name = re.sub(r'[^A-Za-z0-9._-]+', '_', str(product_name)).strip('_')
-            zip_name = f"{prefix_clean}{sku_formatted}-{product_part}_{sanitized_name}.zip"
-            zip_path = os.path.join(destination_folder, zip_name)
-
-            arc_base = os.path.dirname(content_dir)
-
-            log.info("Attempting to generate the DIM file.")
-
-            files_zipped = 0
-            ignore_names = {'.DS_Store', 'Thumbs.db', 'desktop.ini', '__MACOSX'}
-
-            with zipfile.ZipFile(zip_path, mode='w', compression=zipfile.ZIP_DEFLATED, compresslevel=9, strict_timestamps=False) as zipf:
-                for root, dirs, files in os.walk(content_dir):
-                    dirs.sort()
-                    files.sort()
-
-                    for fname in files:
-                        if fname in ignore_names:
-                            continue
-                        file_path = os.path.join(root, fname)
-                        arcname = os.path.relpath(file_path, arc_base).replace(os.sep, '/')
-                        zipf.write(file_path, arcname)
-
-                        files_zipped += 1
-                        if total_files > 0:
-                            percent = int((files_zipped / total_files) * 100)
-                            report_progress(99 if percent >= 99 else max(0, percent))
-
-                manifest_path = os.path.join(arc_base, "Manifest.dsx")
-                supplement_path = os.path.join(arc_base, "Supplement.dsx")
-                if os.path.exists(manifest_path):
-                    zipf.write(manifest_path, "Manifest.dsx")
-                if os.path.exists(supplement_path):
-                    zipf.write(supplement_path, "Supplement.dsx")
-
-            report_progress(100)
-            log.info(f"DIM file created at: {zip_path}")
-
-        if SupportClean and not clean_support_directory(content_dir):
-            log.error("Failed to clean the Support directory. Exiting.")
+        self._setImageBusy(True, "Preparing…", 0)
+        self.build_thread = BuildThread(build_function)
+        bt = self.build_thread
+        self.process_button.setEnabled(False)
+        self.extract_button.setEnabled(False)
+        self.clear_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.show()
+        bt.stageChanged.connect(self.updateStage)
+        bt.progressUpdated.connect(self.updateProgress)
+        bt.succeeded.connect(self.DIMProcessCompleted)
+        bt.succeeded.connect(lambda *, _bt=bt: _bt.deleteLater())
+        bt.cancelled.connect(self.onBuildCancelled)
+        bt.cancelled.connect(lambda *, _bt=bt: _bt.deleteLater())
+        bt.error.connect(self.onBuildError)
+        bt.error.connect(lambda _m, *, _bt=bt: _bt.deleteLater())
+        bt.start()
+
+    def updateStage(self, text):
+        bt = getattr(self, "build_thread", None)
+        if bt and bt.cancel_event.is_set():
             return
+        self._setImageBusy(True, text, 0, "")
 
-        if not process_and_paste_image(content_dir, store, sku, product_name, image_path):
-            log.warning("Image processing failed. Skipping manifest and supplement creation.")
-            show_error(self, "Image Processing Failed", "Failed to process the image. Manifest and supplement creation will be skipped.")
-        else:
-            manifest_created = create_manifest(content_dir)
-            supplement_created = create_supplement(content_dir, product_name, product_tags)
-            
-            if manifest_created and supplement_created:
-                self._setImageBusy(True, "Packaging…", 0)
-                self.zip_thread = ZipThread(content_dir, prefix, sku, product_part, product_name, destination_folder, zip_content_and_manifests)
-                zt = self.zip_thread
-                self.process_button.setEnabled(False)
-                self.extract_button.setEnabled(False)
-                self.clear_button.setEnabled(False)
-                zt.progressUpdated.connect(self.updateProgress)
-                zt.succeeded.connect(self.DIMProcessCompleted)
-                zt.succeeded.connect(lambda *, _zt=zt: _zt.deleteLater())
-                zt.error.connect(self.onZipError)
-                zt.error.connect(lambda _m, *, _zt=zt: _zt.deleteLater())
-                zt.start()
-            else:
-                log.warning("Skipping zip creation due to previous errors.")
-                show_error(self, "DIM Creation Skipped", "Manifest or supplement creation failed. DIM packaging will be skipped.")
-        pass
-
-    def updateProgress(self, percent):
-        self.progress_ring.setValue(percent)
-        self._setImageBusy(True, f"Packaging… {percent}%", percent)
+    def updateProgress(self, percent, bytes_per_second=0.0, eta_seconds=-1.0, current_name=""):
+        bt = getattr(self, "build_thread", None)
+        if bt and bt.cancel_event.is_set():
+            return
+        detail = f"{format_size(bytes_per_second)}/s · ETA {format_duration(eta_seconds)}"
+        if current_name:
+            name = current_name.rsplit("/", 1)[-1]
+            if len(name) > 40:
+                name = name[:18] + "…" + name[-18:]
+            detail += f"\n{name}"
+        self._setImageBusy(True, f"Packaging… {percent}%", percent, detail)
+
+    def cancelPackaging(self):
+        bt = getattr(self, "build_thread", None)
+        if bt and bt.isRunning():
+            log.info("Packaging cancellation requested.")
+            bt.requestInterruption()
+            self.cancel_button.setEnabled(False)
+            self._setImageBusy(True, "Cancelling…")
+
+    def _packagingFinished(self):
+        self.process_button.setEnabled(True)
+        self.extract_button.setEnabled(True)
+        self.clear_button.setEnabled(True)
+        self.cancel_button.hide()
+        self.build_thread = None
 
-    def onZipError(self, message: str):
-        log.error(f"ZIP error: {message}")
+    def onBuildError(self, message: str):
+        log.error(f"Build error: {message}")
         show_error(
-            self, "ZIP Error",
-            f"An error occurred while creating the archive:<br><small>{message}</small>",
+            self, "DIM Creation Failed",
+            f"An error occurred while building the package:<br><small>{message}</small>",
             Qt.Horizontal, InfoBarPosition.TOP_RIGHT, True, 5000
         )
         try:
             self._setImageBusy(False)
         except Exception:
             pass
-        self.process_button.setEnabled(True)
-        self.extract_button.setEnabled(True)
-        self.clear_button.setEnabled(True)
-        self.zip_thread = None
+        self._packagingFinished()
+
+    def onBuildCancelled(self):
+        log.info("Packaging cancelled; unfinished archive removed.")
+        show_info(self, "DIM Creation Canceled", "Packaging was cancelled. No archive was written.")
+        self._setImageBusy(False)
+        self._packagingFinished()
 
     def DIMProcessCompleted(self):
         self.DIMSuccessfullCreatedInfoBar()
         self._setImageBusy(False)
-        self.process_button.setEnabled(True)
-        self.extract_button.setEnabled(True)
-        self.clear_button.setEnabled(True)
-        self.zip_thread = None
+        self._packagingFinished()
 
     def DIMSuccessfullCreatedInfoBar(self):
         show_success(self, "Success", "The DIM has been successfully created and saved.")
@@ -838,58 +862,94 @@ class DIMPackageGUI(QWidget):
             show_info(self, "Extraction running", "Please wait for the current extraction to finish.")
             return
 
-        self._extractionHadError = False
-        archive_file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select Archive File", "", "Archive Files (*.zip *.rar *.7z)"
+        archive_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select Archive Files", "", "Archive Files (*.zip *.rar *.7z)"
         )
-        if not archive_file_path:
+        if not archive_paths:
             return
 
-        self.showExtractionState(True)
         log.info("Extraction started...")
+        self.startExtraction(archive_paths)
 
-        w = ContentExtractionWorker(
-            archive_file_path,
-            set(self.daz_folders),
-            self.content_dir,
-            self.copy_template_files,
-            self.template_destination,
-            parent=self
-        )
-        self.extractionWorker = w
-
-        w.extractionComplete.connect(self.onExtractionComplete)
-        w.extractionError.connect(self.onExtractionError)
-
-        w.finished.connect(self._cleanupExtractionWorker)
-        w.finished.connect(w.deleteLater)
-
-        w.start()
+    def dropExtractArchives(self, archive_paths):
+        if getattr(self, "extractionWorker", None) and self.extractionWorker.isRunning():
+            self._pendingArchives.extend(archive_paths)
+            show_info(self, "Import queued", f"{len(archive_paths)} archives will be extracted after the current import.")
+            return
 
+        log.info("Extraction started from TreeView...")
+        self.startExtraction(archive_paths)
 
-    def dropExtractArchive(self, archive_file_path):
+    def startExtraction(self, archive_paths):
+        if self.fileExplorer.fileOperationThread is not None:
+            show_info(self, "Busy", "Cannot extract while files are being copied, moved or deleted.")
+            return
         self._extractionHadError = False
         self.showExtractionState(True)
-        log.info("Extraction started from TreeView...")
 
-        w = ContentExtractionWorker(
-            archive_file_path,
-            set(self.daz_folders),
-            self.content_dir,
-            self.copy_template_files,
-            self.template_destination,
-            parent=self
-        )
+        archive_cache = None
+        if self.archive_cache_enabled:
+            archive_cache = open_archive_cache(self.doc_main_dir, self.archive_cache_max_gb * 1024 ** 3)
+
+        if len(archive_paths) == 1:
+            w = ContentExtractionWorker(
+                archive_paths[0],
+                set(self.daz_folders),
+                self.content_dir,
+                self.copy_template_files,
+                self.template_destination,
+                self.nested_archive_depth,
+                archive_cache,
+                parent=self
+            )
+        else:
+            w = ImportQueueWorker(
+                archive_paths,
+                set(self.daz_folders),
+                self.content_dir,
+                self.copy_template_files,
+                self.template_destination,
+                self.nested_archive_depth,
+                self.import_workers,
+                archive_cache,
+                parent=self
+            )
+            w.archiveFailed.connect(self.onArchiveFailed)
+            w.conflictsFound.connect(self.onImportConflicts)
         self.extractionWorker = w
 
         w.extractionComplete.connect(self.onExtractionComplete)
         w.extractionError.connect(self.onExtractionError)
+        w.extractionCancelled.connect(self.onExtractionCancelled)
+        w.progressUpdated.connect(self.updateExtractionProgress)
 
         w.finished.connect(self._cleanupExtractionWorker)
         w.finished.connect(w.deleteLater)
 
         w.start()
 
+    def updatePackageSizeEstimate(self, totals):
+        if totals is None:
+            self.package_size_label.setText("Content: counting…")
+        elif not totals.files:
+            self.package_size_label.setText("Content: empty")
+        else:
+            self.package_size_label.setText(
+                f"Content: {format_size(totals.bytes)} · {totals.files:,} files · "
+                f"estimated package ≈ {format_size(totals.estimated_size)}"
+            )
+
+    def onArchiveFailed(self, name, message):
+        log.error(f"Extraction of {name} failed: {message}")
+        show_error(self, f"{name} failed", message, Qt.Vertical, InfoBarPosition.BOTTOM_RIGHT, True, 5000)
+
+    def onImportConflicts(self, count, example):
+        show_warning(
+            self, "Overlapping archives",
+            f"{count} files are in more than one archive; the later archive's copy was kept.<br>e.g. {example}",
+            Qt.Vertical, InfoBarPosition.BOTTOM_RIGHT, True, 6000
+        )
+
     def _cleanupExtractionWorker(self):
         w = getattr(self, "extractionWorker", None)
         if not w:
@@ -902,13 +962,20 @@ class DIMPackageGUI(QWidget):
             pass
         self.extractionWorker = None
 
+        if self._pendingArchives:
+            archive_paths, self._pendingArchives = self._pendingArchives, []
+            QTimer.singleShot(0, lambda: self.startExtraction(archive_paths))
+
     def onExtractionComplete(self):
+        worker = self.sender()
+        journal = getattr(worker, "journal", None)
+        written = {os.path.dirname(p) for p in journal.written} if journal else set()
+        self.fileExplorer.notifyPathsChanged(self.content_dir, *written)
+
         if not self._extractionHadError:
             self.showExtractionState(False, "Extraction completed successfully 😆", success=True)
             log.info("Extraction Process completed.")
-            self.fileExplorer.refresh_view()
 
-            worker = self.sender()
             copied = getattr(worker, "copiedTemplates", None)
             if copied:
                 for templateName in copied:
@@ -918,6 +985,35 @@ class DIMPackageGUI(QWidget):
                         Qt.Vertical, InfoBarPosition.BOTTOM_RIGHT
                     )
         
+    def onExtractionCancelled(self):
+        log.info("Extraction cancelled.")
+        self.showExtractionState(False, "Cancelled, nothing was added to Content.", success=False)
+
+    def cancelExtraction(self):
+        w = getattr(self, "extractionWorker", None)
+        self._pendingArchives = []
+        if w and w.isRunning():
+            log.info("Extraction cancellation requested.")
+            w.requestInterruption()
+
+    def updateExtractionProgress(self, phase, done_bytes, total_bytes, done_files, total_files, bytes_per_second):
+        tip = getattr(self, "stateTooltip", None)
+        w = getattr(self, "extractionWorker", None)
+        if not tip or not shiboken6.isValid(tip) or (w and w.cancel_event.is_set()):
+            return
+        if total_bytes > 0:
+            percent = min(100, int(done_bytes * 100 / total_bytes))
+            detail = f"{percent}% · {format_size(done_bytes)} of {format_size(total_bytes)}"
+        else:
+            detail = format_size(done_bytes) if done_bytes else "Please wait..."
+        if total_files:
+            detail += f" · {done_files}/{total_files} files"
+        if done_bytes and bytes_per_second > 0:
+            detail += f" · {format_size(bytes_per_second)}/s"
+        tip.setTitle(EXTRACTION_PHASES.get(phase, "Extracting"))
+        tip.setContent(detail)
+        tip.adjustSize()
+
     def onExtractionError(self, message):
         self._extractionHadError = True
         log.error(f"Extraction Error: {message}")
@@ -946,6 +1042,7 @@ class DIMPackageGUI(QWidget):
             tip = StateToolTip('Extracting', 'Please wait...', self)
             tip.move(510, 30)
             tip.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, True)
+            tip.closedSignal.connect(self.cancelExtraction)
             tip.show()
             self.stateTooltip = tip
             return
@@ -977,213 +1074,183 @@ class DIMPackageGUI(QWidget):
 class ContentExtractionWorker(QThread):
     extractionComplete = Signal()
     extractionError = Signal(str)
+    extractionCancelled = Signal()
+    # phase, done bytes, total bytes, done files, total files, bytes per second
+    progressUpdated = Signal(str, float, float, int, int, float)
 
-    def __init__(self, archive_file_path, daz_folders, content_dir, copy_template_files, template_destination, parent=None):
+    def __init__(self, archive_file_path, daz_folders, content_dir, copy_template_files, template_destination,
+                 nested_depth=DEFAULT_NESTED_DEPTH, archive_cache=None, parent=None):
         super(ContentExtractionWorker, self).__init__(parent)
-        self.archive_file_path = archive_file_path
-        self.daz_folders = {s.casefold() for s in daz_folders}
-        self.content_dir = content_dir
-        self.copy_template_files = copy_template_files
-        self.template_destination = template_destination or downloads_dir()
-        self.copiedTemplates = []
-
-    def run(self):
-        with suppress_cmd_window():
-            log.info(f"Starting extraction of {self.archive_file_path}")
-            success = False
-            temp_dir = None
-            try:
-                temp_dir = tempfile.mkdtemp()
-                patoolib.extract_archive(self.archive_file_path, outdir=temp_dir)
-                log.info(f"Archive extracted to temporary directory: [{temp_dir}]")
-
-                base_paths, embedded_archive_files = self.scanDirectory(temp_dir)
-                template_archives = [f for f in embedded_archive_files if "templ" in os.path.basename(f).lower()]
-                remaining_archives = [f for f in embedded_archive_files if f not in template_archives]
-
-                if len(remaining_archives) > 1:
-                    self.extractionError.emit("Multiple archive files found, canceling extraction.")
-                    return
-                elif len(remaining_archives) == 1:
-                    if template_archives:
-                        self.copyTemplateArchive(template_archives[0])
-                    self.processEmbeddedArchive(remaining_archives[0], base_paths)
-                    success = True
-                elif base_paths:
-                    if template_archives:
-                        self.copyTemplateArchive(template_archives[0])
-                    self.extractRelevantContent(temp_dir, base_paths)
-                    success = True
-                else:
-                    self.extractionError.emit("No recognized daz main folders found in the archive.")
-                    return
-
-            except Exception as e:
-                msg = str(e)
-                if "7z" in msg.lower() or "unrar" in msg.lower():
-                    self.extractionError.emit(
-                        "No suitable extractor found (7-Zip or UnRAR). Please install and try again."
-                    )
-                else:
-                    self.extractionError.emit(msg)
-            finally:
-                try:
-                    if temp_dir and os.path.isdir(temp_dir):
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                except Exception:
-                    pass
-                if success:
-                    self.extractionComplete.emit()
-
-    def copyTemplateArchive(self, template_archive_path):
-        if self.copy_template_files:
-            if not os.path.exists(self.template_destination):
-                os.makedirs(self.template_destination, exist_ok=True)
-            target_path = os.path.join(self.template_destination, os.path.basename(template_archive_path))
-            shutil.copy2(template_archive_path, target_path)
-            template_file = os.path.basename(template_archive_path)
-            self.copiedTemplates.append(template_file)
-            log.info(f"Copied template archive [{template_archive_path}] to [{self.template_destination}]")
-        else:
-            log.info(f"Not copying template file as per user setting.")
-        try:
-            os.remove(template_archive_path)
-            log.info(f"Removed template archive from temporary directory: [{template_archive_path}]")
-        except Exception as e:
-            log.error(f"Failed to remove template archive from temporary directory: [{e}]")
+        self.cancel_event = threading.Event()
+        self.journal = CommitLog(content_dir)
+        self.importer = ArchiveImporter(
+            archive_file_path, daz_folders, content_dir,
+            (template_destination or downloads_dir()) if copy_template_files else None,
+            nested_depth, get_optimal_workers(),
+            progress=ExtractionProgress(self._emitProgress, self.cancel_event),
+            journal=self.journal, archive_cache=archive_cache, on_error=self.extractionError.emit
+        )
 
-    def scanDirectory(self, directory):
-        base_paths = set()
-        embedded_archive_files = []
+    @property
+    def copiedTemplates(self):
+        return self.importer.copied_templates
 
-        for root, _, files in os.walk(directory):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                lower = fname.casefold()
+    def requestInterruption(self):
+        self.cancel_event.set()
+        super().requestInterruption()
 
-                if lower.endswith(('.zip', '.rar', '.7z')):
-                    embedded_archive_files.append(fpath)
-                    continue
+    def _emitProgress(self, phase, done_bytes, total_bytes, done_files, total_files, rate):
+        self.progressUpdated.emit(phase, float(done_bytes), float(total_bytes), done_files, total_files, rate)
 
-                rel = os.path.relpath(fpath, start=directory)
-                parts = rel.split(os.sep)
-                for i, segment in enumerate(parts):
-                    if segment.casefold() in self.daz_folders:
-                        base_paths.add(os.sep.join(parts[:i]))
-                        break
+    def run(self):
+        with suppress_cmd_window():
+            self.extract()
 
-        return base_paths, embedded_archive_files
+    def extract(self):
+        success = False
+        try:
+            success = self.importer.run()
+        except ExtractionCancelled:
+            log.info("Extraction cancelled; removing files added to Content.")
+            self.journal.rollback()
+            self.extractionCancelled.emit()
+        finally:
+            self.journal.finish()
+        if success:
+            self.extractionComplete.emit()
+
+
+class ImportQueueWorker(QThread):
+    # Extracts several archives at once, each into its own staging folder,
+    # then moves them into Content one after another in the order given, so
+    # a file shipped by two archives always ends up from the later one.
+    extractionComplete = Signal()
+    extractionError = Signal(str)
+    extractionCancelled = Signal()
+    archiveFailed = Signal(str, str)
+    conflictsFound = Signal(int, str)
+    progressUpdated = Signal(str, float, float, int, int, float)
+
+    def __init__(self, archive_paths, daz_folders, content_dir, copy_template_files, template_destination,
+                 nested_depth=DEFAULT_NESTED_DEPTH, max_workers=2, archive_cache=None, parent=None):
+        super(ImportQueueWorker, self).__init__(parent)
+        self.archive_paths = list(archive_paths)
+        self.daz_folders = daz_folders
+        self.content_dir = content_dir
+        self.copy_template_files = copy_template_files
+        self.template_destination = template_destination
+        self.nested_depth = nested_depth
+        self.max_workers = max(1, max_workers)
+        self.archive_cache = archive_cache
+        self.copiedTemplates = []
+        self.cancel_event = threading.Event()
+        self.journal = CommitLog(content_dir)
+        self._states = {}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+
+    def requestInterruption(self):
+        self.cancel_event.set()
+        super().requestInterruption()
+
+    def _archiveProgress(self, index, phase, done_bytes, total_bytes, done_files, total_files, rate):
+        # Sums the per-archive counters into one progress report.
+        with self._lock:
+            self._states[index] = (done_bytes, total_bytes, done_files, total_files)
+            now = time.monotonic()
+            if now - self._last_emit < 0.1:
+                return
+            self._last_emit = now
+            done, total, files, all_files = (sum(state[k] for state in self._states.values()) for k in range(4))
+        elapsed = now - self._started
+        self.progressUpdated.emit("extracting", float(done), float(total), files, all_files,
+                                  done / elapsed if elapsed > 0 else 0.0)
+
+    def _emitProgress(self, phase, done_bytes, total_bytes, done_files, total_files, rate):
+        self.progressUpdated.emit(phase, float(done_bytes), float(total_bytes), done_files, total_files, rate)
+
+    def extractOne(self, index, archive_path, staging_dir):
+        stage_content = os.path.join(staging_dir, f"{index:03d}", "Content")
+        os.makedirs(stage_content)
+
+        errors = []
+        importer = ArchiveImporter(
+            archive_path, self.daz_folders, stage_content,
+            (self.template_destination or downloads_dir()) if self.copy_template_files else None,
+            self.nested_depth, get_optimal_workers(), staging_dir,
+            ExtractionProgress(lambda *state: self._archiveProgress(index, *state), self.cancel_event),
+            archive_cache=self.archive_cache, on_error=errors.append
+        )
+        try:
+            done = importer.run()
+        except ExtractionCancelled:
+            return None
+
+        with self._lock:
+            self.copiedTemplates.extend(importer.copied_templates)
+        if done and not errors:
+            return stage_content
+        if not self.cancel_event.is_set():
+            self.archiveFailed.emit(os.path.basename(archive_path), errors[0] if errors else "Extraction failed.")
+        return None
 
-    def processEmbeddedArchive(self, embedded_archive_path, base_paths):
-        with tempfile.TemporaryDirectory() as nested_temp_dir:
+    def run(self):
+        with suppress_cmd_window():
+            staging_dir = make_staging_dir(self.content_dir)
+            count = len(self.archive_paths)
+            log.info(f"Importing {count} archives, {min(self.max_workers, count)} at a time.")
             try:
-                patoolib.extract_archive(embedded_archive_path, outdir=nested_temp_dir)
-                new_base_paths, _ = self.scanDirectory(nested_temp_dir)
-
-                if new_base_paths:
-                    self.extractRelevantContent(nested_temp_dir, new_base_paths)
-                else:
-                    self.extractionError.emit("No recognized DAZ main folders found in the embedded archive.")
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, count)) as executor:
+                    staged = list(executor.map(self.extractOne, range(count), self.archive_paths, [staging_dir] * count))
+                if self.cancel_event.is_set():
+                    raise ExtractionCancelled("Extraction cancelled.")
+
+                listings = [
+                    (os.path.basename(path), root, list_tree(root))
+                    for path, root in zip(self.archive_paths, staged) if root
+                ]
+                if not listings:
+                    self.extractionError.emit("None of the archives could be extracted.")
                     return
 
+                conflicts = find_conflicts([(label, files) for label, _, files in listings])
+                if conflicts:
+                    rel, labels = next(iter(conflicts.items()))
+                    log.warning(f"{len(conflicts)} files are shipped by more than one archive; later archives win.")
+                    self.conflictsFound.emit(len(conflicts), f"{rel} ({', '.join(labels)})")
+
+                progress = ExtractionProgress(self._emitProgress, self.cancel_event)
+                progress.set_phase(
+                    "committing",
+                    sum(size for _, _, files in listings for _, size in files),
+                    sum(len(files) for _, _, files in listings),
+                )
+                for label, root, files in listings:
+                    commit_tree(root, files, self.content_dir, progress, self.journal)
+                    log.info(f"Committed [{label}] into [{self.content_dir}]")
+                self.extractionComplete.emit()
+
+            except ExtractionCancelled:
+                log.info("Import cancelled; removing files added to Content.")
+                self.journal.rollback()
+                self.extractionCancelled.emit()
             except Exception as e:
-                msg = str(e)
-                if "7z" in msg.lower() or "unrar" in msg.lower():
-                    self.extractionError.emit(
-                        "No suitable extractor found (7-Zip or UnRAR). "
-                        "Please install and try again."
-                    )
-                else:
-                    self.extractionError.emit(msg)
-                return
-            finally:
-                log.info("Cleaning up temporary files from embedded archive extraction.")
-
-
-    def extractRelevantContent(self, directory, base_paths):
-        try:
-            if base_paths:
-                base_abs_candidates = [os.path.normpath(os.path.join(directory, bp)) for bp in base_paths]
-                common_base = os.path.commonpath(base_abs_candidates)
-            else:
-                common_base = os.path.normpath(directory)
-
-            directory_abs = os.path.abspath(directory)
-            common_base = os.path.abspath(common_base)
-            if os.path.commonpath([directory_abs, common_base]) != directory_abs:
-                common_base = directory_abs
-
-            def _safe_join(base, rel):
-                rel_norm = os.path.normpath(rel)
-                dst = os.path.abspath(os.path.join(base, rel_norm))
-                base_abs = os.path.abspath(base)
-                if os.path.commonpath([dst, base_abs]) != base_abs:
-                    raise ValueError(f"Unsafe path outside content dir: {rel}")
-                return dst
-
-            log.info(f"Starting to extract relevant content from [{directory_abs}] with base path [{common_base}]")
-
-            for root, dirs, _ in os.walk(directory_abs):
-                if os.path.commonpath([os.path.abspath(root), common_base]) != common_base:
-                    continue
-                for d in dirs:
-                    src_dir = os.path.join(root, d)
-                    rel_dir = os.path.relpath(src_dir, common_base)
-                    try:
-                        dst_dir = _safe_join(self.content_dir, rel_dir)
-                        os.makedirs(dst_dir, exist_ok=True)
-                    except ValueError as ve:
-                        log.error(str(ve))
-                        self.extractionError.emit(str(ve))
-                        return
-                    except Exception as e:
-                        log.error(f"Failed to create directory [{rel_dir}]: {e}")
-
-            ignore_names = {'.DS_Store', 'Thumbs.db', 'desktop.ini', '__MACOSX'}
-            files_to_copy = []
-            for root, _, files in os.walk(directory_abs):
-                if os.path.commonpath([os.path.abspath(root), common_base]) != common_base:
-                    continue
-                for fname in files:
-                    if fname in ignore_names:
-                        continue
-                    src = os.path.join(root, fname)
-                    if os.path.islink(src):
-                        log.warning(f"Skipping symlink: {src}")
-                        continue
-                    rel = os.path.relpath(src, common_base)
-                    try:
-                        dst = _safe_join(self.content_dir, rel)
-                        files_to_copy.append((src, dst))
-                    except ValueError as ve:
-                        log.error(str(ve))
-                        self.extractionError.emit(str(ve))
-                        return
-
-            def copy_file(pair):
-                src, dst = pair
-                try:
-                    os.makedirs(os.path.dirname(dst), exist_ok=True)
-                    shutil.copy2(src, dst)
-                    log.info(f"Copied file [{src}] to [{dst}]")
-                except Exception as e:
-                    log.error(f"Failed to copy file [{src}] to [{dst}]: {e}")
-
-            if files_to_copy:
-                with ThreadPoolExecutor(max_workers=get_optimal_workers()) as executor:
-                    list(executor.map(copy_file, files_to_copy))
-
-            log.info("Completed extracting relevant content.")
-
-        except Exception as e:
-            log.error(f"Extraction failed: {e}")
-            try:
+                log.error(f"Import failed: {e}")
+                self.journal.rollback()
                 self.extractionError.emit(str(e))
-            except Exception:
-                pass
-
+            finally:
+                self.journal.finish()
+                shutil.rmtree(staging_dir, ignore_errors=True)
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        from cli import main
+        sys.exit(main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "plan":
+        from cli import plan_main
+        sys.exit(plan_main(sys.argv[2:]))
+
     try:
         ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("Syst3mApps.DIMCreator")
     except Exception:
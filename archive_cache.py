@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from logger_utils import get_logger
+from extractor import safe_join
+
+log = get_logger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+SAMPLE_SIZE = 1024 * 1024
+
+
+def archive_fingerprint(path, daz_folders=(), nested_depth=0):
+    # Size, mtime and a hash of the first, middle and last MiB. The folder
+    # list and nesting depth are part of the key because they change what an
+    # import extracts from the same archive.
+    st = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{st.st_size}\0{st.st_mtime_ns}\0{','.join(sorted(daz_folders))}\0{nested_depth}".encode("utf-8"))
+    with open(path, 'rb') as fh:
+        for offset in sorted({0, max(0, st.st_size // 2 - SAMPLE_SIZE // 2), max(0, st.st_size - SAMPLE_SIZE)}):
+            fh.seek(offset)
+            h.update(fh.read(SAMPLE_SIZE))
+    return h.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    # Hard links cost no space while both copies exist; the mtime recorded
+    # for each cached file catches later in-place edits through either name.
+    tmp = f"{dst}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+class ArchiveCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.tree_dir = os.path.join(cache_dir, "trees")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max(0, int(max_bytes))
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.tree_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+                log.info("Archive cache index is outdated; starting empty.")
+                return
+            entries = data.get("entries", {})
+            if isinstance(entries, dict):
+                self.entries = entries
+            log.info(f"Archive cache loaded: {len(self.entries)} archives, {self.total_bytes()} bytes")
+        except Exception as e:
+            log.warning(f"Failed to read archive cache index {self.index_path}: {e}; starting empty.")
+            self.entries = {}
+
+    def tree_path(self, key):
+        return os.path.join(self.tree_dir, key)
+
+    def total_bytes(self):
+        return sum(int(e.get("tree_bytes", 0)) for e in self.entries.values())
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        root = self.tree_path(key)
+        try:
+            for rel, size, mtime_ns in entry["files"]:
+                st = os.stat(os.path.join(root, rel))
+                if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    raise OSError(f"{rel} changed")
+        except (OSError, KeyError, ValueError) as e:
+            log.info(f"Cached tree for {entry.get('name', key)} is stale ({e}); extracting again.")
+            self.discard(key)
+            self.misses += 1
+            return None
+
+        with self._lock:
+            entry["last_used"] = time.time()
+        self.hits += 1
+        return entry
+
+    def restore(self, key, entry, content_dir, progress=None, journal=None):
+        root = self.tree_path(key)
+        for rel, size, _ in entry["files"]:
+            if progress:
+                progress.check()
+            dst = safe_join(content_dir, rel)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if journal:
+                journal.record(dst)
+            _link_or_copy(os.path.join(root, rel), dst)
+            if progress:
+                progress.advance(size, 1)
+        log.info(f"Restored {len(entry['files'])} files of {entry.get('name', key)} from the archive cache")
+
+    def store(self, key, name, content_dir, paths):
+        # paths: files an import wrote below content_dir. The tree is built
+        # beside its final name so a half-written copy is never used.
+        final = self.tree_path(key)
+        staging = f"{final}.{threading.get_ident()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        files = []
+        total = 0
+        try:
+            for path in sorted(set(paths)):
+                if not os.path.isfile(path):
+                    continue
+                rel = os.path.relpath(path, content_dir)
+                target = os.path.join(staging, rel)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                _link_or_copy(path, target)
+                st = os.stat(target)
+                files.append([rel, st.st_size, st.st_mtime_ns])
+                total += st.st_size
+            shutil.rmtree(final, ignore_errors=True)
+            os.replace(staging, final)
+        except OSError as e:
+            log.warning(f"Could not cache extracted files of {name}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        with self._lock:
+            self.entries[key] = {"name": name, "files": files, "tree_bytes": total, "last_used": time.time()}
+        log.info(f"Cached {len(files)} extracted files ({total} bytes) of {name}")
+
+    def discard(self, key):
+        with self._lock:
+            self.entries.pop(key, None)
+        shutil.rmtree(self.tree_path(key), ignore_errors=True)
+
+    def save(self):
+        with self._lock:
+            by_age = sorted(self.entries.items(), key=lambda kv: kv[1].get("last_used", 0))
+            total = sum(int(e.get("tree_bytes", 0)) for _, e in by_age)
+            evicted = []
+            for key, entry in by_age:
+                if total <= self.max_bytes:
+                    break
+                total -= int(entry.get("tree_bytes", 0))
+                evicted.append(key)
+            for key in evicted:
+                self.entries.pop(key, None)
+            data = {"version": CACHE_VERSION, "entries": self.entries}
+
+        for key in evicted:
+            shutil.rmtree(self.tree_path(key), ignore_errors=True)
+
+        tmp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            log.error(f"Failed to write archive cache index {self.index_path}: {e}")
+
+        log.info(
+            f"Archive cache: {self.hits} hits, {self.misses} misses, "
+            f"{len(evicted)} evicted, {total} bytes in use"
+        )
+
+
+def open_archive_cache(doc_main_dir, max_bytes=DEFAULT_MAX_BYTES):
+    try:
+        return ArchiveCache(os.path.join(doc_main_dir, "Cache", "Archives"), max_bytes=max_bytes)
+    except Exception as e:
+        log.warning(f"Archive cache unavailable, extracting everything: {e}")
+        return None
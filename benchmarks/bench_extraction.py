@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import RssSampler, compare, default_workers
+from synthetic import generate_tree
+from version import APP_VERSION
+from extractor import ArchiveImporter, ExtractionProgress, list_tree, find_7z
+
+try:
+    import patoolib
+except ImportError:
+    patoolib = None
+
+RESULTS_VERSION = 1
+DAZ_FOLDERS = ("data", "People", "Runtime")
+
+FIXTURES = {
+    # name: (synthetic tree, wrapper folders inside the archive, layout)
+    "flat-zip": ("small-10k", ("Content",), "flat"),
+    "zip-in-zip": ("small-10k", ("Content",), "nested"),
+    "deep-wrapper": ("small-10k", ("Vendor", "Product 1234", "Release", "Files", "My Library", "Content"), "flat"),
+    "templates": ("small-10k", ("Content",), "templates"),
+    "small-50k": ("small-50k", ("Content",), "flat"),
+    "single-file": ("single-file", ("Content",), "flat"),
+}
+
+
+def _tree_files(root):
+    return [(os.path.join(root, rel), rel.replace(os.sep, "/")) for rel, _ in list_tree(root)]
+
+
+def _write_zip(path, files, prefix, compression=zipfile.ZIP_DEFLATED):
+    # Level 1 keeps fixture generation quick; the extraction side still has
+    # to inflate every member.
+    with zipfile.ZipFile(path, "w", compression, compresslevel=1) as zf:
+        for src, rel in files:
+            zf.write(src, f"{prefix}/{rel}" if prefix else rel)
+
+
+def build_fixture(path, tree_root, wrapper, layout, work_dir):
+    prefix = "/".join(wrapper)
+    files = _tree_files(tree_root)
+    promo = os.path.join(work_dir, "promo.jpg")
+    with open(promo, "wb") as fh:
+        fh.write(os.urandom(256 * 1024))
+
+    if layout == "nested":
+        # Two inner archives, one stored and one deflated, as vendors ship them.
+        inner = []
+        for index, compression in enumerate((zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)):
+            inner_path = os.path.join(work_dir, f"Part {index + 1}.zip")
+            _write_zip(inner_path, files[index::2], prefix, compression)
+            inner.append((inner_path, compression))
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+            zf.write(promo, "Promo/promo.jpg")
+            for inner_path, compression in inner:
+                zf.write(inner_path, os.path.basename(inner_path), compress_type=compression)
+        return
+
+    _write_zip(path, files, prefix)
+    with zipfile.ZipFile(path, "a", zipfile.ZIP_DEFLATED) as zf:
+        zf.write(promo, "Promo/promo.jpg")
+        if layout == "templates":
+            template = os.path.join(work_dir, "Product Templates.zip")
+            _write_zip(template, files[:50], "Templates")
+            zf.write(template, "Templates/Product Templates.zip", compress_type=zipfile.ZIP_STORED)
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases = {}
+        self._current = None
+        self._since = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        if self._current is not None:
+            self.phases[self._current] = self.phases.get(self._current, 0.0) + now - self._since
+        self._current = phase
+        self._since = now
+
+    def progress_callback(self, phase, *_):
+        if phase != self._current:
+            self.mark(phase)
+
+
+class TempSpaceSampler:
+    # Peak bytes on disk below the staging folder, sampled on a thread.
+    def __init__(self, root, interval=0.25):
+        self.root = root
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        total = 0
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        self.peak = max(self.peak, total)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _importer(archive, content_dir, staging, templates_dir, workers, timer, full_extract=None):
+    return ArchiveImporter(
+        archive, DAZ_FOLDERS, content_dir, templates_dir, workers=workers, staging_dir=staging,
+        progress=ExtractionProgress(timer.progress_callback), full_extract=full_extract or _full_extract,
+    )
+
+
+def extract_native(archive, content_dir, staging, templates_dir, workers, timer):
+    _importer(archive, content_dir, staging, templates_dir, workers, timer).import_direct()
+    return 0
+
+
+def _full_extract(archive, outdir):
+    if patoolib:
+        patoolib.extract_archive(archive, outdir=outdir, verbosity=-1)
+    else:
+        with zipfile.ZipFile(archive) as zf:
+            zf.extractall(outdir)
+
+
+def extract_staged(archive, content_dir, staging, templates_dir, workers, timer):
+    # The route RAR/7z archives take without 7-Zip: extract everything,
+    # plan, then move.
+    staged = []
+
+    def full_extract(path, outdir):
+        _full_extract(path, outdir)
+        staged.append(sum(size for _, size in list_tree(outdir)))
+
+    _importer(archive, content_dir, staging, templates_dir, workers, timer, full_extract).import_staged(selective=False)
+    return sum(staged)
+
+
+def extract_selective(archive, content_dir, staging, templates_dir, workers, timer):
+    # The route with 7-Zip: list, extract only the planned names, then move.
+    _importer(archive, content_dir, staging, templates_dir, workers, timer).import_staged(selective=True)
+    return 0
+
+
+PIPELINES = {
+    "native": extract_native,
+    "staged": extract_staged,
+    "selective": extract_selective,
+}
+
+
+def run_pipeline(name, func, archive, root, workers):
+    content_dir = os.path.join(root, name, "Content")
+    staging = os.path.join(root, name, "Staging")
+    templates_dir = os.path.join(root, name, "Templates")
+    for folder in (content_dir, staging, templates_dir):
+        os.makedirs(folder, exist_ok=True)
+
+    timer = PhaseTimer()
+    with RssSampler() as rss, TempSpaceSampler(staging) as temp:
+        started = time.perf_counter()
+        timer.mark("start")
+        staged_bytes = func(archive, content_dir, staging, templates_dir, workers, timer)
+        timer.mark(None)
+        seconds = time.perf_counter() - started
+
+    content_bytes = sum(size for _, size in list_tree(content_dir))
+    # Sampling can miss short-lived staging; the measured staged size is a floor.
+    peak_temp = max(temp.peak, staged_bytes)
+    stage = {
+        "stage": name,
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(content_bytes / seconds / 1024 ** 2, 2) if seconds > 0 else None,
+        "phases": {phase: round(t, 4) for phase, t in timer.phases.items() if phase != "start"},
+        "content_bytes": content_bytes,
+        "bytes_written": content_bytes + peak_temp,
+        "peak_temp_bytes": peak_temp,
+        "peak_rss_mb": round(rss.peak / 1024 ** 2, 1),
+    }
+    phases = "  ".join(f"{p} {t:.2f}s" for p, t in stage["phases"].items())
+    print(f"  {name:<8} {stage['seconds']:>9.3f} s  {stage['mb_per_s'] or 0:>8.1f} MB/s  "
+          f"{peak_temp:>14,d} B temp  {stage['peak_rss_mb']:>8.1f} MB RSS  [{phases}]", flush=True)
+    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return stage
+
+
+def bench_fixture(name, seed, scale, workers, work_root, pipelines):
+    scenario, wrapper, layout = FIXTURES[name]
+    root = os.path.join(work_root, name)
+    tree_root = os.path.join(root, "tree")
+    archive = os.path.join(root, f"{name}.zip")
+
+    print(f"{name}: building fixture (seed {seed}, scale {scale})…", flush=True)
+    started = time.perf_counter()
+    files, total = generate_tree(tree_root, scenario, seed, scale)
+    build_fixture(archive, tree_root, wrapper, layout, root)
+    shutil.rmtree(tree_root, ignore_errors=True)
+    archive_bytes = os.path.getsize(archive)
+    print(f"  {files:,d} files, {total:,d} bytes, {archive_bytes:,d} B archive "
+          f"in {time.perf_counter() - started:.1f} s", flush=True)
+
+    stages = [run_pipeline(p, PIPELINES[p], archive, root, workers) for p in pipelines]
+    return {
+        "name": name, "seed": seed, "scale": scale, "files": files, "bytes": total,
+        "archive_bytes": archive_bytes, "stages": stages,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark archive extraction on synthetic DAZ archives.")
+    parser.add_argument("--fixture", action="append", choices=sorted(FIXTURES),
+                        help="Fixture to run (repeatable; default: flat-zip, zip-in-zip, deep-wrapper, templates)")
+    parser.add_argument("--pipeline", action="append", choices=sorted(PIPELINES),
+                        help="Extraction route to time (repeatable; default: all)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply file counts and file sizes")
+    parser.add_argument("--workers", type=int, default=0, help="Extraction workers (default: automatic)")
+    parser.add_argument("--work-dir", help="Where to build fixtures (default: a temporary folder)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated archives")
+    parser.add_argument("--output", default="bench_extraction.json", help="JSON results file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    fixtures = args.fixture or ["flat-zip", "zip-in-zip", "deep-wrapper", "templates"]
+    pipelines = args.pipeline or sorted(PIPELINES)
+    if "selective" in pipelines and not find_7z():
+        print("7-Zip not found; skipping the selective pipeline.", flush=True)
+        pipelines = [p for p in pipelines if p != "selective"]
+    workers = args.workers or default_workers()
+    work_root = args.work_dir or tempfile.mkdtemp(prefix="dimcreator-bench-")
+    os.makedirs(work_root, exist_ok=True)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "app_version": APP_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": workers,
+        "full_extractor": "patool" if patoolib else "zipfile",
+        "scenarios": [],
+    }
+    try:
+        for name in fixtures:
+            results["scenarios"].append(bench_fixture(name, args.seed, args.scale, workers, work_root, pipelines))
+            if not args.keep:
+                shutil.rmtree(os.path.join(work_root, name), ignore_errors=True)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import RssSampler, compare, default_workers
+from synthetic import SCENARIOS, generate_tree, generate_cover
+from version import APP_VERSION
+from config_utils import DEFAULT_COMPRESSION_POLICY, load_compression_policy
+from packager import ContentInventory, CompressionPolicy, ProgressMeter, split_inventory
+from manifest import write_manifest, write_supplement
+from member_cache import MemberCache
+from pipeline import BuildJob, process_and_paste_image, zip_content_and_manifests
+
+RESULTS_VERSION = 1
+
+
+def run_stage(name, func, input_bytes, outputs=()):
+    # func returns the paths it produced (or None); `outputs` names files
+    # written as a side effect.
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        produced = func() or []
+        seconds = time.perf_counter() - started
+
+    output_bytes = sum(os.path.getsize(p) for p in [*produced, *outputs] if os.path.exists(p))
+
+    stage = {
+        "stage": name,
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(input_bytes / seconds / 1024 ** 2, 2) if seconds > 0 else None,
+        "peak_rss_mb": round(sampler.peak / 1024 ** 2, 1),
+        "output_bytes": output_bytes,
+    }
+    print(f"  {name:<12} {stage['seconds']:>9.3f} s  {stage['mb_per_s'] or 0:>9.1f} MB/s  "
+          f"{stage['peak_rss_mb']:>8.1f} MB RSS  {output_bytes:>14,d} B out", flush=True)
+    return stage
+
+
+def bench_scenario(name, seed, scale, workers, work_root, split_mb, policy):
+    root = os.path.join(work_root, name)
+    content_dir = os.path.join(root, "Content")
+    dest_dir = os.path.join(root, "out")
+    os.makedirs(dest_dir, exist_ok=True)
+
+    print(f"{name}: generating (seed {seed}, scale {scale})…", flush=True)
+    started = time.perf_counter()
+    files, total = generate_tree(content_dir, name, seed, scale)
+    print(f"  {files:,d} files, {total:,d} bytes in {time.perf_counter() - started:.1f} s", flush=True)
+
+    cover = generate_cover(os.path.join(root, "cover.png"), seed)
+    job = BuildJob(
+        content_dir=content_dir, destination_folder=dest_dir, store="Benchmark",
+        prefix="BM", sku=str(seed), product_name=name, guid="00000000-0000-0000-0000-000000000000",
+        image_path=cover, work_dir=root,
+    )
+    stages = []
+
+    def make_cover():
+        if not process_and_paste_image(content_dir, job.store, job.sku, job.product_name, cover):
+            raise RuntimeError("Cover generation failed.")
+
+    stages.append(run_stage("cover", make_cover, os.path.getsize(cover)))
+
+    scanned = []
+    stages.append(run_stage("scan", lambda: scanned.append(ContentInventory.scan(content_dir)), total))
+    inventory = scanned[0]
+
+    stages.append(run_stage(
+        "manifest", lambda: write_manifest(job.manifest_path, job.guid, inventory),
+        total, [job.manifest_path],
+    ))
+    stages.append(run_stage(
+        "supplement", lambda: write_supplement(job.supplement_path, job.product_name, job.product_tags),
+        0, [job.supplement_path],
+    ))
+
+    def package(cache=None):
+        meter = ProgressMeter(inventory.total_size, lambda *args: None)
+        return [zip_content_and_manifests(job, inventory, meter, policy, cache, workers)]
+
+    stages.append(run_stage("zip", package, inventory.total_size))
+
+    cache = MemberCache(os.path.join(root, "cache"))
+    stages.append(run_stage("zip_cold", lambda: package(cache), inventory.total_size))
+    stages.append(run_stage("zip_warm", lambda: package(cache), inventory.total_size))
+
+    if split_mb:
+        stages.append(run_stage(
+            "split_plan", lambda: split_inventory(inventory, split_mb * 1024 ** 2) and None, inventory.total_size,
+        ))
+
+    return {"name": name, "seed": seed, "scale": scale, "files": files, "bytes": total, "stages": stages}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DIM packaging stages on synthetic content trees.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable; default: small-10k, mixed)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply file counts and texture sizes")
+    parser.add_argument("--workers", type=int, default=0, help="Compression workers (default: automatic)")
+    parser.add_argument("--split-mb", type=int, default=0, help="Also time planning a split at this part size")
+    parser.add_argument("--work-dir", help="Where to generate trees (default: a temporary folder)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated trees and packages")
+    parser.add_argument("--output", default="bench_packaging.json", help="JSON results file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--user-policy", action="store_true",
+                        help="Use Config/compression_policy.json instead of the shipped default policy")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenario or ["small-10k", "mixed"]
+    # The shipped rules by default, so runs on different machines compare.
+    rules = DEFAULT_COMPRESSION_POLICY["data"]
+    if args.user_policy:
+        from utils import DOC_MAIN_DIR  # needs Qt for the Documents folder
+        rules = load_compression_policy(DOC_MAIN_DIR)
+    policy = CompressionPolicy.from_config(rules)
+    workers = args.workers or default_workers()
+    work_root = args.work_dir or tempfile.mkdtemp(prefix="dimcreator-bench-")
+    os.makedirs(work_root, exist_ok=True)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "app_version": APP_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": workers,
+        "compression_policy": "user" if args.user_policy else "default",
+        "scenarios": [],
+    }
+    try:
+        for name in scenarios:
+            results["scenarios"].append(bench_scenario(name, args.seed, args.scale, workers, work_root, args.split_mb, policy))
+            if not args.keep:
+                shutil.rmtree(os.path.join(work_root, name), ignore_errors=True)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
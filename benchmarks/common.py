@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import threading
+
+# Helpers shared by the benchmark scripts.
+
+
+def current_rss():
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        # ru_maxrss is KiB on Linux and bytes on macOS; only a fallback.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    # The process-wide peak cannot be reset between stages, so sample the
+    # current RSS on a background thread while each stage runs.
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {
+        (s["name"], st["stage"]): st
+        for s in baseline.get("scenarios", []) for st in s.get("stages", [])
+    }
+    print(f"\nCompared with {baseline_path}:")
+    for scenario in results["scenarios"]:
+        for stage in scenario["stages"]:
+            old = before.get((scenario["name"], stage["stage"]))
+            if not old or not old["seconds"]:
+                continue
+            change = (stage["seconds"] - old["seconds"]) / old["seconds"] * 100
+            print(f"  {scenario['name']:<12} {stage['stage']:<12} {old['seconds']:>9.3f} s -> "
+                  f"{stage['seconds']:>9.3f} s ({change:+.1f}%)")
+
+
+def default_workers():
+    try:
+        from utils import get_optimal_workers
+        return get_optimal_workers()
+    except ImportError:
+        return os.cpu_count() or 1
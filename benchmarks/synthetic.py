@@ -0,0 +1,111 @@
+import os
+import gzip
+import json
+import random
+
+# Deterministic DAZ-shaped content trees for the benchmarks. The same
+# scenario name and seed always produce byte-identical files, so results from
+# different machines and commits measure the same input.
+
+VENDORS = ["Syst3m", "Arcadia", "NorthLight", "Vellum"]
+FIGURES = ["Genesis 9", "Genesis 8 Female", "Genesis 8 Male"]
+WORDS = [
+    "id", "url", "name", "label", "type", "value", "min", "max", "clamped",
+    "channel", "modifier", "morph", "geometry", "node", "scene", "formula",
+    "presentation", "auto_fit", "bone", "rotation", "translation", "scale",
+]
+
+SCENARIOS = {
+    # name: (small files, huge textures, huge texture MB, texture tree depth)
+    "small-10k": (10_000, 0, 0, 3),
+    "small-100k": (100_000, 0, 0, 3),
+    "small-500k": (500_000, 0, 0, 3),
+    "textures": (500, 6, 128, 6),
+    "mixed": (20_000, 4, 64, 5),
+    "small-50k": (50_000, 0, 0, 3),
+    "single-file": (1, 1, 2048, 3),
+}
+
+
+def _duf_text(rng, index):
+    entries = []
+    for n in range(rng.randint(8, 60)):
+        entries.append({
+            "id": f"{rng.choice(WORDS)}_{index}_{n}",
+            "type": rng.choice(WORDS),
+            "value": round(rng.uniform(-1, 1), 6),
+            "formula": [rng.choice(WORDS) for _ in range(rng.randint(1, 6))],
+        })
+    return json.dumps({"file_version": "0.6.0.0", "asset_info": {"id": f"/asset/{index}"}, "modifier_library": entries}, indent=1)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+    return len(data)
+
+
+def _texture(rng, size, compressible):
+    if not compressible:
+        # JPEG magic followed by noise: incompressible, like real photos.
+        return b'\xff\xd8\xff\xe0' + rng.randbytes(size - 4)
+    # TIFF-like: long runs with light noise, roughly 3:1 under deflate.
+    row = rng.randbytes(4096)
+    chunks = []
+    total = 0
+    while total < size:
+        chunk = row if rng.random() < 0.7 else rng.randbytes(4096)
+        chunks.append(chunk)
+        total += len(chunk)
+    return b'II*\x00' + b''.join(chunks)[:size - 4]
+
+
+def generate_tree(root, scenario, seed=1234, scale=1.0):
+    small_files, huge_files, huge_mb, depth = SCENARIOS[scenario]
+    small_files = max(1, int(small_files * scale))
+    huge_bytes = max(1024 * 1024, int(huge_mb * 1024 * 1024 * scale))
+    rng = random.Random(f"{scenario}:{seed}")
+
+    files = 0
+    total = 0
+    per_folder = 200
+    for index in range(small_files):
+        vendor = VENDORS[index % len(VENDORS)]
+        figure = FIGURES[(index // per_folder) % len(FIGURES)]
+        folder = index // per_folder
+        if index % 3 == 0:
+            rel = os.path.join("People", figure, vendor, f"Product {folder:04d}", f"Preset {index:06d}.duf")
+        else:
+            rel = os.path.join("data", vendor, f"Product {folder:04d}", figure, "Morphs", f"morph_{index:06d}.dsf")
+        data = _duf_text(rng, index).encode("utf-8")
+        if index % 4 == 0:
+            # DAZ saves many assets gzip-compressed; mtime=0 keeps them reproducible.
+            data = gzip.compress(data, mtime=0)
+        total += _write(os.path.join(root, rel), data)
+        files += 1
+
+    for index in range(huge_files):
+        parts = ["Runtime", "Textures", VENDORS[index % len(VENDORS)]]
+        parts += [f"Set {rng.randint(0, 9)}" for _ in range(max(0, depth - 3))]
+        compressible = index % 2 == 1
+        name = f"texture_{index:03d}.{'tif' if compressible else 'jpg'}"
+        total += _write(os.path.join(root, *parts, name), _texture(rng, huge_bytes, compressible))
+        files += 1
+
+    # Keep every file's mtime fixed so the member cache keys are identical
+    # between generated copies of the same tree.
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            os.utime(os.path.join(dirpath, name), (1_600_000_000, 1_600_000_000))
+
+    return files, total
+
+
+def generate_cover(path, seed=1234, size=(2048, 2048)):
+    from PIL import Image
+
+    rng = random.Random(seed)
+    img = Image.frombytes("RGB", size, rng.randbytes(size[0] * size[1] * 3))
+    img.save(path, "PNG")
+    return path
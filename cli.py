@@ -0,0 +1,256 @@
+import os
+import sys
+import csv
+import json
+import zipfile
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from logger_utils import get_logger
+from utils import DOC_MAIN_DIR, get_optimal_workers
+from config_utils import load_configurations, load_compression_policy
+from packager import CompressionPolicy, format_size, format_duration
+from pipeline import BuildJob, BuildError, build_package, open_member_cache
+from extractor import ArchiveEntry, ExtractionError, plan_import, plan_entries, list_archive
+
+log = get_logger(__name__)
+
+JOB_FIELDS = (
+    "content", "dest", "store", "prefix", "sku", "part", "name",
+    "tags", "guid", "image", "clean_support",
+)
+
+_print_lock = threading.Lock()
+
+
+def _echo(message, stream=None):
+    with _print_lock:
+        print(message, file=stream or sys.stdout, flush=True)
+
+
+def _as_bool(value, default=True):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def _resolve(path, base_dir):
+    if not path:
+        return ""
+    path = os.path.expandvars(os.path.expanduser(str(path)))
+    if base_dir and not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    return os.path.abspath(path)
+
+
+def read_jobs_file(path):
+    base_dir = os.path.dirname(os.path.abspath(path))
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = [{k.strip().lower(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(f)]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows = data.get("jobs", []) if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ValueError("Job file must contain a list of job objects.")
+
+    for row in rows:
+        unknown = set(row) - set(JOB_FIELDS)
+        if unknown:
+            log.warning(f"Ignoring unknown job fields: {', '.join(sorted(unknown))}")
+    return rows, base_dir
+
+
+def make_job(values, store_prefixes, base_dir=None):
+    store = values.get("store") or ""
+    prefix = values.get("prefix") or store_prefixes.get(store, "")
+    try:
+        part = int(values.get("part") or 1)
+    except (TypeError, ValueError):
+        raise BuildError(f"Invalid product part: {values.get('part')!r}")
+
+    return BuildJob(
+        content_dir=_resolve(values.get("content"), base_dir),
+        destination_folder=_resolve(values.get("dest"), base_dir),
+        store=store,
+        prefix=prefix,
+        sku=str(values.get("sku") or ""),
+        product_name=values.get("name") or "",
+        product_part=part,
+        product_tags=values.get("tags") or "DAZStudio4_5",
+        guid=values.get("guid") or "",
+        image_path=_resolve(values.get("image"), base_dir),
+        clean_support=_as_bool(values.get("clean_support"), False),
+    )
+
+
+def run_job(job, policy, cache, workers, part_budget=0, budget_compressed=False, quiet=False, cancel_event=None):
+    label = f"{job.product_name} (part {job.part_str})"
+
+    def progress(percent, bytes_per_second, eta_seconds, current_name):
+        if not quiet:
+            _echo(f"[{label}] {percent:3d}%  {format_size(bytes_per_second)}/s  ETA {format_duration(eta_seconds)}")
+
+    def stage(text):
+        if not quiet:
+            _echo(f"[{label}] {text}")
+
+    return build_package(
+        job, policy=policy, cache=cache, workers=workers, progress=progress,
+        part_budget=part_budget, budget_compressed=budget_compressed, cancel_event=cancel_event, stage=stage
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="DIMCreator build",
+        description="Build DIM packages without opening the GUI.",
+    )
+    parser.add_argument("--content", help="Content directory to package (its contents become Content/ in the zip)")
+    parser.add_argument("--dest", help="Destination folder for the package")
+    parser.add_argument("--store", help="Store name, used for the cover file name and the default prefix")
+    parser.add_argument("--prefix", help="Package prefix (defaults to the store's configured prefix)")
+    parser.add_argument("--sku", help="Product SKU")
+    parser.add_argument("--part", type=int, default=1, help="Product part (default: 1)")
+    parser.add_argument("--name", help="Product name")
+    parser.add_argument("--tags", default="DAZStudio4_5", help="Comma separated product tags")
+    parser.add_argument("--guid", help="Package GUID (generated when omitted)")
+    parser.add_argument("--image", help="Cover image to place in Runtime/Support")
+    parser.add_argument("--clean-support", action="store_true",
+                        help="Delete existing files in <content>/Runtime/Support before packaging")
+    parser.add_argument("--split-size", type=int, default=0, help="Split products into parts of at most this many MB")
+    parser.add_argument("--split-compressed", action="store_true", help="Apply --split-size to the estimated compressed size")
+    parser.add_argument("--jobs-file", help="JSON or CSV file describing several builds")
+    parser.add_argument("--parallel", type=int, default=1, help="Builds to run at once from --jobs-file (default: 1)")
+    parser.add_argument("--workers", type=int, default=0, help="Compression workers in total (default: automatic)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the compressed member cache")
+    parser.add_argument("--cache-size", type=int, default=4, help="Member cache limit in GB (default: 4)")
+    parser.add_argument("--verify-cache", action="store_true", help="Hash file contents before reusing cached members")
+    parser.add_argument("--quiet", action="store_true", help="Only print results")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    _, store_prefixes, _, _ = load_configurations(DOC_MAIN_DIR)
+    policy = CompressionPolicy.from_config(load_compression_policy(DOC_MAIN_DIR))
+
+    try:
+        if args.jobs_file:
+            rows, base_dir = read_jobs_file(args.jobs_file)
+            jobs = [make_job(row, store_prefixes, base_dir) for row in rows]
+        else:
+            jobs = [make_job({
+                "content": args.content, "dest": args.dest, "store": args.store,
+                "prefix": args.prefix, "sku": args.sku, "part": args.part,
+                "name": args.name, "tags": args.tags, "guid": args.guid,
+                "image": args.image, "clean_support": args.clean_support,
+            }, store_prefixes)]
+    except (OSError, ValueError, BuildError) as e:
+        _echo(f"error: {e}", sys.stderr)
+        return 2
+
+    if not jobs:
+        _echo("error: no jobs to build", sys.stderr)
+        return 2
+
+    for job in jobs:
+        missing = [name for name, value in (("content", job.content_dir), ("dest", job.destination_folder)) if not value]
+        missing += job.missing_fields()
+        if missing:
+            _echo(f"error: {job.product_name or 'job'}: missing {', '.join(missing)}", sys.stderr)
+            return 2
+
+    parallel = max(1, min(args.parallel, len(jobs)))
+    if parallel > 1:
+        # Cleaning Support or pasting a cover writes into the content tree,
+        # which races with any other job packaging the same folder.
+        by_content = {}
+        for job in jobs:
+            by_content.setdefault(os.path.normcase(job.content_dir), []).append(job)
+        for shared in by_content.values():
+            if len(shared) > 1 and any(j.clean_support or j.image_path for j in shared):
+                _echo(f"error: {shared[0].content_dir} is used by several jobs that modify it; "
+                      f"run them with --parallel 1", sys.stderr)
+                return 2
+    total_workers = args.workers if args.workers > 0 else get_optimal_workers()
+    workers = max(1, total_workers // parallel)
+
+    cache = None
+    if not args.no_cache:
+        cache = open_member_cache(DOC_MAIN_DIR, args.cache_size * 1024 ** 3, args.verify_cache)
+
+    part_budget = max(0, args.split_size) * 1024 ** 2
+
+    failures = 0
+    cancel_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=parallel)
+    try:
+        futures = {
+            executor.submit(
+                run_job, job, policy, cache, workers, part_budget, args.split_compressed, args.quiet, cancel_event
+            ): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                for zip_path in future.result():
+                    _echo(f"built {zip_path}")
+            except Exception as e:
+                failures += 1
+                log.error(f"Build failed for {job.product_name}: {e}")
+                _echo(f"failed {job.product_name}: {e}", sys.stderr)
+    except KeyboardInterrupt:
+        # Running builds stop at their next block and delete their partial
+        # archives; queued ones never start.
+        _echo("cancelling…", sys.stderr)
+        cancel_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        return 130
+    finally:
+        executor.shutdown(wait=True)
+
+    _echo(f"{len(jobs) - failures} of {len(jobs)} packages built")
+    return 1 if failures else 0
+
+
+def plan_main(argv=None):
+    # Dry run of an import: what would land in Content, without writing.
+    parser = argparse.ArgumentParser(
+        prog="DIMCreator plan",
+        description="Show what importing an archive or extracted folder would add to Content.",
+    )
+    parser.add_argument("source", help="Archive (.zip, .rar, .7z) or an already extracted folder")
+    parser.add_argument("--all", action="store_true", help="List every file instead of the first 20")
+    args = parser.parse_args(argv)
+
+    _, _, _, daz_folders = load_configurations(DOC_MAIN_DIR)
+    try:
+        if os.path.isdir(args.source):
+            plan = plan_import(args.source, daz_folders)
+        elif zipfile.is_zipfile(args.source):
+            with zipfile.ZipFile(args.source) as zf:
+                entries = [ArchiveEntry(i.filename, i.file_size, i.is_dir()) for i in zf.infolist()]
+            plan = plan_entries(args.source, entries, daz_folders)
+        else:
+            plan = plan_entries(args.source, list_archive(args.source), daz_folders)
+    except (OSError, zipfile.BadZipFile, ExtractionError) as e:
+        _echo(f"error: {e}", sys.stderr)
+        return 2
+
+    _echo(plan.describe(None if args.all else 20))
+    if not plan.files and not plan.embedded:
+        _echo("No recognized daz main folders found.", sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
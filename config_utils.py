@@ -1,4 +1,5 @@
 import os
+import copy
 import json
 from typing import Dict, List, Tuple
 from version import CONFIG_VERSION
@@ -231,3 +232,41 @@ def load_configurations(doc_main_dir: str) -> Tuple[List[str], Dict[str, str], L
              len(store_names), len(tag_items), len(daz_folder_items))
 
     return store_names, store_prefixes, tag_items, daz_folder_items
+
+
+DEFAULT_COMPRESSION_POLICY = {
+    "version": CONFIG_VERSION,
+    "data": [
+        {"name": ".duf", "method": "deflate", "level": 9, "sniff": True},
+        {"name": ".dsf", "method": "deflate", "level": 9, "sniff": True},
+        {"name": ".dse", "method": "deflate", "level": 9, "sniff": True},
+        {"name": ".jpg", "method": "store"},
+        {"name": ".jpeg", "method": "store"},
+        {"name": ".png", "method": "store"},
+        {"name": ".webp", "method": "store"},
+        {"name": ".gif", "method": "store"},
+        {"name": ".zip", "method": "store"},
+        {"name": ".rar", "method": "store"},
+        {"name": ".7z", "method": "store"},
+        {"name": ".gz", "method": "store"},
+        {"name": ".mp3", "method": "store"},
+        {"name": ".ogg", "method": "store"},
+        {"name": ".mp4", "method": "store"},
+        {"name": ".tif", "method": "deflate", "level": 6},
+        {"name": ".tiff", "method": "deflate", "level": 6},
+        {"name": ".bmp", "method": "deflate", "level": 6},
+        {"name": ".tga", "method": "deflate", "level": 6},
+        {"name": ".exr", "method": "deflate", "level": 6},
+        {"name": ".hdr", "method": "deflate", "level": 6}
+    ]
+}
+
+
+def load_compression_policy(doc_main_dir: str) -> List[Dict]:
+    config_path = os.path.join(doc_main_dir, 'Config')
+    os.makedirs(config_path, exist_ok=True)
+
+    policy_path = os.path.join(config_path, 'compression_policy.json')
+    items = update_configuration(policy_path, copy.deepcopy(DEFAULT_COMPRESSION_POLICY), CONFIG_VERSION, True)
+    log.info("Compression policy loaded: %d rules", len(items))
+    return items
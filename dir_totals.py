@@ -0,0 +1,153 @@
+import os
+import zlib
+import threading
+from dataclasses import dataclass
+
+from logger_utils import get_logger
+from packager import CompressionPolicy, IGNORE_NAMES, is_precompressed
+
+log = get_logger(__name__)
+
+# Per folder, the head of its largest compressible file is deflated to
+# estimate the package size; small enough to keep a first scan I/O bound.
+SIZE_SAMPLE = 16 * 1024
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+@dataclass
+class Totals:
+    bytes: int = 0
+    files: int = 0
+    stored_bytes: int = 0
+    sample_in: int = 0
+    sample_out: int = 0
+
+    def add(self, other):
+        self.bytes += other.bytes
+        self.files += other.files
+        self.stored_bytes += other.stored_bytes
+        self.sample_in += other.sample_in
+        self.sample_out += other.sample_out
+
+    @property
+    def estimated_size(self):
+        # Stored files at full size, the rest at the sampled deflate ratio.
+        ratio = self.sample_out / self.sample_in if self.sample_in else 1.0
+        return self.stored_bytes + int((self.bytes - self.stored_bytes) * ratio)
+
+
+def _sample(path, level, sniff):
+    try:
+        with open(path, 'rb') as fh:
+            head = fh.read(SIZE_SAMPLE)
+    except OSError:
+        return 0, 0
+    if not head:
+        return 0, 0
+    if sniff and is_precompressed(head):
+        return len(head), len(head)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return len(head), len(compressor.compress(head)) + len(compressor.flush())
+
+
+class DirectoryTotals:
+    def __init__(self, policy=None):
+        # Aggregated totals per folder, keyed by normalized path. A folder's
+        # totals are built from its own files plus the cached totals of its
+        # subfolders, so after invalidate() only the changed folder and its
+        # parents are listed again. scan() is meant for one worker thread;
+        # get() and invalidate() may be called from anywhere.
+        self.policy = policy or CompressionPolicy()
+        self._totals = {}
+        self._stale = {}
+        self._generation = 0
+        self._cleared = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def get(self, path):
+        with self._lock:
+            return self._totals.get(self.key(path))
+
+    def set_policy(self, policy):
+        with self._lock:
+            self.policy = policy or CompressionPolicy()
+            self._totals.clear()
+            self._generation += 1
+            self._cleared = self._generation
+
+    def invalidate(self, path, subtree=False):
+        # Drops path and every parent. Folders that no longer exist, or all
+        # of them with subtree=True, take their cached subfolders with them.
+        key = self.key(path)
+        with self._lock:
+            self._generation += 1
+            if subtree or not os.path.isdir(path):
+                prefix = key + os.sep
+                for k in [k for k in self._totals if k.startswith(prefix)]:
+                    del self._totals[k]
+                    self._stale[k] = self._generation
+            while True:
+                self._totals.pop(key, None)
+                self._stale[key] = self._generation
+                parent = os.path.dirname(key)
+                if parent == key:
+                    break
+                key = parent
+
+    def scan(self, path, cancel_event=None):
+        with self._lock:
+            generation = self._generation
+            self._stale = {k: g for k, g in self._stale.items() if g > generation}
+        return self._scan(path, generation, cancel_event)
+
+    def _scan(self, path, generation, cancel_event):
+        cached = self.get(path)
+        if cached is not None:
+            return cached
+        if cancel_event is not None and cancel_event.is_set():
+            raise ScanCancelled(path)
+
+        totals = Totals()
+        largest = None
+        try:
+            entries = list(os.scandir(path))
+        except OSError as e:
+            log.debug(f"Cannot list {path}: {e}")
+            entries = []
+        for entry in entries:
+            if entry.name in IGNORE_NAMES:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    totals.add(self._scan(entry.path, generation, cancel_event))
+                    continue
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+            totals.bytes += size
+            totals.files += 1
+            level, sniff = self.policy.lookup(entry.name)
+            if level is None:
+                totals.stored_bytes += size
+            elif size and (largest is None or size > largest[1]):
+                largest = (entry.path, size, level, sniff)
+
+        if largest:
+            sample_in, sample_out = _sample(largest[0], largest[2], largest[3])
+            totals.sample_in += sample_in
+            totals.sample_out += sample_out
+
+        with self._lock:
+            # A folder invalidated while it was being listed is not cached;
+            # it is listed again the next time it is asked for.
+            key = self.key(path)
+            if generation >= self._cleared and self._stale.get(key, -1) <= generation:
+                self._totals[key] = totals
+        return totals
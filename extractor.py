@@ -0,0 +1,1158 @@
+import io
+import os
+import re
+import stat
+import struct
+import time
+import shutil
+import zipfile
+import tempfile
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+from logger_utils import get_logger
+from packager import IGNORE_NAMES
+
+log = get_logger(__name__)
+
+ARCHIVE_EXTS = ('.zip', '.rar', '.7z')
+COPY_CHUNK = 1024 * 1024
+# Deflated nested zips up to SPOOL_MEMORY_LIMIT are kept in memory, as long
+# as all of them together stay under SPOOL_MEMORY_TOTAL; the rest are
+# spilled to disk. Several are opened at once on the worker pool.
+SPOOL_MEMORY_LIMIT = 8 * 1024 * 1024
+SPOOL_MEMORY_TOTAL = 64 * 1024 * 1024
+DEFAULT_NESTED_DEPTH = 3
+STAGING_DIRNAME = "Staging"
+_PERCENT_RE = re.compile(rb"(\d+)%")
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class EmbeddedArchivesFound(ExtractionError):
+    pass
+
+
+class ExtractionCancelled(ExtractionError):
+    pass
+
+
+@dataclass
+class ExtractionResult:
+    files: int = 0
+    bytes: int = 0
+    copied_templates: list = field(default_factory=list)
+
+
+class ExtractionProgress:
+    def __init__(self, callback=None, cancel_event=None, interval=0.1):
+        # Shared by every thread of one import. callback(phase, done_bytes,
+        # total_bytes, done_files, total_files, bytes_per_second) is called at
+        # most once per interval; check() raises once cancel_event is set.
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.interval = interval
+        self.phase = ""
+        self.total_bytes = self.done_bytes = 0
+        self.total_files = self.done_files = 0
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    def set_phase(self, phase, total_bytes=0, total_files=0):
+        with self._lock:
+            self.phase = phase
+            self.total_bytes, self.total_files = total_bytes, total_files
+            self.done_bytes = self.done_files = 0
+            self._started = time.monotonic()
+        self._emit(force=True)
+
+    def add_total(self, num_bytes=0, num_files=0):
+        with self._lock:
+            self.total_bytes += num_bytes
+            self.total_files += num_files
+        self._emit(force=True)
+
+    def advance(self, num_bytes=0, num_files=0):
+        with self._lock:
+            self.done_bytes += num_bytes
+            self.done_files += num_files
+        self._emit()
+
+    def update(self, done_bytes):
+        with self._lock:
+            self.done_bytes = done_bytes
+        self._emit()
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def check(self):
+        if self.cancelled():
+            raise ExtractionCancelled("Extraction cancelled.")
+
+    def _emit(self, force=False):
+        if self.callback is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+            elapsed = now - self._started
+            rate = self.done_bytes / elapsed if elapsed > 0 else 0.0
+            state = (self.phase, self.done_bytes, self.total_bytes, self.done_files, self.total_files, rate)
+        self.callback(*state)
+
+
+class CommitLog:
+    def __init__(self, root):
+        # Files and folders an import creates under root, so a cancelled
+        # import can be undone. A file that is about to be replaced is first
+        # renamed into a folder below the staging root and put back by
+        # rollback(); finish() drops them once the import is kept. `written`
+        # lists every recorded path.
+        self.root = os.path.abspath(root)
+        self.written = []
+        self._paths = []
+        self._seen = set()
+        self._replaced = []
+        self._backup_dir = None
+        self._lock = threading.Lock()
+
+    def record(self, path):
+        # Called right before path is written. Paths this import already
+        # wrote are not set aside again.
+        path = os.path.abspath(path)
+        with self._lock:
+            self.written.append(path)
+            if path in self._seen:
+                return
+            self._seen.add(path)
+            if not os.path.lexists(path):
+                self._paths.append(path)
+            elif not os.path.isdir(path) or os.path.islink(path):
+                self._set_aside(path)
+
+    def _set_aside(self, path):
+        if self._backup_dir is None:
+            self._backup_dir = tempfile.mkdtemp(prefix="replaced-", dir=staging_root(self.root))
+        backup = os.path.join(self._backup_dir, str(len(self._replaced)))
+        try:
+            os.replace(path, backup)
+        except OSError as e:
+            # Open elsewhere; it is replaced whole, or not at all.
+            log.warning(f"Could not keep a copy of [{path}] before replacing it: {e}")
+            return
+        self._replaced.append((path, backup))
+
+    def rollback(self):
+        with self._lock:
+            paths, self._paths = self._paths, []
+        parents = set()
+        for path in reversed(paths):
+            try:
+                if os.path.isdir(path):
+                    os.rmdir(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+            parents.add(os.path.dirname(path))
+        # Folders made on the way to a file were not recorded; drop the ones
+        # that are empty now.
+        for folder in sorted(parents, key=len, reverse=True):
+            while folder != self.root and folder.startswith(self.root + os.sep):
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    break
+                folder = os.path.dirname(folder)
+        restored = self._restore(lambda path: True)
+        log.info(f"Rolled back {len(paths)} files and folders and restored {restored} files under [{self.root}]")
+
+    def finish(self):
+        # The import is kept. Originals whose replacement never got written
+        # are put back; the rest are deleted.
+        restored = self._restore(lambda path: not os.path.lexists(path))
+        if restored:
+            log.info(f"Restored {restored} files under [{self.root}] that were not replaced")
+
+    def _restore(self, wanted):
+        with self._lock:
+            replaced, self._replaced = self._replaced, []
+            backup_dir, self._backup_dir = self._backup_dir, None
+            self._seen.clear()
+        restored = failed = 0
+        for path, backup in reversed(replaced):
+            if not wanted(path):
+                continue
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(backup, path)
+                restored += 1
+            except OSError as e:
+                log.error(f"Could not restore [{path}] from [{backup}]: {e}")
+                failed += 1
+        if failed:
+            log.warning(f"Kept {failed} replaced files in [{backup_dir}]")
+        elif backup_dir:
+            shutil.rmtree(backup_dir, ignore_errors=True)
+        return restored
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    name: str
+    size: int
+    is_dir: bool
+
+
+def split_member_name(name):
+    return [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+
+
+def is_archive_name(name):
+    return name.casefold().endswith(ARCHIVE_EXTS)
+
+
+def is_template_name(name):
+    return "templ" in name.rsplit("/", 1)[-1].lower()
+
+
+def scan_member_names(names, daz_folders):
+    # Same rules as scanning an extracted tree: an entry's base path is
+    # everything before its first DAZ main folder; archives are collected
+    # separately as embedded archives.
+    daz_folders = {s.casefold() for s in daz_folders}
+    base_paths = set()
+    embedded = []
+    for name in names:
+        parts = split_member_name(name)
+        if not parts or any(part in IGNORE_NAMES for part in parts):
+            continue
+        if is_archive_name(parts[-1]):
+            embedded.append(name)
+            continue
+        for i, segment in enumerate(parts[:-1]):
+            if segment.casefold() in daz_folders:
+                base_paths.add(tuple(parts[:i]))
+                break
+    return base_paths, embedded
+
+
+def common_base(base_paths):
+    paths = list(base_paths)
+    if not paths:
+        return ()
+    prefix = paths[0]
+    for parts in paths[1:]:
+        n = 0
+        while n < min(len(prefix), len(parts)) and prefix[n] == parts[n]:
+            n += 1
+        prefix = prefix[:n]
+    return prefix
+
+
+def select_members(names, base):
+    # (name, relative destination) for every file below the common base,
+    # skipping OS junk and archives, which are handled separately.
+    selected = []
+    depth = len(base)
+    for name in names:
+        parts = split_member_name(name)
+        if len(parts) <= depth or tuple(parts[:depth]) != base:
+            continue
+        if any(part in IGNORE_NAMES for part in parts) or is_archive_name(parts[-1]):
+            continue
+        selected.append((name, os.path.join(*parts[depth:])))
+    return selected
+
+
+def safe_join(base, rel):
+    rel_norm = os.path.normpath(rel)
+    dst = os.path.abspath(os.path.join(base, rel_norm))
+    base_abs = os.path.abspath(base)
+    try:
+        inside = os.path.commonpath([dst, base_abs]) == base_abs
+    except ValueError:
+        inside = False
+    if not inside:
+        raise ValueError(f"Unsafe path outside content dir: {rel}")
+    return dst
+
+
+def staging_root(content_dir):
+    # DIMCreator/Staging sits next to DIMBuild, so anything staged there is
+    # on the same volume as Content and can be committed with a rename.
+    root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(content_dir))), STAGING_DIRNAME)
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def make_staging_dir(content_dir):
+    return tempfile.mkdtemp(prefix="extract-", dir=staging_root(content_dir))
+
+
+def commit_file(src, dst):
+    # Moves a staged file into place. Returns False when it had to be copied
+    # instead: staging on another volume, or a destination that refuses to
+    # be replaced (e.g. open in another program on Windows).
+    try:
+        os.replace(src, dst)
+        return True
+    except OSError as e:
+        log.debug(f"Rename failed, copying [{src}] instead: {e}")
+    shutil.copy2(src, dst)
+    return False
+
+
+def list_tree(root):
+    # (relative path, size) for every file below root.
+    files = []
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            files.append((os.path.relpath(path, root), os.path.getsize(path)))
+    return files
+
+
+def find_conflicts(listings):
+    # listings: [(label, list_tree(...)), ...] in commit order. Returns
+    # {relative path: [labels]} for files more than one of them would write.
+    owners = {}
+    for label, files in listings:
+        for rel, _ in files:
+            owners.setdefault(os.path.normcase(rel), []).append(label)
+    return {rel: labels for rel, labels in owners.items() if len(labels) > 1}
+
+
+def commit_tree(src_root, files, dst_root, progress=None, journal=None):
+    # Moves a staged tree (as listed by list_tree) into dst_root.
+    for rel, size in files:
+        if progress:
+            progress.check()
+        dst = safe_join(dst_root, rel)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if journal:
+            journal.record(dst)
+        commit_file(os.path.join(src_root, rel), dst)
+        if progress:
+            progress.advance(size, 1)
+
+
+@dataclass
+class ImportPlan:
+    # What an import will create in Content: folders (parents first) and
+    # (source, relative destination, size) for every file below the base.
+    source: str
+    base: tuple = ()
+    dirs: list = field(default_factory=list)
+    files: list = field(default_factory=list)
+    embedded: list = field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def total_bytes(self):
+        return sum(size for _, _, size in self.files)
+
+    def describe(self, limit=20):
+        lines = [
+            f"Source: {self.source}",
+            f"Base path: {'/'.join(self.base) or '(top level)'}",
+            f"{len(self.dirs)} folders, {len(self.files)} files, {self.total_bytes} bytes",
+        ]
+        if self.embedded:
+            lines.append(f"Embedded archives: {', '.join(os.path.basename(a) for a in self.embedded)}")
+        if self.skipped:
+            lines.append(f"Skipped: {self.skipped} entries (OS files, symlinks or outside the base path)")
+        shown = self.files if limit is None else self.files[:limit]
+        lines.extend(f"  {rel}  ({size} bytes)" for _, rel, size in shown)
+        if len(shown) < len(self.files):
+            lines.append(f"  … {len(self.files) - len(shown)} more")
+        return "\n".join(lines)
+
+
+def plan_import(directory, daz_folders):
+    # One scandir pass over an extracted tree. Once a DAZ main folder is
+    # found nothing below it is matched again; paths are kept as tuples so no
+    # relpath/commonpath work is done per entry.
+    daz_folders = {s.casefold() for s in daz_folders}
+    plan = ImportPlan(directory)
+    base_paths = set()
+    dirs = []
+    files = []
+    stack = [((), directory, None)]
+    while stack:
+        parts, path, root_base = stack.pop()
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name in IGNORE_NAMES:
+                    plan.skipped += 1
+                    continue
+                if entry.is_symlink():
+                    log.warning(f"Skipping symlink: {entry.path}")
+                    plan.skipped += 1
+                    continue
+                child = parts + (entry.name,)
+                if entry.is_dir():
+                    child_base = root_base
+                    if child_base is None and entry.name.casefold() in daz_folders:
+                        child_base = parts
+                    dirs.append(child)
+                    stack.append((child, entry.path, child_base))
+                elif is_archive_name(entry.name):
+                    plan.embedded.append(entry.path)
+                else:
+                    if root_base is not None:
+                        base_paths.add(root_base)
+                    files.append((child, entry.path, entry.stat().st_size))
+
+    if not base_paths:
+        plan.skipped += len(files)
+        return plan
+
+    plan.base = base = common_base(base_paths)
+    depth = len(base)
+    plan.dirs = [os.path.join(*d[depth:]) for d in dirs if len(d) > depth and d[:depth] == base]
+    for child, path, size in files:
+        if child[:depth] == base:
+            plan.files.append((path, os.path.join(*child[depth:]), size))
+        else:
+            plan.skipped += 1
+    return plan
+
+
+def plan_entries(source, entries, daz_folders):
+    # The same plan from an archive listing (ArchiveEntry), for dry runs.
+    plan = ImportPlan(source)
+    files = [e for e in entries if not e.is_dir]
+    sizes = {e.name: e.size for e in files}
+    base_paths, plan.embedded = scan_member_names(sizes, daz_folders)
+    if not base_paths:
+        plan.skipped = len(files) - len(plan.embedded)
+        return plan
+    plan.base = common_base(base_paths)
+    plan.files = [(name, rel, sizes[name]) for name, rel in select_members(sizes, plan.base)]
+    plan.dirs = sorted({os.path.dirname(rel) for _, rel, _ in plan.files} - {""})
+    plan.skipped = len(files) - len(plan.files) - len(plan.embedded)
+    return plan
+
+
+def commit_plan(plan, content_dir, progress=None, journal=None, workers=4):
+    # Creates the plan's folders once, then renames its files into place.
+    # Names come from a real directory listing without following symlinks,
+    # so they cannot point outside content_dir. Returns how many files were
+    # renamed rather than copied.
+    for rel in plan.dirs:
+        folder = os.path.join(content_dir, rel)
+        if journal:
+            journal.record(folder)
+        os.makedirs(folder, exist_ok=True)
+
+    def place(item):
+        src, rel, size = item
+        if progress:
+            progress.check()
+        dst = os.path.join(content_dir, rel)
+        try:
+            if journal:
+                journal.record(dst)
+            moved = commit_file(src, dst)
+        except OSError as e:
+            log.error(f"Failed to move file [{src}] to [{dst}]: {e}")
+            return False
+        if progress:
+            progress.advance(size, 1)
+        return moved
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return sum(executor.map(place, plan.files))
+
+
+def _is_symlink(info):
+    return stat.S_ISLNK(info.external_attr >> 16)
+
+
+def _copy_member(zf, info, dst, progress=None):
+    # Written beside the destination and renamed over it, so a cancelled or
+    # failed copy never leaves a truncated file behind.
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.{threading.get_ident()}.part"
+    try:
+        with zf.open(info) as src, open(tmp, 'wb') as out:
+            while True:
+                if progress:
+                    progress.check()
+                chunk = src.read(COPY_CHUNK)
+                if not chunk:
+                    break
+                out.write(chunk)
+                if progress:
+                    progress.advance(len(chunk))
+        mtime = _zip_mtime(info)
+        if mtime is not None:
+            os.utime(tmp, (mtime, mtime))
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _zip_mtime(info):
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return None
+
+
+class _FileSlice(io.RawIOBase):
+    # Read-only window onto part of another file: a STORED zip inside a zip
+    # can be opened in place, with real seeks, without copying it out.
+    def __init__(self, fh, offset, length):
+        super().__init__()
+        self._fh = fh
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._length
+        self._pos = max(0, min(pos, self._length))
+        return self._pos
+
+    def readinto(self, buffer):
+        remaining = self._length - self._pos
+        if remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:remaining]
+        self._fh.seek(self._offset + self._pos)
+        n = self._fh.readinto(view)
+        self._pos += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._fh.close()
+        super().close()
+
+
+class _MemoryBudget:
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, num_bytes):
+        with self._lock:
+            if self.used + num_bytes > self.limit:
+                return False
+            self.used += num_bytes
+            return True
+
+    def release(self, num_bytes):
+        with self._lock:
+            self.used = max(0, self.used - num_bytes)
+
+
+_spool_budget = _MemoryBudget(SPOOL_MEMORY_TOTAL)
+
+
+class ZipSource:
+    # Something a ZipFile can be opened on, any number of times (one handle
+    # per thread): the archive on disk, or an archive nested inside another.
+    def __init__(self, label, opener, cleanup=None):
+        self.label = label
+        self._opener = opener
+        self._cleanup = cleanup
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(os.path.basename(path), lambda: open(path, 'rb'))
+
+    def open_raw(self):
+        return self._opener()
+
+    def open(self):
+        return zipfile.ZipFile(self.open_raw())
+
+    def nested(self, info, spool_dir=None, memory_limit=SPOOL_MEMORY_LIMIT):
+        label = f"{self.label}/{info.filename}"
+        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+            with self.open_raw() as fh:
+                fh.seek(info.header_offset)
+                header = fh.read(zipfile.sizeFileHeader)
+            fields = struct.unpack(zipfile.structFileHeader, header)
+            offset = (info.header_offset + zipfile.sizeFileHeader
+                      + fields[zipfile._FH_FILENAME_LENGTH] + fields[zipfile._FH_EXTRA_FIELD_LENGTH])
+            return ZipSource(label, lambda: io.BufferedReader(_FileSlice(self.open_raw(), offset, info.compress_size)))
+
+        # Deflated archives need random access, which inflating on the fly
+        # cannot give; keep small ones in memory and spill large ones once.
+        with self.open() as zf, zf.open(info) as src:
+            if info.file_size <= memory_limit and _spool_budget.reserve(info.file_size):
+                try:
+                    data = src.read()
+                except BaseException:
+                    _spool_budget.release(info.file_size)
+                    raise
+                return ZipSource(label, lambda: io.BytesIO(data), lambda: _spool_budget.release(info.file_size))
+            fd, path = tempfile.mkstemp(prefix=".nested-", suffix=".zip", dir=spool_dir)
+            with os.fdopen(fd, 'wb') as out:
+                shutil.copyfileobj(src, out, COPY_CHUNK)
+
+        def cleanup():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return ZipSource(label, lambda: open(path, 'rb'), cleanup)
+
+    def close(self):
+        if self._cleanup:
+            self._cleanup()
+            self._cleanup = None
+
+
+def _plan_source(source, content_dir, daz_folders, tasks, folders, templates, allow_nested):
+    # Adds (source, info, destination) tasks for this archive's own DAZ
+    # content, the folders it has and its template archives, and returns
+    # the nested zips still to be opened. Nothing is written yet.
+    with source.open() as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir()]
+        names = [i.filename for i in infos]
+        by_name = {i.filename: i for i in infos}
+        base_paths, embedded = scan_member_names(names, daz_folders)
+
+        template_names = [n for n in embedded if is_template_name(n)]
+        nested = [n for n in embedded if n not in template_names]
+        if any(not n.casefold().endswith(".zip") for n in nested):
+            raise EmbeddedArchivesFound(f"{source.label} contains RAR/7z archives.")
+        if nested and not allow_nested:
+            log.warning(f"Skipping {len(nested)} archives nested deeper than the configured limit in {source.label}")
+            nested = []
+        templates.extend((source, by_name[n]) for n in template_names)
+
+        if base_paths:
+            base = common_base(base_paths)
+            count = 0
+            for name, rel in select_members(names, base):
+                info = by_name[name]
+                if _is_symlink(info):
+                    log.warning(f"Skipping symlink: {name}")
+                    continue
+                tasks.append((source, info, safe_join(content_dir, rel)))
+                count += 1
+
+            for info in zf.infolist():
+                parts = split_member_name(info.filename)
+                if info.is_dir() and len(parts) > len(base) and tuple(parts[:len(base)]) == base:
+                    folders.append(safe_join(content_dir, os.path.join(*parts[len(base):])))
+
+            log.info(
+                f"Extracting {count} of {len(infos)} members from [{source.label}] "
+                f"with base path [{'/'.join(base)}]"
+            )
+
+    return [(source, by_name[n]) for n in nested]
+
+
+def _copy_templates(templates, template_destination, result):
+    for source, info in templates:
+        if not template_destination:
+            log.info("Not copying template file as per user setting.")
+            continue
+        os.makedirs(template_destination, exist_ok=True)
+        target = os.path.join(template_destination, split_member_name(info.filename)[-1])
+        with source.open() as zf:
+            _copy_member(zf, info, target)
+        result.copied_templates.append(os.path.basename(target))
+        log.info(f"Copied template archive [{info.filename}] to [{template_destination}]")
+
+
+def _unique_tasks(tasks):
+    # Nested zips often ship the same file; only the last one planned (the
+    # deepest, then the latest in archive order) is written, so no two
+    # threads write the same destination.
+    unique = {}
+    for task in tasks:
+        key = os.path.normcase(task[2])
+        unique.pop(key, None)
+        unique[key] = task
+    if len(unique) < len(tasks):
+        log.info(f"{len(tasks) - len(unique)} files are shipped by more than one archive; the last one is kept.")
+    return list(unique.values())
+
+
+def extract_zip(archive_path, content_dir, daz_folders, workers=4, template_destination=None,
+                max_depth=DEFAULT_NESTED_DEPTH, spool_dir=None, progress=None, journal=None, phases=True):
+    # Reads the central directory, works out the DAZ base path from entry
+    # names and decompresses only the matching members straight into
+    # content_dir. Zips nested inside (to max_depth levels) are opened as
+    # streams from their parent and handled the same way, all of them in
+    # parallel. Template archives are copied to template_destination when
+    # one is given; RAR/7z archives inside raise EmbeddedArchivesFound.
+    # Files created in content_dir are recorded in journal; with phases off
+    # the caller owns the progress phase and this only adds to its totals.
+    progress = progress or ExtractionProgress()
+    result = ExtractionResult()
+    root = ZipSource.from_path(archive_path)
+    sources = [root]
+    tasks, folders, templates = [], [], []
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def open_nested(item):
+        parent, info = item
+        progress.check()
+        try:
+            source = parent.nested(info, spool_dir)
+        except zipfile.BadZipFile:
+            log.warning(f"Skipping damaged nested archive {parent.label}/{info.filename}")
+            return None
+        # Recorded here rather than from map() results, so sources opened
+        # before a cancel are still closed and give back their memory.
+        with handles_lock:
+            sources.append(source)
+        if phases:
+            progress.advance(info.file_size, 1)
+        return source
+
+    def extract(task):
+        # One ZipFile per thread and source so members are inflated in
+        # parallel without sharing a file position.
+        source, info, dst = task
+        progress.check()
+        cache = getattr(local, "zips", None)
+        if cache is None:
+            cache = local.zips = {}
+        zf = cache.get(id(source))
+        if zf is None:
+            zf = cache[id(source)] = source.open()
+            with handles_lock:
+                handles.append(zf)
+        if journal:
+            journal.record(dst)
+        _copy_member(zf, info, dst, progress)
+        progress.advance(num_files=1)
+        return info.file_size
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            if phases:
+                progress.set_phase("listing")
+            level = [root]
+            for depth in range(max(0, max_depth) + 1):
+                pending = []
+                for source in level:
+                    progress.check()
+                    pending.extend(_plan_source(
+                        source, content_dir, daz_folders, tasks, folders, templates, depth < max_depth
+                    ))
+                if pending and phases:
+                    progress.set_phase("nested", sum(info.file_size for _, info in pending), len(pending))
+                level = [s for s in executor.map(open_nested, pending) if s is not None]
+                if not level:
+                    break
+
+            if not tasks:
+                raise ExtractionError("No recognized daz main folders found in the archive.")
+            if len(sources) > 1:
+                log.info(f"Extracting content from {len(sources)} archives, including nested ones.")
+
+            # Every level is planned before anything is written, so a RAR/7z
+            # found deep down leaves Content untouched for the staged route.
+            for folder in dict.fromkeys(folders):
+                if journal:
+                    journal.record(folder)
+                os.makedirs(folder, exist_ok=True)
+            _copy_templates(templates, template_destination, result)
+            tasks = _unique_tasks(tasks)
+
+            total = sum(info.file_size for _, info, _ in tasks)
+            if phases:
+                progress.set_phase("extracting", total, len(tasks))
+            else:
+                progress.add_total(total, len(tasks))
+
+            for size in executor.map(extract, tasks):
+                result.files += 1
+                result.bytes += size
+    finally:
+        for zf in handles:
+            zf.close()
+        for source in sources:
+            source.close()
+
+    log.info(f"Extracted {result.files} files ({result.bytes} bytes) into [{content_dir}]")
+    return result
+
+
+def find_7z():
+    for name in ("7z", "7zz", "7za"):
+        path = shutil.which(name)
+        if path:
+            return path
+    if os.name == "nt":
+        for base in (os.environ.get("ProgramFiles"), os.environ.get("ProgramFiles(x86)")):
+            candidate = os.path.join(base, "7-Zip", "7z.exe") if base else None
+            if candidate and os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def parse_7z_listing(output):
+    # `7z l -slt` prints one "Key = Value" block per entry after a dashed
+    # separator; the blocks before it describe the archive itself.
+    entries = []
+    _, sep, body = output.partition("\n----------\n")
+    if not sep:
+        return entries
+    for block in body.replace("\r\n", "\n").split("\n\n"):
+        fields = {}
+        for line in block.splitlines():
+            key, eq, value = line.partition(" = ")
+            if eq:
+                fields[key.strip()] = value
+        if "Path" not in fields:
+            continue
+        is_dir = fields.get("Folder") == "+" or "D" in fields.get("Attributes", "").split("_")[0]
+        try:
+            size = int(fields.get("Size") or 0)
+        except ValueError:
+            size = 0
+        entries.append(ArchiveEntry(fields["Path"], size, is_dir))
+    return entries
+
+
+def list_archive(archive_path, seven_zip=None):
+    seven_zip = seven_zip or find_7z()
+    if not seven_zip:
+        raise ExtractionError("7-Zip is required to list this archive.")
+    proc = subprocess.run(
+        [seven_zip, "l", "-slt", "-sccUTF-8", "--", archive_path],
+        capture_output=True, stdin=subprocess.DEVNULL,
+    )
+    if proc.returncode != 0:
+        raise ExtractionError(f"Listing failed: {proc.stderr.decode('utf-8', 'replace').strip()}")
+    return parse_7z_listing(proc.stdout.decode("utf-8", "replace"))
+
+
+def plan_archive(entries, daz_folders):
+    # Names worth extracting: everything below the DAZ common base plus every
+    # embedded archive. Returns None when nothing recognisable is inside.
+    files = [e for e in entries if not e.is_dir]
+    names = [e.name for e in files]
+    base_paths, embedded = scan_member_names(names, daz_folders)
+    if not base_paths and not embedded:
+        return None
+    selected = [name for name, _ in select_members(names, common_base(base_paths))] if base_paths else []
+    return selected + embedded
+
+
+def extract_selected(archive_path, names, outdir, seven_zip=None, progress=None, total_bytes=0):
+    # 7-Zip reports a percentage on stdout (-bsp1); it is turned into bytes
+    # of total_bytes. The process is killed as soon as progress is cancelled.
+    seven_zip = seven_zip or find_7z()
+    fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="dimcreator-list-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as fh:
+            fh.writelines(name + "\n" for name in names)
+        # -spd: names are literal paths, not wildcards.
+        proc = subprocess.Popen(
+            [seven_zip, "x", "-y", "-spd", "-bso0", "-bsp1", "-scsUTF-8", "-sccUTF-8", f"-o{outdir}",
+             "--", archive_path, f"@{list_path}"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+        )
+        errors = []
+
+        def read_stderr():
+            errors.append(proc.stderr.read())
+
+        def read_progress():
+            for chunk in iter(lambda: proc.stdout.read1(4096), b""):
+                percents = _PERCENT_RE.findall(chunk)
+                if percents and progress:
+                    progress.update(min(100, int(percents[-1])) * total_bytes // 100)
+
+        readers = [threading.Thread(target=read_stderr, daemon=True), threading.Thread(target=read_progress, daemon=True)]
+        for reader in readers:
+            reader.start()
+        while True:
+            try:
+                proc.wait(timeout=0.2)
+                break
+            except subprocess.TimeoutExpired:
+                if progress and progress.cancelled():
+                    proc.kill()
+                    proc.wait()
+                    for reader in readers:
+                        reader.join()
+                    raise ExtractionCancelled("Extraction cancelled.")
+        for reader in readers:
+            reader.join()
+        if proc.returncode != 0:
+            raise ExtractionError(f"Extraction failed: {b''.join(errors).decode('utf-8', 'replace').strip()}")
+    finally:
+        try:
+            os.remove(list_path)
+        except OSError:
+            pass
+
+
+def extract_all(archive_path, outdir):
+    # Full extraction of any archive type through patool.
+    import patoolib
+    patoolib.extract_archive(archive_path, outdir=outdir)
+
+
+class ArchiveImporter:
+    def __init__(self, archive_path, daz_folders, content_dir, template_destination=None,
+                 nested_depth=DEFAULT_NESTED_DEPTH, workers=4, staging_dir=None, progress=None,
+                 journal=None, archive_cache=None, on_error=None, full_extract=extract_all):
+        # Imports one archive into content_dir: restored from archive_cache
+        # when it was imported before, read straight from a zip, or staged
+        # below staging_dir and moved into place. Templates are copied to
+        # template_destination, or dropped when it is None. Errors that end
+        # the import, or one of its embedded archives, go to on_error(message);
+        # ExtractionCancelled is raised and rolling back is left to the caller.
+        self.archive_path = archive_path
+        self.daz_folders = {s.casefold() for s in daz_folders}
+        self.content_dir = content_dir
+        self.template_destination = template_destination
+        self.nested_depth = nested_depth
+        self.workers = max(1, workers)
+        self.staging_dir = staging_dir or staging_root(content_dir)
+        self.progress = progress or ExtractionProgress()
+        self.journal = journal if journal is not None else CommitLog(content_dir)
+        self.archive_cache = archive_cache
+        self.on_error = on_error
+        self.full_extract = full_extract
+        self.copied_templates = []
+        self.had_error = False
+
+    def _error(self, message):
+        self.had_error = True
+        if self.on_error:
+            self.on_error(message)
+
+    def _report(self, exc):
+        msg = str(exc)
+        if "7z" in msg.lower() or "unrar" in msg.lower():
+            self._error("No suitable extractor found (7-Zip or UnRAR). Please install and try again.")
+        else:
+            self._error(msg)
+
+    def run(self):
+        # True when the archive was imported.
+        log.info(f"Starting extraction of {self.archive_path}")
+        try:
+            cache_key, restored = self.restore_from_cache()
+            if restored:
+                return True
+            if zipfile.is_zipfile(self.archive_path) and self.import_direct():
+                success = True
+            else:
+                success = self.import_staged()
+        except ExtractionCancelled:
+            raise
+        except Exception as e:
+            self._report(e)
+            return False
+        if success and cache_key and not self.had_error:
+            self.store_in_cache(cache_key)
+        return success
+
+    def restore_from_cache(self):
+        # Returns (cache key or None, whether the content was restored).
+        if not self.archive_cache:
+            return None, False
+        from archive_cache import archive_fingerprint  # archive_cache imports this module
+        try:
+            key = archive_fingerprint(self.archive_path, self.daz_folders, self.nested_depth)
+        except OSError as e:
+            log.warning(f"Could not fingerprint {self.archive_path}: {e}")
+            return None, False
+        entry = self.archive_cache.lookup(key)
+        if entry is None:
+            return key, False
+
+        log.info(f"{os.path.basename(self.archive_path)} was imported before; restoring it from the archive cache.")
+        self.progress.set_phase("committing", entry["tree_bytes"], len(entry["files"]))
+        self.archive_cache.restore(key, entry, self.content_dir, self.progress, self.journal)
+        self.archive_cache.save()
+        return key, True
+
+    def store_in_cache(self, key):
+        # Archives that ship templates are not cached; a restore could not
+        # copy them again.
+        if self.copied_templates:
+            return
+        content_dir = os.path.abspath(self.content_dir)
+        paths = [p for p in self.journal.written if p.startswith(content_dir + os.sep)]
+        try:
+            self.archive_cache.store(key, os.path.basename(self.archive_path), content_dir, paths)
+            self.archive_cache.save()
+        except Exception as e:
+            log.warning(f"Failed to update the archive cache: {e}")
+
+    def import_direct(self):
+        # Zips are read member by member; False when they hold RAR/7z archives.
+        try:
+            result = extract_zip(
+                self.archive_path, self.content_dir, self.daz_folders, self.workers, self.template_destination,
+                max_depth=self.nested_depth, spool_dir=self.staging_dir,
+                progress=self.progress, journal=self.journal
+            )
+        except EmbeddedArchivesFound:
+            log.info("Zip contains embedded archives; extracting it to a temporary directory.")
+            return False
+        self.copied_templates.extend(result.copied_templates)
+        return True
+
+    def import_staged(self, selective=True):
+        # Extracts into a staging folder (only the DAZ folders when 7-Zip is
+        # found and selective is set), then moves the planned files.
+        temp_dir = tempfile.mkdtemp(prefix="extract-", dir=self.staging_dir)
+        try:
+            if not (selective and self.extract_selectively(temp_dir)):
+                self.progress.set_phase("extracting")
+                self.full_extract(self.archive_path, temp_dir)
+            self.progress.check()
+            log.info(f"Archive extracted to temporary directory: [{temp_dir}]")
+
+            plan = plan_import(temp_dir, self.daz_folders)
+            template_archives = [f for f in plan.embedded if is_template_name(os.path.basename(f))]
+            remaining_archives = [f for f in plan.embedded if f not in template_archives]
+
+            if remaining_archives and self.nested_depth < 1:
+                log.warning(f"Ignoring {len(remaining_archives)} embedded archives; nested extraction is disabled.")
+                remaining_archives = []
+
+            if remaining_archives:
+                if template_archives:
+                    self.copy_template(template_archives[0])
+                # Each embedded archive goes straight into Content, one after
+                # another in name order with all workers, so a file shipped by
+                # two of them always ends up from the later one.
+                self.progress.set_phase("nested")
+                results = [self.import_embedded(path, self.workers) for path in sorted(remaining_archives)]
+                return all(results)
+            if plan.files:
+                if template_archives:
+                    self.copy_template(template_archives[0])
+                self.commit(plan)
+                return True
+            self._error("No recognized daz main folders found in the archive.")
+            return False
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def extract_selectively(self, temp_dir):
+        seven_zip = find_7z()
+        if not seven_zip:
+            return False
+        self.progress.set_phase("listing")
+        try:
+            entries = list_archive(self.archive_path, seven_zip)
+        except ExtractionError as e:
+            log.warning(f"Could not list archive, extracting everything: {e}")
+            return False
+
+        names = plan_archive(entries, self.daz_folders)
+        if names is None:
+            raise ExtractionError("No recognized daz main folders found in the archive.")
+
+        sizes = {e.name: e.size for e in entries}
+        selected_bytes = sum(sizes[n] for n in names)
+        log.info(
+            f"Extracting {len(names)} of {sum(1 for e in entries if not e.is_dir)} entries "
+            f"({selected_bytes} of {sum(sizes.values())} bytes)."
+        )
+        self.progress.set_phase("extracting", selected_bytes, len(names))
+        extract_selected(self.archive_path, names, temp_dir, seven_zip, self.progress, selected_bytes)
+        return True
+
+    def copy_template(self, template_archive_path):
+        if self.template_destination:
+            os.makedirs(self.template_destination, exist_ok=True)
+            shutil.copy2(template_archive_path, os.path.join(
+                self.template_destination, os.path.basename(template_archive_path)
+            ))
+            self.copied_templates.append(os.path.basename(template_archive_path))
+            log.info(f"Copied template archive [{template_archive_path}] to [{self.template_destination}]")
+        else:
+            log.info(f"Not copying template file as per user setting.")
+        try:
+            os.remove(template_archive_path)
+            log.info(f"Removed template archive from temporary directory: [{template_archive_path}]")
+        except Exception as e:
+            log.error(f"Failed to remove template archive from temporary directory: [{e}]")
+
+    def import_embedded(self, embedded_archive_path, workers=1):
+        if zipfile.is_zipfile(embedded_archive_path):
+            try:
+                result = extract_zip(
+                    embedded_archive_path, self.content_dir, self.daz_folders, workers, self.template_destination,
+                    max_depth=self.nested_depth - 1, spool_dir=self.staging_dir,
+                    progress=self.progress, journal=self.journal, phases=False
+                )
+                self.copied_templates.extend(result.copied_templates)
+                return True
+            except ExtractionCancelled:
+                raise
+            except EmbeddedArchivesFound:
+                log.info(f"[{embedded_archive_path}] contains RAR/7z archives; extracting it to a temporary directory.")
+            except (ExtractionError, ValueError, zipfile.BadZipFile) as e:
+                self._error(str(e))
+                return False
+
+        with tempfile.TemporaryDirectory(prefix="nested-", dir=self.staging_dir) as nested_temp_dir:
+            try:
+                self.full_extract(embedded_archive_path, nested_temp_dir)
+                self.progress.check()
+                plan = plan_import(nested_temp_dir, self.daz_folders)
+                if plan.files:
+                    self.commit(plan, phases=False)
+                    return True
+                self._error("No recognized DAZ main folders found in the embedded archive.")
+                return False
+            except ExtractionCancelled:
+                raise
+            except Exception as e:
+                self._report(e)
+                return False
+            finally:
+                log.info("Cleaning up temporary files from embedded archive extraction.")
+
+    def commit(self, plan, phases=True):
+        log.info(
+            f"Moving {len(plan.files)} files from [{plan.source}] with base path "
+            f"[{'/'.join(plan.base)}] into [{self.content_dir}]"
+        )
+        if phases:
+            self.progress.set_phase("committing", plan.total_bytes, len(plan.files))
+        else:
+            self.progress.add_total(plan.total_bytes, len(plan.files))
+        moved = commit_plan(plan, self.content_dir, self.progress, self.journal, self.workers)
+        log.info(f"Committed {len(plan.files)} files into [{self.content_dir}], {moved} by rename")
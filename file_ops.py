@@ -0,0 +1,299 @@
+import os
+import stat
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+
+from logger_utils import get_logger
+from extractor import COPY_CHUNK
+
+log = get_logger(__name__)
+
+COPY, MOVE, DELETE = "copy", "move", "delete"
+TRASH_DIRNAME = "Trash"
+
+
+class FileOperationCancelled(Exception):
+    pass
+
+
+@dataclass
+class FileOperation:
+    # One item of an explorer copy/move/delete. Whether an existing target
+    # may be replaced is decided before the operation is queued.
+    kind: str
+    source: str
+    target: str = ""
+    overwrite: bool = False
+
+    @property
+    def name(self):
+        return os.path.basename(self.source.rstrip("/\\"))
+
+
+def transfer_target(source, destination_dir):
+    return os.path.join(destination_dir, os.path.basename(source.rstrip("/\\")))
+
+
+def blocked_reason(source, target):
+    # Why a copy/move of source to target must not run, or None.
+    try:
+        src_abs = os.path.abspath(source)
+        tgt_abs = os.path.abspath(target)
+        if os.path.isdir(src_abs) and os.path.commonpath([src_abs, tgt_abs]) == src_abs:
+            return "Cannot paste a folder into itself or its subfolder."
+        if os.path.exists(tgt_abs) and os.path.samefile(src_abs, tgt_abs):
+            return "Source and destination are the same."
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _walk(root):
+    # os.walk that also descends into symlinked folders, as a copy of them
+    # has to. A link back to a folder it sits in is skipped and logged.
+    ancestors = {root: {os.path.realpath(root)}}
+    for dirpath, dirnames, names in os.walk(root, followlinks=True):
+        inside = ancestors.pop(dirpath)
+        for name in list(dirnames):
+            path = os.path.join(dirpath, name)
+            real = os.path.realpath(path)
+            if real in inside:
+                log.warning(f"Skipped {path}: it links to a folder it is inside of")
+                dirnames.remove(name)
+                continue
+            ancestors[path] = inside | {real}
+        yield dirpath, dirnames, names
+
+
+def measure(path):
+    # (bytes, files) below path; a file counts as one.
+    if not os.path.isdir(path):
+        try:
+            return os.path.getsize(path), 1
+        except OSError:
+            return 0, 1
+    total = files = 0
+    for dirpath, _, names in _walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+            files += 1
+    return total, files
+
+
+def _check(progress):
+    if progress is not None and progress.cancelled():
+        raise FileOperationCancelled("File operation cancelled.")
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def _copy_file(src, dst, progress):
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        while True:
+            _check(progress)
+            chunk = fin.read(COPY_CHUNK)
+            if not chunk:
+                break
+            fout.write(chunk)
+            if progress:
+                progress.advance(len(chunk))
+    shutil.copystat(src, dst)
+    if progress:
+        progress.advance(0, 1)
+
+
+def _copy_tree(src, dst, progress):
+    # Symlinks are copied as what they point to.
+    if not os.path.isdir(src):
+        _copy_file(src, dst, progress)
+        return
+    os.makedirs(dst)
+    for dirpath, dirnames, names in _walk(src):
+        out_dir = os.path.join(dst, os.path.relpath(dirpath, src))
+        for name in dirnames:
+            os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+        for name in names:
+            _copy_file(os.path.join(dirpath, name), os.path.join(out_dir, name), progress)
+    shutil.copystat(src, dst)
+
+
+def _transfer(op, progress, size, files):
+    # The replaced target is only renamed aside until the new one is in
+    # place, so a cancelled or failed overwrite leaves the original.
+    aside = None
+    if os.path.lexists(op.target):
+        if not op.overwrite:
+            log.info(f"Skipped {op.source}: {op.target} exists")
+            return
+        aside = f"{op.target}.{threading.get_ident()}.old"
+        os.replace(op.target, aside)
+
+    os.makedirs(os.path.dirname(op.target), exist_ok=True)
+    try:
+        renamed = False
+        if op.kind == MOVE:
+            try:
+                os.rename(op.source, op.target)
+                renamed = True
+            except OSError as e:
+                log.debug(f"Rename failed, copying [{op.source}] instead: {e}")
+        if renamed:
+            if progress:
+                progress.advance(size, files)
+        else:
+            try:
+                _copy_tree(op.source, op.target, progress)
+            except BaseException:
+                _remove(op.target)
+                raise
+            if op.kind == MOVE:
+                _remove(op.source)
+    except BaseException:
+        if aside:
+            os.replace(aside, op.target)
+        raise
+
+    if aside:
+        _remove(aside)
+    log.info(f"Item {'moved' if op.kind == MOVE else 'copied'}: {op.source} -> {op.target}")
+
+
+def _delete(op, progress, size, files):
+    # Deletes are not interrupted half way; cancel takes effect before the
+    # next item.
+    _remove(op.source)
+    if progress:
+        progress.advance(size, files)
+    log.info(f"Item deleted: {op.source}")
+
+
+def run_operations(operations, progress=None, on_error=None):
+    # Runs one batch in order. progress is an ExtractionProgress whose phase
+    # is "preparing" while sizes are counted, then the kind of the first
+    # item. A failed item is passed to on_error(op, exc) and the rest still
+    # run. Returns the number of items done; raises FileOperationCancelled.
+    if not operations:
+        return 0
+    if progress:
+        progress.set_phase("preparing")
+    totals = [measure(op.source) for op in operations]
+    if progress:
+        progress.set_phase(operations[0].kind, sum(t[0] for t in totals), sum(t[1] for t in totals))
+
+    done = 0
+    for op, (size, files) in zip(operations, totals):
+        _check(progress)
+        try:
+            if not os.path.lexists(op.source):
+                raise FileNotFoundError(f"{op.source} no longer exists")
+            if op.kind == DELETE:
+                _delete(op, progress, size, files)
+            else:
+                _transfer(op, progress, size, files)
+            done += 1
+        except FileOperationCancelled:
+            log.info(f"File operation cancelled during {op.kind} of {op.source}")
+            raise
+        except Exception as e:
+            log.error(f"Error during {op.kind} of {op.source}: {e}")
+            if on_error:
+                on_error(op, e)
+    return done
+
+
+def trash_root(dimbuild_dir):
+    # DIMCreator/Trash sits next to DIMBuild, so clearing DIMBuild is a
+    # rename on the same volume; the actual delete happens later.
+    root = os.path.join(os.path.dirname(os.path.abspath(dimbuild_dir)), TRASH_DIRNAME)
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def move_to_trash(paths, dimbuild_dir):
+    # Renames paths into a new folder below the trash root. A folder that
+    # refuses to be renamed (a file inside open elsewhere, or a watched
+    # folder on Windows) has its entries moved one by one instead and is
+    # removed once they are gone. Returns the paths that could not be
+    # moved or removed.
+    batch = tempfile.mkdtemp(prefix="clear-", dir=trash_root(dimbuild_dir))
+    failed = []
+    pending = [(path, batch) for path in paths]
+    while pending:
+        path, into = pending.pop()
+        if into is None:
+            # Every entry of path has been handled by now.
+            try:
+                os.rmdir(path)
+            except OSError as e:
+                log.warning(f"Could not remove {path}: {e}")
+                failed.append(path)
+            continue
+        target = os.path.join(into, os.path.basename(path))
+        try:
+            os.replace(path, target)
+            continue
+        except OSError as e:
+            if not os.path.isdir(path) or os.path.islink(path):
+                log.warning(f"Could not move {path} to the trash: {e}")
+                failed.append(path)
+                continue
+        try:
+            os.makedirs(target, exist_ok=True)
+            pending.append((path, None))
+            pending.extend((entry.path, target) for entry in os.scandir(path))
+        except OSError as e:
+            log.warning(f"Could not move {path} to the trash: {e}")
+            failed.append(path)
+    return failed
+
+
+def _remove_readonly(func, path, exc_info):
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+def purge_trash(dimbuild_dir, cancel_event=None):
+    # Deletes whatever is in the trash, including batches left over by an
+    # earlier session. Stops between entries once cancel_event is set; the
+    # rest is picked up by the next purge.
+    root = trash_root(dimbuild_dir)
+    removed = 0
+    for batch in os.scandir(root):
+        if not batch.is_dir(follow_symlinks=False):
+            try:
+                os.remove(batch.path)
+            except OSError as e:
+                log.warning(f"Could not delete {batch.path}: {e}")
+            continue
+        for dirpath, dirnames, names in os.walk(batch.path, topdown=False):
+            for name in names + dirnames:
+                if cancel_event is not None and cancel_event.is_set():
+                    log.info(f"Trash purge interrupted after {removed} entries")
+                    return removed
+                path = os.path.join(dirpath, name)
+                remove = os.rmdir if os.path.isdir(path) and not os.path.islink(path) else os.remove
+                try:
+                    remove(path)
+                except OSError:
+                    try:
+                        _remove_readonly(remove, path, None)
+                    except OSError as e:
+                        log.warning(f"Could not delete {path}: {e}")
+                        continue
+                removed += 1
+        try:
+            shutil.rmtree(batch.path, onerror=_remove_readonly)
+        except OSError as e:
+            log.warning(f"Could not delete {batch.path}: {e}")
+    log.info(f"Trash purged: {removed} entries deleted")
+    return removed
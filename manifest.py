@@ -0,0 +1,56 @@
+import os
+
+from logger_utils import get_logger
+
+log = get_logger(__name__)
+
+INDENT = " "
+
+
+def escape_attr(value):
+    # Same escaping minidom applies to attribute values, so the streamed
+    # output matches the former ElementTree + minidom.toprettyxml() result.
+    return (str(value).replace("&", "&amp;").replace("<", "&lt;")
+            .replace("\"", "&quot;").replace(">", "&gt;"))
+
+
+def _element(tag, attrs):
+    rendered = "".join(f' {name}="{escape_attr(value)}"' for name, value in attrs)
+    return f"{INDENT}<{tag}{rendered}/>\n"
+
+
+def iter_manifest_lines(guid, inventory):
+    yield '<DAZInstallManifest VERSION="0.1">\n'
+    yield _element("GlobalID", [("VALUE", guid)])
+    for entry in inventory.files:
+        yield _element("File", [
+            ("TARGET", "Content"),
+            ("ACTION", "Install"),
+            ("VALUE", f"Content/{entry.rel_path}"),
+        ])
+    yield "</DAZInstallManifest>\n"
+
+
+def iter_supplement_lines(product_name, product_tags):
+    yield '<ProductSupplement VERSION="0.1">\n'
+    yield _element("ProductName", [("VALUE", product_name)])
+    yield _element("InstallTypes", [("VALUE", "Content")])
+    yield _element("ProductTags", [("VALUE", product_tags)])
+    yield "</ProductSupplement>\n"
+
+
+def write_lines(path, lines):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="\n") as fh:
+        fh.writelines(lines)
+    os.replace(tmp_path, path)
+
+
+def write_manifest(path, guid, inventory):
+    write_lines(path, iter_manifest_lines(guid, inventory))
+    log.info(f"Manifest written with {len(inventory.files)} entries: {path}")
+
+
+def write_supplement(path, product_name, product_tags):
+    write_lines(path, iter_supplement_lines(product_name, product_tags))
+    log.info(f"Supplement written: {path}")
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from logger_utils import get_logger
+
+log = get_logger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+# Stored members have no blob and cost nothing on disk, but every entry is
+# in index.json, which is read and rewritten whole on each build.
+DEFAULT_MAX_ENTRIES = 300000
+HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path, block_size):
+    # Digest of per-block digests, so the ZIP writer can build the same value
+    # from blocks compressed out of order on the worker pool.
+    digests = []
+    with open(path, 'rb') as fh:
+        while True:
+            block = fh.read(block_size)
+            if not block and digests:
+                break
+            digests.append(block_digest(block))
+            if len(block) < block_size:
+                break
+    return combine_digests(digests)
+
+
+def block_digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def combine_digests(digests):
+    return hashlib.blake2b(b''.join(digests), digest_size=16).hexdigest()
+
+
+class MemberCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, hash_contents=False, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_entries = max(0, int(max_entries))
+        self.hash_contents = hash_contents
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+                log.info("Member cache index is outdated; starting empty.")
+                return
+            entries = data.get("entries", {})
+            if isinstance(entries, dict):
+                self.entries = entries
+            log.info(f"Member cache loaded: {len(self.entries)} entries, {self.total_bytes()} bytes")
+        except Exception as e:
+            log.warning(f"Failed to read member cache index {self.index_path}: {e}; starting empty.")
+            self.entries = {}
+
+    @staticmethod
+    def make_key(arcname, size, mtime, level, sniff, block_size):
+        raw = f"{arcname}\0{size}\0{mtime:.6f}\0{level}\0{int(sniff)}\0{block_size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def blob_path(self, key):
+        return os.path.join(self.blob_dir, key[:2], key)
+
+    def total_bytes(self):
+        return sum(int(e.get("blob_size", 0)) for e in self.entries.values())
+
+    def lookup(self, key, file_path=None, block_size=None):
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.get("blob"):
+            try:
+                if os.path.getsize(self.blob_path(key)) != entry["compress_size"]:
+                    raise OSError("size mismatch")
+            except OSError:
+                self.discard(key)
+                self.misses += 1
+                return None
+
+        if self.hash_contents and file_path and entry.get("hash"):
+            if file_digest(file_path, block_size) != entry["hash"]:
+                self.discard(key)
+                self.misses += 1
+                return None
+
+        with self._lock:
+            entry["last_used"] = time.time()
+        self.hits += 1
+        return entry
+
+    def _tmp_path(self, key):
+        # Per-thread name so concurrent builds sharing the cache never write
+        # into the same partial blob.
+        return f"{self.blob_path(key)}.{threading.get_ident()}.tmp"
+
+    def open_blob(self, key):
+        path = self._tmp_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, 'wb')
+
+    def store(self, key, crc, compress_type, compress_size, has_blob, digest=None):
+        if has_blob:
+            os.replace(self._tmp_path(key), self.blob_path(key))
+        entry = {
+            "crc": crc,
+            "compress_type": compress_type,
+            "compress_size": compress_size,
+            "blob": has_blob,
+            "blob_size": compress_size if has_blob else 0,
+            "hash": digest,
+            "last_used": time.time(),
+        }
+        with self._lock:
+            self.entries[key] = entry
+
+    def abandon_blob(self, key):
+        try:
+            os.remove(self._tmp_path(key))
+        except OSError:
+            pass
+
+    def discard(self, key):
+        with self._lock:
+            entry = self.entries.pop(key, None)
+        if entry and entry.get("blob"):
+            try:
+                os.remove(self.blob_path(key))
+            except OSError:
+                pass
+
+    def save(self):
+        with self._lock:
+            by_age = sorted(self.entries.items(), key=lambda kv: kv[1].get("last_used", 0))
+            total = sum(int(e.get("blob_size", 0)) for _, e in by_age)
+            count = len(by_age)
+            evicted = []
+            # Least recently used first: blobs until the size fits, and any
+            # entry until the count fits.
+            for key, entry in by_age:
+                over_count = count > self.max_entries
+                if total <= self.max_bytes and not over_count:
+                    break
+                if over_count or entry.get("blob"):
+                    total -= int(entry.get("blob_size", 0))
+                    count -= 1
+                    evicted.append(key)
+            for key in evicted:
+                self.entries.pop(key, None)
+            data = {"version": CACHE_VERSION, "entries": self.entries}
+
+        for key in evicted:
+            try:
+                os.remove(self.blob_path(key))
+            except OSError:
+                pass
+
+        tmp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            log.error(f"Failed to write member cache index {self.index_path}: {e}")
+
+        log.info(
+            f"Member cache: {self.hits} hits, {self.misses} misses, "
+            f"{len(evicted)} evicted, {total} bytes in use"
+        )
@@ -0,0 +1,753 @@
+import os
+import time
+import tempfile
+import zlib
+import zipfile
+import threading
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+from logger_utils import get_logger
+from member_cache import block_digest, combine_digests
+
+log = get_logger(__name__)
+
+BLOCK_SIZE = 4 * 1024 * 1024
+DICT_SIZE = 32 * 1024
+DEFAULT_LEVEL = 9
+SAMPLE_SIZE = 256 * 1024
+SAMPLE_MEMBERS = 64
+COPY_CHUNK = 1024 * 1024
+WRITE_BUFFER = 8 * 1024 * 1024
+ESTIMATE_SAMPLE = 64 * 1024
+COMPRESSED_MAGIC = (
+    b'\x1f\x8b',              # gzip (compressed .dsf/.duf)
+    b'\x89PNG',               # PNG
+    b'\xff\xd8\xff',          # JPEG
+    b'PK\x03\x04',            # ZIP
+    b'7z\xbc\xaf\x27\x1c',    # 7z
+    b'Rar!',                  # RAR
+)
+IGNORE_NAMES = {'.DS_Store', 'Thumbs.db', 'desktop.ini', '__MACOSX'}
+
+
+class PackagingCancelled(Exception):
+    pass
+
+
+def _check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise PackagingCancelled("Build was cancelled.")
+
+
+@dataclass(frozen=True, slots=True)
+class InventoryEntry:
+    rel_path: str
+    size: int
+    mtime: float
+    mode: int
+    ignored: bool
+
+
+class ContentInventory:
+    def __init__(self, content_dir, entries, arc_prefix="Content"):
+        self.content_dir = os.path.abspath(content_dir)
+        self.arc_prefix = arc_prefix
+        self.entries = entries
+        self.files = [e for e in entries if not e.ignored]
+        self.total_size = sum(e.size for e in self.files)
+
+    @classmethod
+    def scan(cls, content_dir, ignore_names=IGNORE_NAMES, cancel_event=None):
+        # Same order as os.walk with sorted dirs/files: a directory's files
+        # first, then each subdirectory depth-first.
+        entries = []
+        stack = [("", os.path.abspath(content_dir), False)]
+        while stack:
+            _check_cancel(cancel_event)
+            rel_dir, abs_dir, ignored_dir = stack.pop()
+            files = []
+            dirs = []
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry)
+                        elif entry.is_file():
+                            files.append(entry)
+                    except OSError as e:
+                        log.warning(f"Skipping unreadable entry {entry.path}: {e}")
+
+            files.sort(key=lambda e: e.name)
+            for entry in files:
+                _check_cancel(cancel_event)
+                st = entry.stat()
+                entries.append(InventoryEntry(
+                    rel_path=rel_dir + entry.name,
+                    size=st.st_size,
+                    mtime=st.st_mtime,
+                    mode=st.st_mode,
+                    ignored=ignored_dir or entry.name in ignore_names,
+                ))
+
+            dirs.sort(key=lambda e: e.name, reverse=True)
+            for entry in dirs:
+                stack.append((
+                    rel_dir + entry.name + "/",
+                    entry.path,
+                    ignored_dir or entry.name in ignore_names,
+                ))
+
+        inventory = cls(content_dir, entries)
+        log.info(
+            f"Content inventory: {len(inventory.files)} files, "
+            f"{inventory.total_size} bytes ({len(entries) - len(inventory.files)} ignored)."
+        )
+        return inventory
+
+    def subset(self, entries):
+        return ContentInventory(self.content_dir, list(entries), self.arc_prefix)
+
+    def path(self, entry):
+        return os.path.join(self.content_dir, *entry.rel_path.split("/"))
+
+    def arcname(self, entry):
+        return f"{self.arc_prefix}/{entry.rel_path}"
+
+    def zipinfo(self, entry):
+        date_time = time.localtime(entry.mtime)[0:6]
+        if date_time[0] < 1980:
+            date_time = (1980, 1, 1, 0, 0, 0)
+        elif date_time[0] > 2107:
+            date_time = (2107, 12, 31, 23, 59, 59)
+        zinfo = zipfile.ZipInfo(self.arcname(entry), date_time)
+        zinfo.external_attr = (entry.mode & 0xFFFF) << 16
+        zinfo.file_size = entry.size
+        return zinfo
+
+
+def estimate_compressed_sizes(inventory, policy=None, sample_size=ESTIMATE_SAMPLE, cancel_event=None):
+    # Deflate the head of every file at its policy level and extrapolate;
+    # stored and already-compressed files count at full size.
+    policy = policy or CompressionPolicy()
+    sizes = {}
+    for entry in inventory.files:
+        _check_cancel(cancel_event)
+        level, sniff = policy.lookup(entry.rel_path)
+        if level is None or entry.size == 0:
+            sizes[entry.rel_path] = entry.size
+            continue
+        try:
+            with open(inventory.path(entry), 'rb') as fh:
+                head = fh.read(sample_size)
+        except OSError:
+            sizes[entry.rel_path] = entry.size
+            continue
+        if (sniff and is_precompressed(head)) or not head:
+            sizes[entry.rel_path] = entry.size
+            continue
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        deflated = len(compressor.compress(head)) + len(compressor.flush())
+        ratio = min(1.0, deflated / len(head))
+        sizes[entry.rel_path] = int(entry.size * ratio)
+    return sizes
+
+
+def _folder_groups(files, weights, budget, depth=0):
+    # Inventory order keeps every folder's files contiguous, so a folder is a
+    # run of entries sharing the path component at this depth. Folders larger
+    # than the budget are broken up by their own subfolders.
+    groups = []
+    i = 0
+    while i < len(files):
+        parts = files[i].rel_path.split("/")
+        if len(parts) <= depth + 1:
+            groups.append([files[i]])
+            i += 1
+            continue
+
+        key = parts[depth]
+        j = i + 1
+        while j < len(files):
+            other = files[j].rel_path.split("/")
+            if len(other) <= depth + 1 or other[depth] != key:
+                break
+            j += 1
+
+        run = files[i:j]
+        if sum(weights[e.rel_path] for e in run) > budget:
+            groups.extend(_folder_groups(run, weights, budget, depth + 1))
+        else:
+            groups.append(run)
+        i = j
+    return groups
+
+
+def split_inventory(inventory, budget_bytes, sizes=None):
+    # Pack folder groups into parts in inventory order; `sizes` maps rel_path
+    # to the weight counted against the budget (uncompressed size by default).
+    weights = sizes or {e.rel_path: e.size for e in inventory.files}
+    budget = max(1, int(budget_bytes))
+
+    parts = []
+    current = []
+    current_size = 0
+    for group in _folder_groups(inventory.files, weights, budget):
+        group_size = sum(weights[e.rel_path] for e in group)
+        if current and current_size + group_size > budget:
+            parts.append(current)
+            current = []
+            current_size = 0
+        if group_size > budget:
+            log.warning(f"{group[0].rel_path} alone exceeds the part size budget ({group_size} > {budget} bytes).")
+        current.extend(group)
+        current_size += group_size
+    if current or not parts:
+        parts.append(current)
+
+    log.info(f"Split {len(inventory.files)} files into {len(parts)} parts (budget {budget} bytes).")
+    return [inventory.subset(files) for files in parts]
+
+
+def _gf2_matrix_times(mat, vec):
+    total = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+
+def _gf2_matrix_square(mat):
+    return [_gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+
+def crc32_shift_operator(len2):
+    # The matrix crc32_combine() applies to crc1 for len2 bytes. Writers
+    # build it once for their block size; it costs about two dozen matrix
+    # squarings, far more than applying it.
+    op = [1 << n for n in range(32)]
+    if len2 <= 0:
+        return op
+
+    odd = [0xEDB88320] + [1 << n for n in range(31)]
+    even = _gf2_matrix_square(odd)
+    odd = _gf2_matrix_square(even)
+
+    while True:
+        even = _gf2_matrix_square(odd)
+        if len2 & 1:
+            op = [_gf2_matrix_times(even, column) for column in op]
+        len2 >>= 1
+        if not len2:
+            break
+
+        odd = _gf2_matrix_square(even)
+        if len2 & 1:
+            op = [_gf2_matrix_times(odd, column) for column in op]
+        len2 >>= 1
+        if not len2:
+            break
+
+    return op
+
+
+def crc32_combine(crc1, crc2, len2, operator=None):
+    # Port of zlib's crc32_combine(); the zlib module does not expose it.
+    # operator, from crc32_shift_operator(len2), skips building it again.
+    if len2 <= 0:
+        return crc1
+    return _gf2_matrix_times(operator or crc32_shift_operator(len2), crc1) ^ crc2
+
+
+def is_precompressed(head):
+    return head.startswith(COMPRESSED_MAGIC)
+
+
+def format_size(num_bytes):
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds):
+    if seconds is None or seconds < 0:
+        return "--:--"
+    seconds = int(round(seconds))
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class ProgressMeter:
+    def __init__(self, total_bytes, callback, interval=0.1):
+        # callback(percent, bytes_per_second, eta_seconds, current_name), invoked
+        # at most once per interval so tiny files cannot flood the receiver.
+        self.total_bytes = max(1, int(total_bytes))
+        self.callback = callback
+        self.interval = interval
+        self.done_bytes = 0
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, num_bytes, name=""):
+        # Parts of a split product are written concurrently into one meter;
+        # the increment and the decision to emit happen under one lock.
+        with self._lock:
+            self.done_bytes += num_bytes
+            done = self._take_emit(False)
+        if done is not None:
+            self._emit(done, name)
+
+    def update(self, done_bytes, name="", force=False):
+        with self._lock:
+            self.done_bytes = max(self.done_bytes, done_bytes)
+            done = self._take_emit(force)
+        if done is not None:
+            self._emit(done, name)
+
+    def _take_emit(self, force):
+        # Called with the lock held. Returns the byte count to report, or
+        # None when the last report was less than an interval ago.
+        now = time.monotonic()
+        if not force and now - self._last_emit < self.interval:
+            return None
+        self._last_emit = now
+        return self.done_bytes
+
+    def _emit(self, done_bytes, name):
+        elapsed = time.monotonic() - self._started
+        rate = done_bytes / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total_bytes - done_bytes)
+        eta = remaining / rate if rate > 0 else -1.0
+        percent = min(99, int(done_bytes * 100 / self.total_bytes))
+        self.callback(percent, rate, eta, name)
+
+    def finish(self, name=""):
+        with self._lock:
+            self._last_emit = time.monotonic()
+            done = self.done_bytes
+        elapsed = time.monotonic() - self._started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        self.callback(100, rate, 0.0, name)
+
+
+class CompressionPolicy:
+    def __init__(self, rules=None, default_level=DEFAULT_LEVEL):
+        # rules: {".ext": (level, sniff)}; a level of None stores the file as-is.
+        self.default_level = default_level
+        self.rules = {ext.casefold(): rule for ext, rule in (rules or {}).items()}
+
+    @classmethod
+    def from_config(cls, items, default_level=DEFAULT_LEVEL):
+        rules = {}
+        for item in items or []:
+            if not isinstance(item, dict):
+                continue
+            ext = str(item.get('name', '')).strip().casefold()
+            if not ext:
+                continue
+            if not ext.startswith('.'):
+                ext = '.' + ext
+            method = str(item.get('method', 'deflate')).strip().casefold()
+            if method == 'store':
+                level = None
+            else:
+                try:
+                    level = min(9, max(0, int(item.get('level', default_level))))
+                except (TypeError, ValueError):
+                    level = default_level
+            rules[ext] = (level, bool(item.get('sniff', False)))
+        return cls(rules, default_level)
+
+    def lookup(self, name):
+        ext = os.path.splitext(name)[1].casefold()
+        return self.rules.get(ext, (self.default_level, False))
+
+
+class CompressionStats:
+    def __init__(self):
+        self.deflated_files = 0
+        self.deflated_in = 0
+        self.deflated_out = 0
+        self.deflate_seconds = 0.0
+        self.stored_files = 0
+        self.stored_bytes = 0
+        self.cached_files = 0
+        self.sample_in = 0
+        self.sample_out = 0
+
+    def add_member(self, stored, raw_size, compress_size):
+        if stored:
+            self.stored_files += 1
+            self.stored_bytes += raw_size
+        else:
+            self.deflated_files += 1
+            self.deflated_in += raw_size
+            self.deflated_out += compress_size
+
+    def add_block(self, result):
+        self.deflate_seconds += result.seconds
+        self.sample_in += result.sample_in
+        self.sample_out += result.sample_out
+
+    def log_summary(self):
+        ratio = (self.deflated_out / self.deflated_in * 100) if self.deflated_in else 100.0
+        log.info(
+            f"Compression: deflated {self.deflated_files} files, "
+            f"{format_size(self.deflated_in)} -> {format_size(self.deflated_out)} ({ratio:.1f}%) "
+            f"in {self.deflate_seconds:.1f} s CPU; stored {self.stored_files} files, "
+            f"{format_size(self.stored_bytes)} as-is; {self.cached_files} files reused from cache."
+        )
+        if not self.stored_bytes:
+            return
+        throughput = self.deflated_in / self.deflate_seconds if self.deflate_seconds > 0 else 0
+        est_seconds = f"~{self.stored_bytes / throughput:.1f} s" if throughput else "unknown"
+        if self.sample_in:
+            saved = self.stored_bytes * (1 - self.sample_out / self.sample_in)
+            est_saving = f"~{format_size(max(0, saved))}"
+        else:
+            est_saving = "unknown"
+        log.info(
+            f"Compression policy tradeoff: deflating the stored files would have cost "
+            f"{est_seconds} CPU to save {est_saving}."
+        )
+
+
+@dataclass(slots=True)
+class _BlockJob:
+    file_path: str
+    zinfo: zipfile.ZipInfo
+    index: int
+    count: int
+    offset: int
+    length: int
+    level: int | None
+    sniff: bool
+    sample: bool
+    digest: bool = False
+    cache_key: str | None = None
+
+
+@dataclass(slots=True)
+class _CachedJob:
+    file_path: str
+    zinfo: zipfile.ZipInfo
+    entry: dict
+    cache_key: str
+
+
+@dataclass(slots=True)
+class _BlockResult:
+    data: bytes
+    crc: int
+    length: int
+    stored: bool
+    seconds: float = 0.0
+    sample_in: int = 0
+    sample_out: int = 0
+    digest: bytes | None = None
+
+
+def _compress_block(job):
+    # Each block is an independent raw deflate segment primed with the 32 KiB
+    # preceding it, so the concatenated segments form one valid stream (pigz style).
+    level = job.level
+    with open(job.file_path, 'rb') as fh:
+        zdict = b''
+        if job.offset and level is not None:
+            start = max(0, job.offset - DICT_SIZE)
+            fh.seek(start)
+            zdict = fh.read(job.offset - start)
+        else:
+            fh.seek(job.offset)
+        data = fh.read(job.length)
+
+    if len(data) != job.length:
+        raise OSError(f"File changed while packaging: {job.file_path}")
+
+    digest = block_digest(data) if job.digest else None
+
+    if job.sniff and level is not None and is_precompressed(data[:8]):
+        level = None
+
+    if level is None:
+        result = _BlockResult(data, zlib.crc32(data), job.length, True, digest=digest)
+        if job.sample and data:
+            chunk = data[:SAMPLE_SIZE]
+            result.sample_in = len(chunk)
+            result.sample_out = len(zlib.compress(chunk, 6))
+        return result
+
+    started = time.thread_time()
+    if zdict:
+        comp = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        comp = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    final = job.index == job.count - 1
+    out = comp.compress(data) + comp.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    return _BlockResult(out, zlib.crc32(data), job.length, False, time.thread_time() - started, digest=digest)
+
+
+class ParallelZipWriter:
+    def __init__(self, zip_path, compresslevel=DEFAULT_LEVEL, workers=4, block_size=BLOCK_SIZE, policy=None, cache=None, cancel_event=None):
+        self.zip_path = zip_path
+        self.compresslevel = compresslevel
+        self.workers = max(1, int(workers))
+        self.block_size = max(DICT_SIZE, int(block_size))
+        self._block_shift = crc32_shift_operator(self.block_size)
+        self.policy = policy or CompressionPolicy(default_level=compresslevel)
+        self.cache = cache
+        self.cancel_event = cancel_event
+        self.stats = CompressionStats()
+
+        # The archive only takes its final name once it is complete, so a
+        # cancelled or failed build never leaves a truncated zip behind.
+        fd, self.temp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(zip_path)}.", suffix=".part",
+            dir=os.path.dirname(os.path.abspath(zip_path))
+        )
+        self._fh = os.fdopen(fd, 'w+b', buffering=WRITE_BUFFER)
+        self.zipf = zipfile.ZipFile(
+            self._fh, mode='w', compression=zipfile.ZIP_DEFLATED,
+            compresslevel=compresslevel, strict_timestamps=False
+        )
+        self._member = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _release_member(self):
+        if self._member and self._member.get("blob"):
+            self._member["blob"].close()
+            self.cache.abandon_blob(self._member["cache_key"])
+        self._member = None
+
+    def close(self):
+        self._release_member()
+        try:
+            self.zipf.close()
+            self._fh.close()
+            os.replace(self.temp_path, self.zip_path)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        self._release_member()
+        self.zipf.fp = None
+        try:
+            self._fh.close()
+        except OSError:
+            pass
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+    def _check_cancel(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise PackagingCancelled(f"Packaging of {os.path.basename(self.zip_path)} was cancelled.")
+
+    def write_stream(self, arcname, chunks, encoding="utf-8"):
+        # Generated members (Manifest.dsx, Supplement.dsx) go straight into
+        # the archive without a temporary file.
+        self._check_cancel()
+        zinfo = zipfile.ZipInfo(arcname, time.localtime()[0:6])
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.external_attr = 0o644 << 16
+        with self.zipf.open(zinfo, 'w') as fh:
+            for chunk in chunks:
+                fh.write(chunk.encode(encoding) if isinstance(chunk, str) else chunk)
+
+    def _iter_jobs(self, members):
+        samples = 0
+        for file_path, zinfo, mtime in members:
+            level, sniff = self.policy.lookup(zinfo.filename)
+            size = zinfo.file_size
+
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(zinfo.filename, size, mtime, level, sniff, self.block_size)
+                entry = self.cache.lookup(cache_key, file_path, self.block_size)
+                if entry is not None:
+                    yield _CachedJob(file_path, zinfo, entry, cache_key)
+                    continue
+
+            count = max(1, -(-size // self.block_size))
+            if sniff and count > 1:
+                with open(file_path, 'rb') as fh:
+                    if is_precompressed(fh.read(8)):
+                        level = None
+                sniff = False
+
+            sample = (level is None or sniff) and samples < SAMPLE_MEMBERS
+            if sample:
+                samples += 1
+
+            digest = cache_key is not None and self.cache.hash_contents
+            for n in range(count):
+                offset = n * self.block_size
+                yield _BlockJob(
+                    file_path, zinfo, n, count, offset,
+                    min(self.block_size, size - offset), level, sniff, sample and n == 0,
+                    digest, cache_key
+                )
+
+    def _begin_member(self, zinfo):
+        zf = self.zipf
+        zinfo.compress_size = 0
+        zinfo.CRC = 0
+        zinfo.flag_bits = 0x00
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16
+
+        zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        zf.fp.seek(zf.start_dir)
+        zinfo.header_offset = zf.fp.tell()
+        zf._writecheck(zinfo)
+        zf._didModify = True
+        zf.fp.write(zinfo.FileHeader(zip64))
+        return zip64
+
+    def _end_member(self, zinfo, zip64, crc, compress_size):
+        zf = self.zipf
+        zinfo.CRC = crc
+        zinfo.compress_size = compress_size
+        if not zip64 and compress_size > zipfile.ZIP64_LIMIT:
+            raise RuntimeError(f"Compressed size too large for {zinfo.filename}")
+
+        zf.start_dir = zf.fp.tell()
+        zf.fp.seek(zinfo.header_offset)
+        zf.fp.write(zinfo.FileHeader(zip64))
+        zf.fp.seek(zf.start_dir)
+
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+
+    def _write_block(self, job, result, progress):
+        zinfo = job.zinfo
+        if job.index == 0:
+            zinfo.compress_type = zipfile.ZIP_STORED if result.stored else zipfile.ZIP_DEFLATED
+            self._member = {
+                "zip64": self._begin_member(zinfo),
+                "crc": result.crc,
+                "compress_size": 0,
+                "digests": [],
+                "cache_key": job.cache_key,
+                # Stored members are re-read from the source on a cache hit,
+                # so only deflated data is kept as a blob.
+                "blob": self.cache.open_blob(job.cache_key) if job.cache_key and not result.stored else None,
+            }
+        else:
+            # Only a member's last block is shorter than block_size.
+            shift = self._block_shift if result.length == self.block_size else None
+            self._member["crc"] = crc32_combine(self._member["crc"], result.crc, result.length, shift)
+
+        member = self._member
+        self.zipf.fp.write(result.data)
+        if member["blob"]:
+            member["blob"].write(result.data)
+        if result.digest is not None:
+            member["digests"].append(result.digest)
+        member["compress_size"] += len(result.data)
+        self.stats.add_block(result)
+        if progress:
+            progress(result.length, zinfo.filename)
+
+        if job.index == job.count - 1:
+            self._end_member(zinfo, member["zip64"], member["crc"], member["compress_size"])
+            self.stats.add_member(result.stored, zinfo.file_size, member["compress_size"])
+            if member["cache_key"]:
+                if member["blob"]:
+                    member["blob"].close()
+                self.cache.store(
+                    member["cache_key"], member["crc"], zinfo.compress_type, member["compress_size"],
+                    member["blob"] is not None,
+                    combine_digests(member["digests"]) if member["digests"] else None
+                )
+            self._member = None
+
+    def _write_cached(self, job, progress):
+        zinfo = job.zinfo
+        entry = job.entry
+        zinfo.compress_type = entry["compress_type"]
+        zip64 = self._begin_member(zinfo)
+        source = self.cache.blob_path(job.cache_key) if entry.get("blob") else job.file_path
+
+        remaining = entry["compress_size"]
+        with open(source, 'rb') as fh:
+            while remaining > 0:
+                self._check_cancel()
+                chunk = fh.read(min(COPY_CHUNK, remaining))
+                if not chunk:
+                    raise OSError(f"Cached data truncated for {zinfo.filename}")
+                self.zipf.fp.write(chunk)
+                remaining -= len(chunk)
+                if progress and not entry.get("blob"):
+                    progress(len(chunk), zinfo.filename)
+
+        self._end_member(zinfo, zip64, entry["crc"], entry["compress_size"])
+        stored = zinfo.compress_type == zipfile.ZIP_STORED
+        self.stats.add_member(stored, zinfo.file_size, entry["compress_size"])
+        self.stats.cached_files += 1
+        if progress and entry.get("blob"):
+            progress(zinfo.file_size, zinfo.filename)
+
+    def write_inventory(self, inventory, progress=None):
+        members = ((inventory.path(e), inventory.zipinfo(e), e.mtime) for e in inventory.files)
+        return self._write_members(members, progress)
+
+    def _write_members(self, members, progress=None):
+        # members: ordered (file_path, zinfo, mtime) tuples. Blocks are compressed
+        # out of order on the pool but written strictly in member order;
+        # progress(num_bytes, arcname) is called for every block written.
+        window = self.workers * 2
+        pending = deque()
+        jobs = self._iter_jobs(members)
+        written = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            def fill():
+                while len(pending) < window:
+                    job = next(jobs, None)
+                    if job is None:
+                        return
+                    fut = executor.submit(_compress_block, job) if isinstance(job, _BlockJob) else None
+                    pending.append((job, fut))
+
+            try:
+                fill()
+                while pending:
+                    self._check_cancel()
+                    job, fut = pending.popleft()
+                    if fut is None:
+                        fill()
+                        self._write_cached(job, progress)
+                        written += 1
+                        continue
+
+                    result = fut.result()
+                    fill()
+                    self._write_block(job, result, progress)
+                    if job.index == job.count - 1:
+                        written += 1
+            except BaseException:
+                for _, fut in pending:
+                    if fut is not None:
+                        fut.cancel()
+                raise
+
+        return written
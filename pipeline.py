@@ -0,0 +1,309 @@
+import os
+import re
+import stat
+import uuid
+import shutil
+import threading
+from dataclasses import dataclass, replace
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+from PIL import Image, ImageOps
+
+from logger_utils import get_logger
+from packager import (
+    ParallelZipWriter, ContentInventory, CompressionPolicy, ProgressMeter, PackagingCancelled,
+    split_inventory, estimate_compressed_sizes
+)
+from manifest import write_manifest, write_supplement, iter_manifest_lines, iter_supplement_lines
+from member_cache import MemberCache, DEFAULT_MAX_BYTES
+
+log = get_logger(__name__)
+
+
+class BuildError(Exception):
+    pass
+
+
+@dataclass
+class BuildJob:
+    content_dir: str
+    destination_folder: str
+    store: str
+    prefix: str
+    sku: str
+    product_name: str
+    product_part: int = 1
+    product_tags: str = "DAZStudio4_5"
+    guid: str = ""
+    image_path: str = ""
+    # Deletes everything in <content>/Runtime/Support first; only safe on a
+    # scratch copy such as DIMBuild/Content.
+    clean_support: bool = False
+    work_dir: str = ""
+    keep_manifests: bool = False
+
+    def __post_init__(self):
+        if not self.guid:
+            self.guid = str(uuid.uuid4())
+        if not self.work_dir:
+            self.work_dir = os.path.dirname(os.path.abspath(self.content_dir))
+
+    @property
+    def part_str(self):
+        return f"{int(self.product_part):02d}"
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.work_dir, "Manifest.dsx")
+
+    @property
+    def supplement_path(self):
+        return os.path.join(self.work_dir, "Supplement.dsx")
+
+    @property
+    def zip_path(self):
+        return os.path.join(self.destination_folder, zip_filename(self.prefix, self.sku, self.part_str, self.product_name))
+
+    def missing_fields(self):
+        required = {
+            "store": self.store, "product_name": self.product_name, "prefix": self.prefix,
+            "sku": self.sku, "product_part": self.product_part,
+        }
+        return [name for name, value in required.items() if not value]
+
+
+def zip_filename(prefix, sku, product_part, product_name):
+    prefix_clean = re.sub(r'[^A-Za-z0-9]+', '', str(prefix)).upper()
+    try:
+        sku_formatted = f"{int(str(sku)):08d}"
+    except ValueError:
+        sku_formatted = str(sku).zfill(8)
+
+    sanitized_name = re.sub(r'[^A-Za-z0-9._-]+', '_', str(product_name)).strip('_')
+    return f"{prefix_clean}{sku_formatted}-{product_part}_{sanitized_name}.zip"
+
+
+def open_member_cache(doc_main_dir, max_bytes=DEFAULT_MAX_BYTES, hash_contents=False):
+    try:
+        return MemberCache(
+            os.path.join(doc_main_dir, "Cache", "Members"),
+            max_bytes=max_bytes,
+            hash_contents=hash_contents
+        )
+    except Exception as e:
+        log.warning(f"Member cache unavailable, compressing everything: {e}")
+        return None
+
+
+def clean_support_directory(content_dir):
+    target_dir = os.path.join(content_dir, "Runtime", "Support")
+    os.makedirs(target_dir, exist_ok=True)
+    log.info("Attempting to clean Support Directory.")
+
+    def handle_remove_readonly(func, path, exc_info):
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            func(path)
+        except Exception as e:
+            log.error(f"Still failed to delete {path}. Reason: {e}")
+
+    for name in os.listdir(target_dir):
+        p = os.path.join(target_dir, name)
+        try:
+            if os.path.isfile(p) or os.path.islink(p):
+                os.chmod(p, stat.S_IWRITE)
+                os.unlink(p)
+            elif os.path.isdir(p):
+                shutil.rmtree(p, onerror=handle_remove_readonly)
+        except Exception as e:
+            log.error(f"Failed to delete {p}. Reason: {e}")
+            return False
+
+    log.info("Support directory successfully cleaned.")
+    return True
+
+
+def process_and_paste_image(content_dir, store, sku, product_name, image_path):
+    if not image_path:
+        return True
+
+    log.info("Attempting to generate Product cover.")
+    try:
+        sanitized_product_name = re.sub(r'[^A-Za-z0-9._-]+', '_', product_name).strip('_')
+        store_formatted = re.sub(r'[^A-Za-z0-9._-]+', '_', store).strip('_')
+        new_image_name = f"{store_formatted}_{sku}_{sanitized_product_name}.jpg"
+
+        target_dir = os.path.join(content_dir, "Runtime", "Support")
+        os.makedirs(target_dir, exist_ok=True)
+        new_image_path = os.path.join(target_dir, new_image_name)
+        with Image.open(image_path) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode != 'RGB':
+                img = img.convert("RGB")
+            img.thumbnail((300, 300), Image.Resampling.LANCZOS)
+            img.save(new_image_path, "JPEG")
+            log.info("Product cover successfully generated.")
+        return True
+    except Exception as e:
+        log.error(f"An error occurred while processing the image: {str(e)}")
+        return False
+
+
+def create_manifest(job, inventory):
+    log.info("Attempting to generate Product Manifest.")
+    try:
+        write_manifest(job.manifest_path, job.guid, inventory)
+        log.info("Product Manifest successfully generated.")
+        return True
+    except Exception as e:
+        log.error(f"An error occurred while creating the manifest: {str(e)}")
+        return False
+
+
+def create_supplement(job):
+    log.info("Attempting to generate Product Supplement.")
+    try:
+        write_supplement(job.supplement_path, job.product_name, job.product_tags)
+        log.info("Product Supplement successfully generated.")
+        return True
+    except Exception as e:
+        log.error(f"An error occurred while creating the supplement: {str(e)}")
+        return False
+
+
+def plan_parts(job, inventory, budget_bytes=0, compressed=False, policy=None, cancel_event=None):
+    if not budget_bytes or inventory.total_size <= budget_bytes:
+        return [(job, inventory)]
+
+    sizes = estimate_compressed_sizes(inventory, policy, cancel_event=cancel_event) if compressed else None
+    inventories = split_inventory(inventory, budget_bytes, sizes)
+    if len(inventories) == 1:
+        return [(job, inventory)]
+
+    # Every part is its own DIM package: consecutive part numbers, a fresh
+    # GUID after the first and its own folder for kept Manifest.dsx copies.
+    parts = []
+    for index, part_inventory in enumerate(inventories):
+        part_number = int(job.product_part) + index
+        part_job = replace(
+            job,
+            product_part=part_number,
+            guid=job.guid if index == 0 else "",
+            work_dir=os.path.join(job.work_dir, f"Part{part_number:02d}"),
+        )
+        parts.append((part_job, part_inventory))
+    return parts
+
+
+class _EitherEvent:
+    def __init__(self, *events):
+        self.events = [e for e in events if e is not None]
+
+    def is_set(self):
+        return any(e.is_set() for e in self.events)
+
+
+def _write_package(job, inventory, progress, policy=None, cache=None, workers=4, cancel_event=None):
+    zip_path = job.zip_path
+    log.info(f"Attempting to generate the DIM file {os.path.basename(zip_path)}.")
+    log.info(f"Compressing {len(inventory.files)} files with {workers} workers.")
+
+    with ParallelZipWriter(zip_path, workers=workers, policy=policy, cache=cache, cancel_event=cancel_event) as writer:
+        writer.write_inventory(inventory, progress=progress)
+        writer.write_stream("Manifest.dsx", iter_manifest_lines(job.guid, inventory))
+        writer.write_stream("Supplement.dsx", iter_supplement_lines(job.product_name, job.product_tags))
+
+    writer.stats.log_summary()
+    if job.keep_manifests:
+        os.makedirs(job.work_dir, exist_ok=True)
+        create_manifest(job, inventory)
+        create_supplement(job)
+    log.info(f"DIM file created at: {zip_path}")
+    return zip_path
+
+
+def zip_content_and_manifests(job, inventory, meter, policy=None, cache=None, workers=4, cancel_event=None):
+    return zip_parts([(job, inventory)], meter, policy, cache, workers, cancel_event)[0]
+
+
+def zip_parts(parts, meter, policy=None, cache=None, workers=4, cancel_event=None):
+    parallel = min(len(parts), max(1, workers // 2))
+    part_workers = max(1, workers // parallel)
+    if len(parts) > 1:
+        log.info(f"Building {len(parts)} parts, {parallel} at a time.")
+
+    # One failing or cancelled part stops the others, and parts that already
+    # finished are removed so the destination never holds half a product.
+    failed = threading.Event()
+    stop = _EitherEvent(failed, cancel_event)
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = [
+            executor.submit(_write_package, job, inventory, meter.advance, policy, cache, part_workers, stop)
+            for job, inventory in parts
+        ]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        if any(f.exception() is not None for f in done):
+            failed.set()
+
+    if cache is not None:
+        cache.save()
+
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if errors:
+        for future in futures:
+            if future.exception() is None:
+                try:
+                    os.remove(future.result())
+                except OSError:
+                    pass
+        raise next((e for e in errors if not isinstance(e, PackagingCancelled)), errors[0])
+
+    meter.finish()
+    return [f.result() for f in futures]
+
+
+def _check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise PackagingCancelled("Build was cancelled.")
+
+
+def build_package(job, policy=None, cache=None, workers=4, progress=None, part_budget=0, budget_compressed=False,
+                  cancel_event=None, stage=None, progress_interval=1.0):
+    # stage(text) is called as each step starts; progress receives the
+    # ProgressMeter callback arguments while the archive is written.
+    stage = stage or (lambda text: None)
+    missing = job.missing_fields()
+    if missing:
+        raise BuildError(f"Missing required fields: {', '.join(missing)}")
+    if not os.path.isdir(job.content_dir):
+        raise BuildError(f"Content directory not found: {job.content_dir}")
+    os.makedirs(job.destination_folder, exist_ok=True)
+
+    if job.clean_support:
+        stage("Cleaning Support folder…")
+        if not clean_support_directory(job.content_dir):
+            raise BuildError("Failed to clean the Support directory.")
+    _check_cancel(cancel_event)
+
+    if job.image_path:
+        stage("Generating cover…")
+        if not process_and_paste_image(job.content_dir, job.store, job.sku, job.product_name, job.image_path):
+            raise BuildError("Failed to process the image.")
+    _check_cancel(cancel_event)
+
+    stage("Scanning content…")
+    policy = policy or CompressionPolicy()
+    try:
+        inventory = ContentInventory.scan(job.content_dir, cancel_event=cancel_event)
+    except OSError as e:
+        raise BuildError(f"Failed to read the content directory: {e}")
+    _check_cancel(cancel_event)
+
+    if part_budget:
+        stage("Planning parts…")
+    parts = plan_parts(job, inventory, part_budget, budget_compressed, policy, cancel_event)
+    _check_cancel(cancel_event)
+
+    stage("Packaging…")
+    meter = ProgressMeter(inventory.total_size, progress or (lambda *args: None), interval=progress_interval)
+    return zip_parts(parts, meter, policy, cache, workers, cancel_event)
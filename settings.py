@@ -8,7 +8,7 @@ from PySide6.QtCore import Qt, QUrl
 from PySide6.QtGui import QDesktopServices
 from qfluentwidgets import (
     setTheme, Theme, CheckBox, LineEdit, ToolButton, PushButton, PrimaryPushButton,
-    Pivot, FluentIcon as FIF, TableWidget, ListWidget, SubtitleLabel
+    Pivot, FluentIcon as FIF, TableWidget, ListWidget, SubtitleLabel, BodyLabel, SpinBox
 )
 from logger_utils import get_logger
 from utils import tooltip_stylesheet, label_stylesheet
@@ -184,6 +184,101 @@ class SimpleListEditor(QWidget):
             log.error("Failed to save list data to %s: %s", self.config_path, e)
 
 
+class CompressionPolicyEditor(QWidget):
+    def __init__(self, config_path: str, parent=None):
+        super().__init__(parent)
+        self.config_path = config_path
+
+        layout = QVBoxLayout(self)
+
+        self.table = TableWidget(self)
+        self.table.setColumnCount(4)
+        self.table.setHorizontalHeaderLabels(["Extension", "Method", "Level", "Sniff"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.EditKeyPressed)
+        self.table.setToolTip(
+            "Method: 'store' or 'deflate'. Level: 0-9 (deflate only). "
+            "Sniff: 'yes' stores files that are already compressed (e.g. gzip'd .duf)."
+        )
+
+        self.table.setColumnWidth(0, 120)
+        self.table.setColumnWidth(1, 100)
+        self.table.setColumnWidth(2, 80)
+
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.add_btn = PushButton("Add", self)
+        self.del_btn = PushButton("Delete", self)
+        btn_layout.addWidget(self.add_btn)
+        btn_layout.addWidget(self.del_btn)
+        btn_layout.addStretch(1)
+        layout.addLayout(btn_layout)
+
+        self.add_btn.clicked.connect(self.addRow)
+        self.del_btn.clicked.connect(self.deleteRow)
+
+        self.loadData()
+
+    def _appendRow(self, name="", method="deflate", level="", sniff="no"):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for col, value in enumerate((name, method, level, sniff)):
+            self.table.setItem(row, col, QTableWidgetItem(str(value)))
+        return row
+
+    def loadData(self):
+        if not os.path.exists(self.config_path):
+            log.info("Compression policy config not found (will be created on save): %s", self.config_path)
+            return
+        try:
+            with open(self.config_path, 'r', encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get('data', []):
+                method = item.get('method', 'deflate')
+                level = item.get('level', '') if method != 'store' else ''
+                self._appendRow(item.get('name', ''), method, level, "yes" if item.get('sniff') else "no")
+            log.info("Loaded compression policy from %s", self.config_path)
+        except Exception as e:
+            log.error("Failed to load compression policy from %s: %s", self.config_path, e)
+
+    def addRow(self):
+        row = self._appendRow()
+        self.table.editItem(self.table.item(row, 0))
+
+    def deleteRow(self):
+        rows = sorted({i.row() for i in self.table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.table.removeRow(row)
+
+    def saveData(self):
+        items = []
+        for row in range(self.table.rowCount()):
+            cells = [self.table.item(row, col) for col in range(4)]
+            name, method, level, sniff = (c.text().strip() if c else "" for c in cells)
+            if not name:
+                continue
+            name = name if name.startswith('.') else '.' + name
+            method = "store" if method.casefold() == "store" else "deflate"
+            item = {"name": name.casefold(), "method": method}
+            if method == "deflate":
+                try:
+                    item["level"] = min(9, max(0, int(level)))
+                except ValueError:
+                    item["level"] = 9
+            if sniff.casefold() in ("yes", "true", "1"):
+                item["sniff"] = True
+            items.append(item)
+        try:
+            with open(self.config_path, 'w', encoding="utf-8") as f:
+                json.dump({"version": CONFIG_VERSION, "data": items}, f, indent=4)
+            log.info("Saved compression policy to %s (%d rules)", self.config_path, len(items))
+        except Exception as e:
+            log.error("Failed to save compression policy to %s: %s", self.config_path, e)
+
+
 class SettingsDialog(QDialog):
     def __init__(self, doc_main_dir: str, parent=None):
         super().__init__(parent, Qt.WindowType.WindowCloseButtonHint)
@@ -216,6 +311,84 @@ class SettingsDialog(QDialog):
         path_layout.addWidget(self.browse_button)
         g_layout.addLayout(path_layout)
 
+        nested_layout = QHBoxLayout()
+        nested_label = BodyLabel("Nested archive depth:", general_tab)
+        self.nested_depth_spinbox = SpinBox(general_tab)
+        self.nested_depth_spinbox.setRange(0, 10)
+        self.nested_depth_spinbox.setToolTip("How many levels of zips inside zips are opened when extracting. 0 ignores embedded archives.")
+        nested_layout.addWidget(nested_label)
+        nested_layout.addWidget(self.nested_depth_spinbox)
+        nested_layout.addStretch(1)
+        g_layout.addLayout(nested_layout)
+
+        import_layout = QHBoxLayout()
+        import_label = BodyLabel("Archives extracted at once:", general_tab)
+        self.import_workers_spinbox = SpinBox(general_tab)
+        self.import_workers_spinbox.setRange(1, 8)
+        self.import_workers_spinbox.setToolTip("When several archives are dropped or selected together.")
+        import_layout.addWidget(import_label)
+        import_layout.addWidget(self.import_workers_spinbox)
+        import_layout.addStretch(1)
+        g_layout.addLayout(import_layout)
+
+        self.archive_cache_checkbox = CheckBox("Remember imported archives", general_tab)
+        self.archive_cache_checkbox.setToolTip("Keeps the extracted files of each archive (hard-linked where possible) so importing it again skips extraction.")
+        g_layout.addWidget(self.archive_cache_checkbox)
+
+        archive_cache_layout = QHBoxLayout()
+        archive_cache_label = BodyLabel("Archive cache limit (GB):", general_tab)
+        self.archive_cache_size_spinbox = SpinBox(general_tab)
+        self.archive_cache_size_spinbox.setRange(1, 512)
+        archive_cache_layout.addWidget(archive_cache_label)
+        archive_cache_layout.addWidget(self.archive_cache_size_spinbox)
+        archive_cache_layout.addStretch(1)
+        g_layout.addLayout(archive_cache_layout)
+
+        self.archive_cache_checkbox.stateChanged.connect(self._updateArchiveCacheControls)
+
+        self.member_cache_checkbox = CheckBox("Reuse compressed files between builds", general_tab)
+        self.member_cache_checkbox.setToolTip("Keeps compressed copies of packaged files so rebuilding the same product only recompresses changed files.")
+        g_layout.addWidget(self.member_cache_checkbox)
+
+        cache_layout = QHBoxLayout()
+        cache_size_label = BodyLabel("Cache size limit (GB):", general_tab)
+        self.member_cache_size_spinbox = SpinBox(general_tab)
+        self.member_cache_size_spinbox.setRange(1, 512)
+        cache_layout.addWidget(cache_size_label)
+        cache_layout.addWidget(self.member_cache_size_spinbox)
+        cache_layout.addStretch(1)
+        g_layout.addLayout(cache_layout)
+
+        self.member_cache_hash_checkbox = CheckBox("Verify cached files by content hash (slower)", general_tab)
+        self.member_cache_hash_checkbox.setToolTip("Re-reads each file to confirm it is unchanged instead of trusting size and modification time.")
+        g_layout.addWidget(self.member_cache_hash_checkbox)
+
+        self.member_cache_checkbox.stateChanged.connect(self._updateCacheControls)
+
+        self.split_parts_checkbox = CheckBox("Split large products into several parts", general_tab)
+        self.split_parts_checkbox.setToolTip("Builds -01, -02, … packages, each with its own Manifest.dsx, keeping folders together where possible.")
+        g_layout.addWidget(self.split_parts_checkbox)
+
+        split_layout = QHBoxLayout()
+        split_size_label = BodyLabel("Part size limit (MB):", general_tab)
+        self.split_size_spinbox = SpinBox(general_tab)
+        self.split_size_spinbox.setRange(50, 100000)
+        self.split_size_spinbox.setSingleStep(100)
+        split_layout.addWidget(split_size_label)
+        split_layout.addWidget(self.split_size_spinbox)
+        split_layout.addStretch(1)
+        g_layout.addLayout(split_layout)
+
+        self.split_compressed_checkbox = CheckBox("Apply the limit to the estimated compressed size", general_tab)
+        self.split_compressed_checkbox.setToolTip("Samples each file to estimate its zipped size instead of using the size on disk.")
+        g_layout.addWidget(self.split_compressed_checkbox)
+
+        self.split_parts_checkbox.stateChanged.connect(self._updateSplitControls)
+
+        self.keep_manifests_checkbox = CheckBox("Keep a copy of Manifest.dsx and Supplement.dsx in DIMBuild", general_tab)
+        self.keep_manifests_checkbox.setToolTip("Both files are always written into the package; this also saves them next to the Content folder.")
+        g_layout.addWidget(self.keep_manifests_checkbox)
+
         g_layout.addStretch(1)
         self.browse_button.clicked.connect(self.selectTemplateDir)
 
@@ -240,6 +413,11 @@ class SettingsDialog(QDialog):
         self.stack.addWidget(self.folder_editor)
         self.pivot.addItem("foldersTab", "DAZ Folders")
 
+        self.compression_editor = CompressionPolicyEditor(os.path.join(config_dir, 'compression_policy.json'), self)
+        self.compression_editor.setObjectName("compressionTab")
+        self.stack.addWidget(self.compression_editor)
+        self.pivot.addItem("compressionTab", "Compression")
+
         info_tab = QWidget(objectName="infoTab")
         info_layout = QVBoxLayout(info_tab)
         info_layout.setSpacing(14)
@@ -348,6 +526,19 @@ class SettingsDialog(QDialog):
 
         log.info("SettingsDialog initialized")
 
+    def _updateCacheControls(self, *_):
+        enabled = self.member_cache_checkbox.isChecked()
+        self.member_cache_size_spinbox.setEnabled(enabled)
+        self.member_cache_hash_checkbox.setEnabled(enabled)
+
+    def _updateArchiveCacheControls(self, *_):
+        self.archive_cache_size_spinbox.setEnabled(self.archive_cache_checkbox.isChecked())
+
+    def _updateSplitControls(self, *_):
+        enabled = self.split_parts_checkbox.isChecked()
+        self.split_size_spinbox.setEnabled(enabled)
+        self.split_compressed_checkbox.setEnabled(enabled)
+
     def selectTemplateDir(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Template Directory")
         if dir_path:
@@ -359,6 +550,7 @@ class SettingsDialog(QDialog):
             self.store_editor.saveData()
             self.tag_editor.saveData()
             self.folder_editor.saveData()
+            self.compression_editor.saveData()
             log.info("All settings saved from SettingsDialog")
         except Exception as e:
             log.error("Failed to save settings from SettingsDialog: %s", e)
@@ -85,13 +85,6 @@ def get_optimal_workers():
     return min(suggested_workers, max_workers_cap)
 
 
-def calculate_total_files(directory):
-    total_files = 0
-    for _, _, files in os.walk(directory):
-        total_files += len(files)
-    return total_files
-
-
 tooltip_stylesheet = """\
 QToolTip {
     background-color: #2b2b2b;
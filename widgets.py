@@ -2,13 +2,16 @@ import os
 import shutil
 import tempfile
 import base64
+import queue
+import threading
 
+import shiboken6
 from PySide6.QtWidgets import (
     QMessageBox, QWidget, QLabel, QDialog, QVBoxLayout, QFileDialog,
     QHBoxLayout, QFileSystemModel
 )
 from PySide6.QtCore import (
-    Qt, QThread, Signal, QEasingCurve, QUrl, QTimer
+    Qt, QThread, Signal, QEasingCurve, QUrl, QTimer, QFileSystemWatcher
 )
 from PySide6.QtNetwork import (
     QNetworkAccessManager, QNetworkRequest, QNetworkReply
@@ -21,15 +24,31 @@ from qfluentwidgets import (
     setTheme, Theme, PrimaryPushButton, PushButton, Action, RoundMenu, LineEdit,
     InfoBar, InfoBarPosition, InfoBarIcon,
     CompactSpinBox, TogglePushButton, FlowLayout, TreeView,
-    MessageBoxBase, SubtitleLabel
+    MessageBoxBase, SubtitleLabel, StateToolTip
 )
 from qfluentwidgets import FluentIcon as FIF
 
-from utils import resource_path, calculate_total_files, show_warning, show_error, show_info
+from utils import resource_path, show_warning, show_error, show_info
 from logger_utils import get_logger
+from packager import PackagingCancelled, format_size
+from extractor import ExtractionProgress
+from dir_totals import DirectoryTotals, ScanCancelled
+from file_ops import (
+    COPY, MOVE, DELETE, FileOperation, FileOperationCancelled,
+    transfer_target, blocked_reason, run_operations, purge_trash
+)
 
 log = get_logger(__name__)
 
+CHANGE_DEBOUNCE_MS = 300
+
+FILE_OPERATION_PHASES = {
+    "preparing": "Preparing",
+    COPY: "Copying",
+    MOVE: "Moving",
+    DELETE: "Deleting",
+}
+
 class ProductLineEdit(LineEdit):
     def __init__(self, parent=None):
         super(ProductLineEdit, self).__init__(parent)
@@ -460,40 +479,153 @@ class ImageLabel(QLabel):
         except Exception:
             return False
 
-class ZipThread(QThread):
+class BuildThread(QThread):
     succeeded = Signal()
+    cancelled = Signal()
     error = Signal(str)
-    progressUpdated = Signal(int)
+    stageChanged = Signal(str)
+    progressUpdated = Signal(int, float, float, str)
 
-    def __init__(self, content_dir, prefix, sku, product_part, product_name, destination_folder, zip_function):
+    def __init__(self, build_function):
         super().__init__()
-        self.content_dir = content_dir
-        self.prefix = prefix
-        self.sku = sku
-        self.product_part = product_part
-        self.product_name = product_name
-        self.destination_folder = destination_folder
-        self.zip_function = zip_function
+        self.build_function = build_function
+        self.cancel_event = threading.Event()
+
+    def requestInterruption(self):
+        self.cancel_event.set()
+        super().requestInterruption()
 
     def run(self):
         try:
-            total_files = max(1, calculate_total_files(self.content_dir))
-            self.zip_function(
-                self.content_dir,
-                self.prefix,
-                self.sku,
-                self.product_part,
-                self.product_name,
-                self.destination_folder,
-                self.reportProgress,
-                total_files
-            )
+            self.build_function(self.stageChanged.emit, self.reportProgress, self.cancel_event)
             self.succeeded.emit()
+        except PackagingCancelled:
+            self.cancelled.emit()
         except Exception as e:
             self.error.emit(str(e))
 
-    def reportProgress(self, percent):
-        self.progressUpdated.emit(percent)
+    def reportProgress(self, percent, bytes_per_second, eta_seconds, current_name):
+        self.progressUpdated.emit(percent, float(bytes_per_second), float(eta_seconds), current_name)
+
+
+class FileOperationThread(QThread):
+    # Runs one batch of explorer copy/move/delete operations whose conflicts
+    # were already resolved on the GUI thread.
+    succeeded = Signal(int)
+    cancelled = Signal()
+    itemFailed = Signal(str, str)
+    # phase, done bytes, total bytes, done files, total files, bytes per second
+    progressUpdated = Signal(str, float, float, int, int, float)
+
+    def __init__(self, operations, parent=None):
+        super().__init__(parent)
+        self.operations = list(operations)
+        self.cancel_event = threading.Event()
+
+    def requestInterruption(self):
+        self.cancel_event.set()
+        super().requestInterruption()
+
+    def run(self):
+        progress = ExtractionProgress(self._emitProgress, self.cancel_event)
+        try:
+            done = run_operations(self.operations, progress, self._reportError)
+            self.succeeded.emit(done)
+        except FileOperationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            log.error(f"File operation failed: {e}")
+            self.itemFailed.emit("File operation", str(e))
+
+    def _reportError(self, op, exc):
+        self.itemFailed.emit(op.name, str(exc))
+
+    def _emitProgress(self, phase, done_bytes, total_bytes, done_files, total_files, rate):
+        self.progressUpdated.emit(phase, float(done_bytes), float(total_bytes), done_files, total_files, rate)
+
+
+class TrashPurgeThread(QThread):
+    # Deletes what Clear All moved to DIMCreator/Trash. Anything left when
+    # the app closes is deleted by the next session's purge.
+    purged = Signal(int)
+
+    def __init__(self, dimbuild_dir, parent=None):
+        super().__init__(parent)
+        self.dimbuild_dir = dimbuild_dir
+        self.cancel_event = threading.Event()
+
+    def requestInterruption(self):
+        self.cancel_event.set()
+        super().requestInterruption()
+
+    def run(self):
+        try:
+            self.purged.emit(purge_trash(self.dimbuild_dir, self.cancel_event))
+        except Exception as e:
+            log.error(f"Failed to empty the trash: {e}")
+
+
+class DirectorySizeScanner(QThread):
+    # Long-lived worker that fills a DirectoryTotals cache for the folders the
+    # tree asks about, most recently requested first.
+    totalsReady = Signal(str)
+
+    def __init__(self, totals, parent=None):
+        super().__init__(parent)
+        self.totals = totals
+        self.cancel_event = threading.Event()
+        self._queue = queue.LifoQueue()
+        self._queued = set()
+        self._lock = threading.Lock()
+
+    def request(self, path):
+        key = self.totals.key(path)
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._queue.put(path)
+
+    def requestInterruption(self):
+        self.cancel_event.set()
+        super().requestInterruption()
+
+    def run(self):
+        while not self.cancel_event.is_set():
+            try:
+                path = self._queue.get(timeout=0.25)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._queued.discard(self.totals.key(path))
+            try:
+                self.totals.scan(path, self.cancel_event)
+            except ScanCancelled:
+                break
+            except Exception as e:
+                log.warning(f"Could not total {path}: {e}")
+                continue
+            self.totalsReady.emit(path)
+
+
+class DirectorySizeModel(QFileSystemModel):
+    # Shows the aggregated size and file count of folders in the Size column;
+    # missing totals are requested from the scanner when a row is painted.
+    totalsRequested = Signal(str)
+
+    def __init__(self, totals, parent=None):
+        super().__init__(parent)
+        self.totals = totals
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.column() == 1 and role == Qt.ItemDataRole.DisplayRole and self.isDir(index):
+            path = self.filePath(index)
+            t = self.totals.get(path)
+            if t is None:
+                self.totalsRequested.emit(path)
+                return "…"
+            return f"{format_size(t.bytes)} · {t.files:,} files"
+        return super().data(index, role)
 
 
 class NameEntryDialog(MessageBoxBase):
@@ -527,6 +659,7 @@ class CustomTreeView(TreeView):
         self.setDragEnabled(True)
         self.internalDrag = False
         self.overwrite_all = False
+        self.skip_all = False
         self.setDragDropMode(TreeView.DragDropMode.DragDrop)
 
     def startDrag(self, supportedActions):
@@ -572,179 +705,98 @@ class CustomTreeView(TreeView):
             event.ignore()
             return
 
-        any_file_op = False
+        operations = []
+        archives = []
 
+        # Conflicts are all asked about here, before anything is copied, so
+        # the batch then runs in the background without further prompts.
         for url in event.mimeData().urls():
             sourcePath = url.toLocalFile()
             try:
                 if sourcePath.lower().endswith(('.zip', '.rar', '.7z')):
-                    if self.parent().main_gui:
-                        self.parent().main_gui.dropExtractArchive(sourcePath)
+                    archives.append(sourcePath)
                 else:
                     if event.source() == self:
-                        self.movePath(sourcePath, destinationPath)
+                        op = self.movePath(sourcePath, destinationPath)
                     else:
-                        self.copyPath(sourcePath, destinationPath)
-                    any_file_op = True
+                        op = self.copyPath(sourcePath, destinationPath)
+                    if op:
+                        operations.append(op)
             except Exception as e:
                 print(f"Error moving/copying {sourcePath} to {destinationPath}: {e}")
                 log.error(f"Error moving/copying {sourcePath} to {destinationPath}: {e}")
                 self.parent().InvalidFolderInfoBar()
 
         self.overwrite_all = False
+        self.skip_all = False
 
-        if any_file_op:
-            QTimer.singleShot(0, self.parent().refresh_view)
+        if archives and self.parent().main_gui:
+            self.parent().main_gui.dropExtractArchives(archives)
 
+        if operations:
+            self.parent().queueFileOperations(operations)
 
     def copyPath(self, sourcePath, destinationPath):
-        if not os.path.isdir(destinationPath):
-            destinationPath = os.path.dirname(destinationPath)
-
-        if not os.path.isdir(destinationPath):
-            print(f"Invalid destination path for copy: {destinationPath}")
-            log.error(f"Invalid destination path for copy: {destinationPath}")
-            return
-
-        basename = os.path.basename(sourcePath.rstrip(os.sep))
-        target = os.path.join(destinationPath, basename)
-
-        try:
-            src_abs = os.path.abspath(sourcePath)
-            tgt_abs = os.path.abspath(target)
-            if os.path.isdir(src_abs):
-                common = os.path.commonpath([src_abs, tgt_abs])
-                if common == src_abs:
-                    print(f"Copy blocked: {src_abs} -> {tgt_abs} (self/subfolder).")
-                    log.warning(f"Copy blocked: {src_abs} -> {tgt_abs} (self/subfolder).")
-                    return
-            try:
-                if os.path.exists(tgt_abs) and os.path.samefile(src_abs, tgt_abs):
-                    print("Copy skipped: source and target are the same.")
-                    log.info("Copy skipped: same source and target.")
-                    return
-            except Exception:
-                pass
-        except Exception:
-            pass
-
-        if os.path.exists(target):
-            if not self.overwrite_all:
-                reply = QMessageBox.question(
-                    self.parent(),
-                    "Item exists",
-                    f"'{basename}' already exists. Overwrite (replace)?",
-                    QMessageBox.StandardButton.Yes
-                    | QMessageBox.StandardButton.No
-                    | QMessageBox.StandardButton.YesToAll,
-                    QMessageBox.StandardButton.No
-                )
-            else:
-                reply = QMessageBox.StandardButton.Yes
-
-            if reply == QMessageBox.StandardButton.No:
-                print("Copy canceled by user.")
-                log.info("Copy canceled by user (overwrite denied).")
-                return
-            if reply == QMessageBox.StandardButton.YesToAll:
-                self.overwrite_all = True
-
-            try:
-                if os.path.isdir(target) and not os.path.islink(target):
-                    shutil.rmtree(target)
-                else:
-                    os.remove(target)
-            except Exception as e:
-                log.error(f"Failed to remove existing target '{target}': {e}")
-                return
-
-        try:
-            if os.path.isdir(sourcePath):
-                shutil.copytree(sourcePath, target)
-            else:
-                os.makedirs(os.path.dirname(target), exist_ok=True)
-                shutil.copy2(sourcePath, target)
-            print(f"Item copied: {sourcePath} -> {target}")
-            log.info(f"Item copied: {sourcePath} -> {target}")
-        except Exception as e:
-            print(f"Error copying {sourcePath} to {target}: {e}")
-            log.error(f"Error copying {sourcePath} to {target}: {e}")
-            self.parent().InvalidFolderInfoBar()
-
+        return self._planTransfer(COPY, sourcePath, destinationPath)
 
     def movePath(self, sourcePath, destinationPath):
+        return self._planTransfer(MOVE, sourcePath, destinationPath)
+
+    def _planTransfer(self, kind, sourcePath, destinationPath):
+        # Returns the FileOperation to queue, or None when the item is
+        # skipped. Nothing is written here.
+        verb = "Copy" if kind == COPY else "Move"
         if not os.path.isdir(destinationPath):
             destinationPath = os.path.dirname(destinationPath)
 
         if not os.path.isdir(destinationPath):
-            print(f"Invalid destination path for move: {destinationPath}")
-            log.error(f"Invalid destination path for move: {destinationPath}")
-            return
+            print(f"Invalid destination path for {kind}: {destinationPath}")
+            log.error(f"Invalid destination path for {kind}: {destinationPath}")
+            return None
 
-        basename = os.path.basename(sourcePath.rstrip(os.sep))
-        target = os.path.join(destinationPath, basename)
+        target = transfer_target(sourcePath, destinationPath)
+        basename = os.path.basename(target)
 
-        try:
-            src_abs = os.path.abspath(sourcePath)
-            tgt_abs = os.path.abspath(target)
-            if os.path.isdir(src_abs):
-                common = os.path.commonpath([src_abs, tgt_abs])
-                if common == src_abs:
-                    print(f"Move blocked: {src_abs} -> {tgt_abs} (self/subfolder).")
-                    log.warning(f"Move blocked: {src_abs} -> {tgt_abs} (self/subfolder).")
-                    return
-            try:
-                if os.path.exists(tgt_abs) and os.path.samefile(src_abs, tgt_abs):
-                    print("Move skipped: source and target are the same.")
-                    log.info("Move skipped: same source and target.")
-                    return
-            except Exception:
-                pass
-        except Exception:
-            pass
+        reason = blocked_reason(sourcePath, target)
+        if reason:
+            print(f"{verb} skipped: {sourcePath} -> {target} ({reason})")
+            log.warning(f"{verb} skipped: {sourcePath} -> {target} ({reason})")
+            return None
 
         if os.path.exists(target):
-            if not self.overwrite_all:
+            if self.overwrite_all:
+                reply = QMessageBox.StandardButton.Yes
+            elif self.skip_all:
+                reply = QMessageBox.StandardButton.No
+            else:
                 reply = QMessageBox.question(
                     self.parent(),
                     "Item exists",
                     f"'{basename}' already exists. Overwrite (replace)?",
-                    QMessageBox.StandardButton.Yes 
-                    | QMessageBox.StandardButton.No 
-                    | QMessageBox.StandardButton.YesToAll,
+                    QMessageBox.StandardButton.Yes
+                    | QMessageBox.StandardButton.No
+                    | QMessageBox.StandardButton.YesToAll
+                    | QMessageBox.StandardButton.NoToAll,
                     QMessageBox.StandardButton.No
                 )
-            else:
-                reply = QMessageBox.StandardButton.Yes
 
-            if reply == QMessageBox.StandardButton.No:
-                print("Move canceled by user.")
-                log.info("Move canceled by user (overwrite denied).")
-                return
+            if reply == QMessageBox.StandardButton.NoToAll:
+                self.skip_all = True
+            if reply in (QMessageBox.StandardButton.No, QMessageBox.StandardButton.NoToAll):
+                print(f"{verb} canceled by user.")
+                log.info(f"{verb} canceled by user (overwrite denied): {basename}")
+                return None
             if reply == QMessageBox.StandardButton.YesToAll:
                 self.overwrite_all = True
+            return FileOperation(kind, sourcePath, target, overwrite=True)
 
-            try:
-                if os.path.isdir(target) and not os.path.islink(target):
-                    shutil.rmtree(target)
-                else:
-                    os.remove(target)
-            except Exception as e:
-                log.error(f"Failed to remove existing target '{target}': {e}")
-                return
-
-        try:
-            os.makedirs(os.path.dirname(target), exist_ok=True)
-            shutil.move(sourcePath, target)
-            print(f"Item moved: {sourcePath} -> {target}")
-            log.info(f"Item moved: {sourcePath} -> {target}")
-        except Exception as e:
-            print(f"Error moving {sourcePath} to {target}: {e}")
-            log.error(f"Error moving {sourcePath} to {target}: {e}")
-            self.parent().InvalidFolderInfoBar()
+        return FileOperation(kind, sourcePath, target)
 
 
 class FileExplorer(QWidget):
+    # Totals of DIMBuild/Content, or None while they are being counted.
+    contentTotalsChanged = Signal(object)
+
     def __init__(self, path=os.path.expanduser("~"), parent=None, dimbuild_dir="", main_gui=None):
         super().__init__(parent)
         self.dimbuild_dir = dimbuild_dir
@@ -753,8 +805,30 @@ class FileExplorer(QWidget):
         self.clipboard = None
         self.isCutOperation = False
 
-        self.model = QFileSystemModel()
-        self.model.setRootPath('')
+        self.fileOperationThread = None
+        self._pendingOperations = []
+        self._operationTip = None
+        self._operationsFailed = 0
+        self._operationsDoneMessage = None
+
+        self._changedDirs = set()
+        self._changeTimer = QTimer(self)
+        self._changeTimer.setSingleShot(True)
+        self._changeTimer.setInterval(CHANGE_DEBOUNCE_MS)
+        self._changeTimer.timeout.connect(self._applyPathChanges)
+
+        # Only DIMBuild is watched and populated; rooting the model at ''
+        # made Qt track the whole filesystem.
+        root = dimbuild_dir or path
+        self.content_dir = os.path.join(root, "Content")
+        self.totals = DirectoryTotals()
+        self.sizeScanner = DirectorySizeScanner(self.totals, self)
+        self.sizeScanner.totalsReady.connect(self._onTotalsReady)
+        self.sizeScanner.start()
+
+        self.model = DirectorySizeModel(self.totals)
+        self.model.totalsRequested.connect(self.sizeScanner.request)
+        self.model.setRootPath(root)
         self.treeView = CustomTreeView(self)
         self.treeView.setModel(self.model)
         self.treeView.setExpandsOnDoubleClick(False)
@@ -766,11 +840,19 @@ class FileExplorer(QWidget):
         self.treeView.setDragEnabled(True)
         self.treeView.setDragDropMode(TreeView.DragDropMode.DragDrop)
 
-        specificIndex = self.model.index(path)
+        specificIndex = self.model.index(root)
         self.treeView.setRootIndex(specificIndex)
 
+        # Fallback for changes made outside the app: the expanded folders are
+        # watched and re-listed after a short quiet period.
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.notifyPathsChanged)
+        self._watchDir(root)
+        self.treeView.expanded.connect(lambda index: self._watchDir(self.model.filePath(index)))
+        self.treeView.collapsed.connect(lambda index: self._unwatchDir(self.model.filePath(index)))
+
         self.treeView.setColumnWidth(0, 360)
-        self.treeView.setColumnWidth(1, 100)
+        self.treeView.setColumnWidth(1, 170)
         self.treeView.setColumnWidth(2, 120)
         self.treeView.setColumnWidth(3, 150)
         self.treeView.doubleClicked.connect(self.on_double_click)
@@ -788,7 +870,6 @@ class FileExplorer(QWidget):
             else:
                 if not QDesktopServices.openUrl(QUrl.fromLocalFile(path)):
                     raise Exception(f"Failed to open file: {path}")
-            QTimer.singleShot(0, self.refresh_view)
         except Exception as e:
             QMessageBox.critical(
                 self,
@@ -798,7 +879,6 @@ class FileExplorer(QWidget):
             )
             print(f"Error: {e}")
             log.error(f"Error: {e}")
-            QTimer.singleShot(0, self.refresh_view)
 
     def resizeEvent(self, event):
         self.treeView.setGeometry(0, 0, self.width(), self.height())
@@ -897,22 +977,109 @@ class FileExplorer(QWidget):
                 log.warning("Error: The selected path does not exist.")
 
     def refresh_view(self):
-        root = self.treeView.model().rootPath()
-        self.model.setRootPath('')
-        self.model.setRootPath(root)
+        # Re-lists the root and the expanded folders only, instead of
+        # re-populating the model from scratch.
+        dirs = [self.model.rootPath()]
+        pending = [self.treeView.rootIndex()]
+        while pending:
+            parent = pending.pop()
+            for row in range(self.model.rowCount(parent)):
+                index = self.model.index(row, 0, parent)
+                if self.treeView.isExpanded(index):
+                    dirs.append(self.model.filePath(index))
+                    pending.append(index)
+        self.notifyPathsChanged(*dirs)
+
+    def notifyPathsChanged(self, *paths):
+        # Folders whose entries changed, from the app's own operations or the
+        # watcher. They are re-listed together once things settle.
+        for path in paths:
+            if path:
+                self._changedDirs.add(os.path.normpath(path))
+        self._changeTimer.start()
+
+    def _applyPathChanges(self):
+        dirs, self._changedDirs = self._changedDirs, set()
+        root = os.path.normcase(os.path.normpath(self.model.rootPath()))
+        watched = {os.path.normcase(os.path.normpath(d)) for d in self.watcher.directories()}
+        for directory in sorted(dirs):
+            norm = os.path.normcase(directory)
+            if norm != root and not norm.startswith(root + os.sep):
+                continue
+            self.totals.invalidate(directory)
+            # Folders that are not shown are listed by the model when they
+            # are expanded; only the root and expanded ones are re-listed.
+            if norm not in watched and os.path.normcase(os.path.dirname(directory)) not in watched:
+                continue
+            try:
+                names = [entry.name for entry in os.scandir(directory)]
+            except OSError:
+                # Gone or not a folder: its parent lists what is left.
+                names = []
+                directory = os.path.dirname(directory)
+            parent = self.model.index(directory)
+            if not parent.isValid():
+                continue
+            # index() adds entries the model has not seen yet; removals are
+            # picked up by the model's own watcher on the populated parent.
+            for name in names:
+                self.model.index(os.path.join(directory, name))
+            if self.model.canFetchMore(parent):
+                self.model.fetchMore(parent)
+
+        self.contentTotalsChanged.emit(None)
+        self.requestContentTotals()
+        self.treeView.viewport().update()
+
+    def requestContentTotals(self):
+        if os.path.isdir(self.content_dir):
+            self.sizeScanner.request(self.content_dir)
+
+    def setCompressionPolicy(self, policy):
+        self.totals.set_policy(policy)
+        self.contentTotalsChanged.emit(None)
+        self.requestContentTotals()
+        self.treeView.viewport().update()
+
+    def _onTotalsReady(self, path):
+        self.treeView.viewport().update()
+        if self.totals.key(path) == self.totals.key(self.content_dir):
+            self.contentTotalsChanged.emit(self.totals.get(path))
+
+    def stopSizeScanner(self):
+        if self.sizeScanner.isRunning():
+            self.sizeScanner.requestInterruption()
+            self.sizeScanner.wait(2000)
+
+    def _watchDir(self, path):
+        if path and os.path.isdir(path) and path not in self.watcher.directories():
+            self.watcher.addPath(path)
+
+    def _unwatchDir(self, path):
+        if path in self.watcher.directories():
+            self.watcher.removePath(path)
+
+    def releaseWatches(self):
+        # Folders below the root are collapsed and no longer watched, so they
+        # can be renamed away (Windows refuses to rename watched folders).
+        self.treeView.collapseAll()
+        root = os.path.normcase(os.path.normpath(self.model.rootPath()))
+        for path in self.watcher.directories():
+            if os.path.normcase(os.path.normpath(path)) != root:
+                self.watcher.removePath(path)
 
     def reinitialize_model(self, newRootPath):
-        self.model = QFileSystemModel()
-        self.model.setRootPath('')
-        
-        self.treeView.setModel(self.model)
-        self.treeView.setRootIndex(self.model.index(newRootPath))
-        
-        self.treeView.setExpandsOnDoubleClick(False)
-        
+        # Keeps the model and its cached nodes; only a new root is set, and
+        # the folders below it are re-listed.
+        if os.path.normpath(self.model.rootPath()) != os.path.normpath(newRootPath):
+            self._unwatchDir(self.model.rootPath())
+            self.model.setRootPath(newRootPath)
+            self._watchDir(newRootPath)
+
         specificIndex = self.model.index(newRootPath)
         self.treeView.setRootIndex(specificIndex)
         self.treeView.expand(specificIndex)
+        self.refresh_view()
 
     def copySelected(self):
         selected_index = self.treeView.currentIndex()
@@ -958,27 +1125,16 @@ class FileExplorer(QWidget):
             log.error(f"Invalid destination path for paste operation: {destination_path}")
             return
 
-        basename = os.path.basename(self.clipboard.rstrip(os.sep))
-        target = os.path.join(destination_path, basename)
+        target = transfer_target(self.clipboard, destination_path)
+        basename = os.path.basename(target)
 
-        try:
-            src_abs = os.path.abspath(self.clipboard)
-            tgt_abs = os.path.abspath(target)
-            if os.path.isdir(src_abs):
-                common = os.path.commonpath([src_abs, tgt_abs])
-                if common == src_abs:
-                    show_warning(self, "Invalid Operation",
-                                "Cannot paste a folder into itself or its subfolder.",
-                                Qt.Vertical)
-                    log.warning(f"Paste blocked: {src_abs} -> {tgt_abs} (self/subfolder).")
-                    return
-            if os.path.samefile(self.clipboard, target):
-                show_info(self, "Operation Skipped", "Source and destination are the same.")
-                log.info(f"Paste skipped: same source and destination: {src_abs}")
-                return
-        except Exception:
-            pass
+        reason = blocked_reason(self.clipboard, target)
+        if reason:
+            show_warning(self, "Invalid Operation", reason, Qt.Vertical)
+            log.warning(f"Paste blocked: {self.clipboard} -> {target} ({reason})")
+            return
 
+        overwrite = False
         if os.path.exists(target):
             reply = QMessageBox.question(
                 self,
@@ -994,63 +1150,124 @@ class FileExplorer(QWidget):
                 show_info(self, "Operation Canceled",
                         f"Item <strong>{basename}</strong> not moved/copied.")
                 return
+            overwrite = True
 
-            try:
-                if os.path.isdir(target) and not os.path.islink(target):
-                    shutil.rmtree(target)
-                else:
-                    os.remove(target)
-            except Exception as e:
-                log.error(f"Failed to remove existing target '{target}': {e}")
-                show_error(self, "Overwrite Failed",
-                        f"Could not remove existing target.<br><small>{e}</small>")
-                return
+        if self.isCutOperation:
+            op = FileOperation(MOVE, self.clipboard, target, overwrite)
+            done = ("Moving Successful", f"Item <strong>{basename}</strong> successfully moved.")
+        else:
+            op = FileOperation(COPY, self.clipboard, target, overwrite)
+            done = ("Copying Successful", f"Item <strong>{basename}</strong> successfully copied.")
+
+        self.clipboard = None
+        self.isCutOperation = False
+        self.queueFileOperations([op], done)
 
-        try:
-            if self.isCutOperation:
-                shutil.move(self.clipboard, target)
-                print(f"Item moved: {self.clipboard} -> {destination_path}")
-                log.info(f"Item moved: {self.clipboard} -> {destination_path}")
-                show_info(self, "Moving Successful",
-                        f"Item <strong>{basename}</strong> successfully moved.")
-            else:
-                if os.path.isdir(self.clipboard):
-                    shutil.copytree(self.clipboard, target)
-                else:
-                    os.makedirs(os.path.dirname(target), exist_ok=True)
-                    shutil.copy2(self.clipboard, target)
-                print(f"Item copied: {self.clipboard} -> {destination_path}")
-                log.info(f"Item copied: {self.clipboard} -> {destination_path}")
-                show_info(self, "Copying Successful",
-                        f"Item <strong>{basename}</strong> successfully copied.")
-        except Exception as e:
-            print(f"Error during paste operation: {e}")
-            log.error(f"Error during paste operation: {e}")
-            show_error(self, "Paste Failed", f"Error during paste operation.<br><small>{e}</small>")
-        finally:
-            self.clipboard = None
-            self.isCutOperation = False
-            QTimer.singleShot(0, self.refresh_view)
-
-            
     def deleteSelected(self):
         selected_index = self.treeView.currentIndex()
         if selected_index.isValid():
             target = self.model.filePath(selected_index)
-            try:
-                if os.path.isdir(target):
-                    shutil.rmtree(target)
-                    QTimer.singleShot(0, self.refresh_view)
-                elif os.path.isfile(target):
-                    os.remove(target)
-                    QTimer.singleShot(0, self.refresh_view)
-                print(f"Item deleted: {target}")
-                log.info(f"Item deleted: {target}")
-                show_info(self, "Deletion Successful", "Item successfully deleted.")
-            except OSError as e:
-                print(f"Failed to delete the selected item. Error encountered: {e}")
-                log.error(f"Failed to delete the selected item. Error encountered: {e}")
-                show_error(self, 'Deletion Failed', "Failed to delete the selected item. Please try again or check for file permissions.")
+            if os.path.exists(target):
+                self.queueFileOperations(
+                    [FileOperation(DELETE, target)],
+                    ("Deletion Successful", "Item successfully deleted.")
+                )
+
+    def queueFileOperations(self, operations, done_message=None):
+        # Batches run one after another on a FileOperationThread; the view
+        # is refreshed once, when the last queued batch has finished.
+        if not operations:
+            return
+        self._pendingOperations.append((list(operations), done_message))
+        if self.fileOperationThread is None:
+            self._startNextOperations()
+
+    def _startNextOperations(self):
+        operations, done_message = self._pendingOperations.pop(0)
+        self._operationsFailed = 0
+        self._operationsDoneMessage = done_message
+
+        t = FileOperationThread(operations, self)
+        t.itemFailed.connect(self.onFileOperationFailed)
+        t.succeeded.connect(self.onFileOperationsSucceeded)
+        t.cancelled.connect(self.onFileOperationsCancelled)
+        t.progressUpdated.connect(self.updateFileOperationProgress)
+        t.finished.connect(self._onFileOperationThreadFinished)
+        t.finished.connect(t.deleteLater)
+        self.fileOperationThread = t
+
+        if self._operationTip is None:
+            tip = StateToolTip(FILE_OPERATION_PHASES["preparing"], "Please wait...", self)
+            tip.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, True)
+            tip.closedSignal.connect(self.cancelFileOperations)
+            tip.move(max(0, self.width() - tip.width() - 20), 10)
+            tip.show()
+            self._operationTip = tip
+        t.start()
+
+    def _onFileOperationThreadFinished(self):
+        t, self.fileOperationThread = self.fileOperationThread, None
+        for op in t.operations:
+            self._changedDirs.add(os.path.dirname(op.source))
+            if op.target:
+                self._changedDirs.add(os.path.dirname(op.target))
+        if self._pendingOperations:
+            self._startNextOperations()
+            return
+        tip, self._operationTip = self._operationTip, None
+        if tip and shiboken6.isValid(tip):
+            tip.close()
+        self.notifyPathsChanged()
+
+    def cancelFileOperations(self):
+        # Closing the progress tip: the item in progress is rolled back and
+        # queued batches are dropped.
+        self._operationTip = None
+        self._pendingOperations = []
+        t = self.fileOperationThread
+        if t and t.isRunning():
+            log.info("File operation cancellation requested.")
+            t.requestInterruption()
+
+    def stopFileOperations(self, timeout=5000):
+        # Cancels the running batch and drops the queued ones. Returns False
+        # when it is still running after timeout ms (a delete is not
+        # interrupted half way).
+        tip = self._operationTip
+        self.cancelFileOperations()
+        if tip and shiboken6.isValid(tip):
+            tip.close()
+        t = self.fileOperationThread
+        return not (t and t.isRunning() and not t.wait(timeout))
+
+    def updateFileOperationProgress(self, phase, done_bytes, total_bytes, done_files, total_files, bytes_per_second):
+        tip = self._operationTip
+        if not tip or not shiboken6.isValid(tip):
+            return
+        if total_bytes > 0:
+            percent = min(100, int(done_bytes * 100 / total_bytes))
+            detail = f"{percent}% · {format_size(done_bytes)} of {format_size(total_bytes)}"
+        else:
+            detail = "Please wait..."
+        if total_files:
+            detail += f" · {done_files}/{total_files} files"
+        if done_bytes and bytes_per_second > 0:
+            detail += f" · {format_size(bytes_per_second)}/s"
+        tip.setTitle(FILE_OPERATION_PHASES.get(phase, "Working"))
+        tip.setContent(detail)
+        tip.adjustSize()
+
+    def onFileOperationFailed(self, name, message):
+        self._operationsFailed += 1
+        print(f"File operation failed for {name}: {message}")
+        show_error(self, f"{name} failed", message, Qt.Vertical, InfoBarPosition.BOTTOM_RIGHT, True, 5000)
+
+    def onFileOperationsSucceeded(self, count):
+        if self._operationsDoneMessage and not self._operationsFailed:
+            show_info(self, *self._operationsDoneMessage)
+
+    def onFileOperationsCancelled(self):
+        show_info(self, "Operation Canceled", "The file operation was cancelled.")
 
     def renameSelected(self):
         selected_index = self.treeView.currentIndex()
@@ -1071,7 +1288,7 @@ class FileExplorer(QWidget):
                     return
                 try:
                     os.rename(current_path, new_path)
-                    QTimer.singleShot(0, self.refresh_view)
+                    self.notifyPathsChanged(base_path)
                 except OSError as e:
                     print(f"Error renaming file {current_path} to {new_path}: {e}")
                     log.error(f"Error renaming file {current_path} to {new_path}: {e}")
@@ -1104,7 +1321,7 @@ class FileExplorer(QWidget):
             try:
                 with open(new_file_path, 'w') as file:
                     file.close()
-                QTimer.singleShot(0, self.refresh_view)
+                self.notifyPathsChanged(destination_path)
                 show_info(self, "File Created", f"New file created: {file_name}")
                 print(f"New file created: {new_file_path}")
                 log.info(f"New file created: {new_file_path}")
@@ -1133,7 +1350,7 @@ class FileExplorer(QWidget):
 
             try:
                 os.makedirs(new_folder_path, exist_ok=True)
-                QTimer.singleShot(0, self.refresh_view)
+                self.notifyPathsChanged(destination_path)
                 show_info(self, "Folder Created", f"New folder created: {folder_name}")
                 print(f"New folder created: {new_folder_path}")
                 log.info(f"New folder created: {new_folder_path}")